@@ -0,0 +1,92 @@
+# ალერტების წესების შეფასების ღირებულება ერთ განახლებაზე.
+# ზომავს AlertEngine.evaluate-ის დაყოვნებას (p50/p99/max) ბიუჯეტთან შედარებით და expire-ის ღირებულებას.
+#
+#   python benchmarks/alert_benchmark.py --hosts 5000 --updates 200000 --rules 20
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'server'))
+
+from alerts import AlertEngine, Rule, DEFAULT_RULES
+
+METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+
+
+def make_rules(count):
+    rules = [Rule(**rule) for rule in DEFAULT_RULES]
+    for i in range(max(0, count - len(rules))):
+        rules.append(Rule(
+            name=f'extra_{i}',
+            metric=METRICS[i % len(METRICS)],
+            op=random.choice(('>', '>=', '<', '<=')),
+            threshold=random.uniform(5, 95),
+            duration=random.choice((0, 60, 300, 600)),
+            severity=random.choice(('info', 'warning', 'critical')),
+        ))
+    return rules
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * (len(values) - 1)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert rule evaluation benchmark')
+    parser.add_argument('--hosts', type=int, default=5000)
+    parser.add_argument('--updates', type=int, default=200000)
+    parser.add_argument('--rules', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=1.0)
+    parser.add_argument('--interval', type=float, default=5, help='simulated seconds between updates of one host')
+    args = parser.parse_args()
+
+    random.seed(1)
+    engine = AlertEngine(make_rules(args.rules), args.budget_ms / 1000)
+    hostnames = [f'HOST-{i:05d}' for i in range(args.hosts)]
+    # ჰოსტების ნაწილი "ცხელია", რომ წესები რეალურად ჩაირთოს და გამოირთოს
+    hot = set(random.sample(hostnames, args.hosts // 10))
+
+    clock = time.time()
+    step = args.interval / args.hosts
+    latencies = []
+    events = 0
+    expire_seconds = 0.0
+    for n in range(args.updates):
+        hostname = hostnames[n % args.hosts]
+        base = 85 if hostname in hot else 30
+        dynamic = {metric: min(100.0, max(0.0, random.gauss(base, 10))) for metric in METRICS}
+        clock += step
+        started = time.perf_counter()
+        events += len(engine.evaluate(hostname, dynamic, clock))
+        latencies.append(time.perf_counter() - started)
+        if n % args.hosts == 0:
+            started = time.perf_counter()
+            events += len(engine.expire(clock))
+            expire_seconds += time.perf_counter() - started
+
+    latencies.sort()
+    stats = engine.stats()
+    print(json.dumps({
+        'hosts': args.hosts,
+        'updates': args.updates,
+        'rules': args.rules,
+        'budget_ms': args.budget_ms,
+        'evaluate_p50_us': round(percentile(latencies, 0.5) * 1e6, 2),
+        'evaluate_p99_us': round(percentile(latencies, 0.99) * 1e6, 2),
+        'evaluate_max_us': round(latencies[-1] * 1e6, 2),
+        'over_budget_updates': sum(1 for latency in latencies if latency > args.budget_ms / 1000),
+        'budget_exceeded': stats['budget_exceeded'],
+        'skipped_rules': stats['skipped_rules'],
+        'alert_events': events,
+        'active_alerts': len(engine.active()),
+        'expire_total_ms': round(expire_seconds * 1000, 2),
+        'pending_deadlines': stats['pending_deadlines'],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# worker-ების რაოდენობის გავლენა გამტარობაზე: server/cluster.py ეშვება 1, 2, 4 ... worker-ით,
+# აგენტები worker-ებზე ნაწილდება რიგრიგობით და მუშაობს დახურულ ციკლში (შემდეგი განახლება იგზავნება
+# update_result-ის მიღებისთანავე). დაფა პირველ worker-ზეა და ითვლის ყველა worker-ის ცვლილებებს, ბოლოს კი
+# პირველი worker-იდან ეშვება ჯგუფური 'check' ბრძანება, რომ შემოწმდეს სხვა worker-ებზე მიწოდება და ack-ები.
+#
+#   python benchmarks/cluster_scaling.py --workers 1 2 4 --agents 200 --duration 20 --output cluster.json
+#
+# შედეგი მხოლოდ მაშინ აჩვენებს მასშტაბირებას, როცა მანქანაზე worker-ებისა და აგენტებისთვის საკმარისი ბირთვია
+import argparse
+import asyncio
+import json
+import os
+import pty
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import bcrypt
+import psutil
+
+from swarm import BENCH_PASSWORD, BENCH_USER, SERVER_DIR, Dashboard, SimAgent, Stats, decode_message, git_revision
+
+
+class ClosedLoopAgent(SimAgent):
+    def __init__(self, index, url, stats, codec, transports, stop_at):
+        super().__init__(index, url, stats, codec, transports)
+        self.stop_at = stop_at
+        self.running = False
+
+    async def on_update_result(self, result):
+        await super().on_update_result(result)
+        if self.running and time.monotonic() < self.stop_at:
+            await self.send_update()
+
+    async def on_host_command(self, payload):
+        data = decode_message(payload)
+        if not data or data.get('hostname') != self.hostname:
+            return
+        self.stats.commands += 1
+        command_id = data.get('command_id')
+        if command_id:
+            await self.sio.emit('command_ack', self.encode({'command_id': command_id}))
+            await self.sio.emit('command_result', self.encode({'command_id': command_id, 'success': True}))
+
+
+class CommandWatcher(Dashboard):
+    # დაფა, რომელიც ჯგუფური ბრძანების პროგრესსაც იღებს
+    def __init__(self, url, stats, username, password, transports):
+        super().__init__(url, stats, username, password, transports)
+        self.job_id = None
+        self.progress = None
+        self.started = asyncio.Event()
+        self.sio.on('bulk_command_result', self.on_bulk_command_result)
+        self.sio.on('bulk_command_progress', self.on_progress)
+
+    async def on_bulk_command_result(self, result):
+        self.job_id = result.get('job_id')
+        self.started.set()
+
+    async def on_progress(self, progress):
+        if progress.get('job_id') == self.job_id:
+            self.progress = progress
+
+
+def start_cluster(workers, port):
+    data_dir = tempfile.mkdtemp(prefix='cluster-')
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+    with open(os.path.join(data_dir, 'users.json'), 'w') as f:
+        json.dump({BENCH_USER: {'password_hash': password_hash}}, f)
+    env = dict(os.environ, DATA_DIR=data_dir, PORT=str(port), HOST='127.0.0.1', WORKERS=str(workers),
+               LOGIN_BURST='100')
+    _, tty = pty.openpty()
+    process = subprocess.Popen([sys.executable, 'cluster.py'], cwd=SERVER_DIR, env=env, stdin=tty,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    pending = set(range(port, port + workers))
+    while pending and time.monotonic() < deadline:
+        for worker_port in list(pending):
+            try:
+                socket.create_connection(('127.0.0.1', worker_port), timeout=0.5).close()
+                pending.discard(worker_port)
+            except OSError:
+                pass
+        time.sleep(0.2)
+    if pending:
+        process.kill()
+        raise RuntimeError(f'workers did not start on ports {sorted(pending)}')
+    return process, data_dir
+
+
+def free_port_range(count):
+    # count ზედიზედ თავისუფალი პორტი
+    for _ in range(100):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            base = sock.getsockname()[1]
+        if base + count >= 65535:
+            continue
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as sock:
+                    sock.bind(('127.0.0.1', port))
+            return base
+        except OSError:
+            continue
+    raise RuntimeError('no free port range')
+
+
+def cluster_cpu(process):
+    total = 0.0
+    try:
+        processes = [process] + process.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return total
+    for child in processes:
+        try:
+            times = child.cpu_times()
+            total += times.user + times.system
+        except psutil.Error:
+            pass
+    return total
+
+
+async def run_once(workers, args):
+    port = free_port_range(workers)
+    server, data_dir = start_cluster(workers, port)
+    urls = [f'http://127.0.0.1:{port + i}' for i in range(workers)]
+    transports = [args.transport]
+    stats = Stats()
+    result = {'workers': workers}
+    try:
+        monitor = psutil.Process(server.pid)
+        dashboard = CommandWatcher(urls[0], stats, BENCH_USER, BENCH_PASSWORD, transports)
+        await dashboard.connect()
+
+        stop_at = time.monotonic() + 3600
+        agents = [ClosedLoopAgent(i, urls[i % workers], stats, args.codec, transports, stop_at)
+                  for i in range(args.agents)]
+        for agent in agents:
+            await agent.connect()
+        hostnames = {agent.hostname for agent in agents}
+        deadline = time.monotonic() + args.join_timeout
+        while not hostnames <= stats.joined_seen and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        result['joined_seen'] = len(hostnames & stats.joined_seen)
+
+        acked_before, deltas_before = stats.updates_acked, stats.deltas
+        cpu_before = cluster_cpu(monitor)
+        started = time.perf_counter()
+        stop_at = time.monotonic() + args.duration
+        for agent in agents:
+            agent.stop_at = stop_at
+            agent.running = True
+            await agent.send_update()
+        await asyncio.sleep(args.duration)
+        for agent in agents:
+            agent.running = False
+        await asyncio.sleep(args.drain)
+        elapsed = time.perf_counter() - started
+        result.update(
+            updates_acked=stats.updates_acked - acked_before,
+            updates_per_second=round((stats.updates_acked - acked_before) / args.duration, 1),
+            updates_rejected=stats.updates_rejected,
+            deltas_on_worker0=stats.deltas - deltas_before,
+            server_cpu_seconds=round(cluster_cpu(monitor) - cpu_before, 2),
+            seconds=round(elapsed, 2),
+        )
+
+        # ჯგუფური ბრძანება პირველი worker-იდან ყველა ჰოსტზე
+        commands_before = stats.commands
+        await dashboard.sio.emit('bulk_command', {'command': 'check', 'selector': {'pattern': 'SIM-*'},
+                                                  'wave_size': args.agents, 'wave_interval': 0.1, 'timeout': 10})
+        await asyncio.wait_for(dashboard.started.wait(), 10)
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            counts = (dashboard.progress or {}).get('counts', {})
+            if counts.get('done', 0) + counts.get('failed', 0) + counts.get('timeout', 0) >= args.agents:
+                break
+            await asyncio.sleep(0.2)
+        result['bulk_command'] = {'delivered': stats.commands - commands_before,
+                                  'counts': (dashboard.progress or {}).get('counts')}
+
+        for agent in agents:
+            await agent.disconnect()
+        await dashboard.sio.disconnect()
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return result
+
+
+async def run(args):
+    results = {'params': vars(args), 'revision': git_revision(), 'cpu_count': os.cpu_count(), 'runs': []}
+    for workers in args.workers:
+        run_result = await run_once(workers, args)
+        print(json.dumps(run_result, ensure_ascii=False), flush=True)
+        results['runs'].append(run_result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-worker server scaling benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--drain', type=float, default=2)
+    parser.add_argument('--join-timeout', type=float, default=60)
+    parser.add_argument('--codec', default=None)
+    parser.add_argument('--transport', default='websocket', choices=['websocket', 'polling'])
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# სერვერის გადატვირთვის შემდეგ აგენტების ერთდროული შეერთების რეპროდუქცია ერთ პროცესში.
+# ყველა აგენტი ერთ მომენტში უერთდება, join_retry-ს პატივს სცემს და ზომავს:
+# რა დროში ჩნდება მთელი ფლოტი რეესტრში და რამდენ მოვლენას იღებს დაფა.
+# --legacy-fraction აგენტების ნაწილს ძველ კლიენტად აქცევს (join_retry-ს არ იცნობს და შეერთებას არ იმეორებს,
+# განახლებას კი შეერთებისთანავე აგზავნის - ის შეერთების გადადებისასაც რეესტრში უნდა მოხვდეს).
+# შედეგი მოწმდება (check): ყველა აგენტი უნდა შეუერთდეს თავის ოთახს და გამოჩნდეს დაფაზე timeout-ში,
+# დაფის მოვლენები კი agents / MIN_HOSTS_PER_EVENT-ს არ უნდა აღემატებოდეს; წარუმატებლობისას exit code 1.
+# იგივე შემოწმება ეშვება pytest-ით: python -m pytest benchmarks/test_join_storm.py
+#
+#   python benchmarks/join_storm.py --agents 5000
+#   python benchmarks/join_storm.py --agents 5000 --legacy-fraction 0.2
+#   JOIN_RATE=2000 python benchmarks/join_storm.py --agents 5000 --codec msgpack+zlib
+import argparse
+import heapq
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'server'))
+
+DATA_DIR = tempfile.mkdtemp(prefix='join-storm-')
+os.environ['DATA_DIR'] = DATA_DIR
+logging.disable(logging.INFO)
+
+import app as server
+from wire import encode_message
+
+# შეერთებები დაფაზე პარტიებად უნდა მივიდეს: საშუალოდ მინიმუმ ამდენი ჰოსტი ერთ მოვლენაში
+MIN_HOSTS_PER_EVENT = 10
+
+
+def run(agents, codec, timeout, legacy_fraction=0.0):
+    server.clean_computer_data()
+    server.socketio.start_background_task(server.update_pipeline.run)
+    server.socketio.start_background_task(server.deferred_join_loop)
+
+    dashboard_http = server.app.test_client()
+    with dashboard_http.session_transaction() as session:
+        session['user_id'] = 'bench'
+    dashboard = server.socketio.test_client(server.app, flask_test_client=dashboard_http)
+    dashboard.get_received()
+
+    legacy = set(random.sample(range(agents), int(agents * legacy_fraction)))
+    clients = [server.socketio.test_client(server.app, auth=None if i in legacy else {'join_retry': True})
+               for i in range(agents)]
+    joins = {f'STORM-{i:05d}': encode_message({'hostname': f'STORM-{i:05d}', 'codecs': [codec] if codec else []})
+             for i in range(agents)}
+    hostnames = list(joins)
+    legacy_hostnames = {hostnames[i] for i in legacy}
+
+    started = time.perf_counter()
+    due = [(0.0, i) for i in range(agents)]
+    join_attempts = retries = 0
+    while due or len(server.registry) < agents or len(server.agent_hosts) < agents:
+        now = time.perf_counter() - started
+        if now > timeout:
+            break
+        while due and due[0][0] <= now:
+            _, i = heapq.heappop(due)
+            join_attempts += 1
+            clients[i].emit('join', joins[hostnames[i]])
+            if i in legacy:
+                clients[i].emit('update_computer_data', encode_message({
+                    'hostname': hostnames[i],
+                    'dynamic': {'cpu_usage': 1.0, 'last_update': datetime.now().isoformat()},
+                }))
+            for message in clients[i].get_received():
+                # ძველი კლიენტი join_retry-ს ვერ ამუშავებს
+                if message['name'] == 'join_retry' and i not in legacy:
+                    retries += 1
+                    retry_after = message['args'][0]['retry_after'] + random.uniform(0, 1)
+                    heapq.heappush(due, (now + retry_after, i))
+        time.sleep(0.001 if due and due[0][0] <= now + 0.001 else 0.01)
+    all_joined = time.perf_counter() - started
+
+    time.sleep(server.Config.UPDATE_BATCH_WINDOW * 4)
+    events = dashboard.get_received()
+    deltas = [delta for event in events if event['name'] in ('computer_delta', 'computer_delta_batch')
+              for delta in (event['args'][0] if event['name'] == 'computer_delta_batch' else [event['args'][0]])]
+
+    return {
+        'agents': agents,
+        'legacy_agents': len(legacy),
+        'codec': codec,
+        'join_rate': server.Config.JOIN_RATE,
+        'join_burst': server.Config.JOIN_BURST,
+        'hosts_in_registry': len(server.registry),
+        'hosts_in_rooms': len(server.agent_hosts),
+        'hosts_on_dashboard': len({delta['hostname'] for delta in deltas} & set(hostnames)),
+        'legacy_updates_applied': sum(1 for hostname in legacy_hostnames
+                                      if 'cpu_usage' in (server.registry.get(hostname) or {}).get('dynamic', {})),
+        'all_joined_seconds': round(all_joined, 3),
+        'join_attempts': join_attempts,
+        'join_retries': retries,
+        'dashboard_events': len(events),
+        'dashboard_host_deltas': len(deltas),
+        'pipeline': server.update_pipeline.stats(),
+        'admission': server.join_admission.stats(),
+    }
+
+
+def check(result, timeout):
+    # შემოწმებული პირობების დარღვევები; ცარიელი სია - შტორმი წარმატებით დამუშავდა
+    agents = result['agents']
+    failures = []
+    if result['all_joined_seconds'] > timeout:
+        failures.append(f"not all agents joined within {timeout}s")
+    for key in ('hosts_in_registry', 'hosts_in_rooms', 'hosts_on_dashboard'):
+        if result[key] != agents:
+            failures.append(f"{key}: {result[key]} of {agents}")
+    if result['legacy_updates_applied'] != result['legacy_agents']:
+        failures.append(f"legacy_updates_applied: {result['legacy_updates_applied']} of {result['legacy_agents']}")
+    max_events = max(1, agents // MIN_HOSTS_PER_EVENT)
+    if result['dashboard_events'] > max_events:
+        failures.append(f"dashboard_events: {result['dashboard_events']} > {max_events}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconnect storm reproduction')
+    parser.add_argument('--agents', type=int, default=5000)
+    parser.add_argument('--codec', default=None, help='compact wire codec the agents offer')
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--legacy-fraction', type=float, default=0.0,
+                        help='share of agents that ignore join_retry (clients older than admission control)')
+    args = parser.parse_args()
+    try:
+        result = run(args.agents, args.codec, args.timeout, args.legacy_fraction)
+        result['failures'] = check(result, args.timeout)
+        print(json.dumps(result, indent=2))
+    finally:
+        server.history.close()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    if result['failures']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
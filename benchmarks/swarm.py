@@ -0,0 +1,439 @@
+# სიმულირებული აგენტების ჯგუფი სერვერის დატვირთვის გასაზომად.
+# აგენტები ლაპარაკობენ client.py-ის პროტოკოლით (join, update_computer_data, host_command-ზე პასუხი),
+# დაფა იღებს computer_delta მოვლენებს და ზომავს დაყოვნებას აგენტის გაგზავნიდან დაფამდე.
+#
+#   python benchmarks/swarm.py --start-server --agents 1000 --rate 0.2 --duration 60 --output results.json
+#   python benchmarks/swarm.py --url http://127.0.0.1:5000 --server-pid 1234 --username admin --password ... --storm
+import argparse
+import asyncio
+import json
+import os
+import pty
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+import bcrypt
+import psutil
+import socketio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT_DIR, 'server')
+sys.path.insert(0, SERVER_DIR)
+
+from wire import CODECS, encode_message, decode_message
+
+BENCH_USER = 'swarm'
+BENCH_PASSWORD = 'swarm-benchmark'
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class Stats:
+    def __init__(self):
+        self.sent = {}
+        self.updates_sent = 0
+        self.updates_acked = 0
+        self.updates_rejected = 0
+        self.joins = 0
+        self.join_retries = 0
+        self.commands = 0
+        self.connect_errors = 0
+        self.latencies = []
+        self.deltas = 0
+        self.joined_seen = set()
+
+
+class SimAgent:
+    def __init__(self, index, url, stats, codec, transports):
+        self.hostname = f'SIM-{index:05d}'
+        self.url = url
+        self.stats = stats
+        self.codec = codec
+        self.transports = transports
+        self.sample_id = 0
+        self.static = {
+            'hostname': self.hostname,
+            'ip_address': f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}',
+            'os': random.choice(['Windows', 'Linux']),
+            'os_version': '10.0.22631',
+            'cpu_info': 'Intel64 Family 6 Model 151 Stepping 5, GenuineIntel',
+            'cpu_count': 8,
+            'cpu_freq': 3300.0,
+            'memory_total': 8318795776,
+            'disk_space_total': 269458862080,
+            'anydesk_id': str(1000000000 + index),
+        }
+        self.static_hash = f'{index:016x}'
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on('connect', self.on_connect)
+        self.sio.on('host_command', self.on_host_command)
+        self.sio.on('request_static', self.on_request_static)
+        self.sio.on('wire_format', self.on_wire_format)
+        self.sio.on('update_result', self.on_update_result)
+        self.sio.on('status', self.on_status)
+        self.sio.on('join_retry', self.on_join_retry)
+        self.wire_codec = None
+        self.static_sent = False
+
+    def encode(self, data):
+        return encode_message(data, self.wire_codec)
+
+    async def connect(self):
+        try:
+            await self.sio.connect(self.url, transports=self.transports, auth={'join_retry': True})
+            return True
+        except Exception:
+            self.stats.connect_errors += 1
+            return False
+
+    async def disconnect(self):
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+    async def on_connect(self):
+        await self.send_join()
+
+    async def send_join(self):
+        join = {'hostname': self.hostname}
+        if self.codec:
+            join['codecs'] = [self.codec]
+        self.stats.joins += 1
+        await self.sio.emit('join', self.encode(join))
+
+    async def on_status(self, data):
+        await self.send_update()
+
+    async def on_join_retry(self, data):
+        self.stats.join_retries += 1
+        asyncio.create_task(self.rejoin_after(data.get('retry_after', 1) + random.uniform(0, 1)))
+
+    async def rejoin_after(self, delay):
+        await asyncio.sleep(delay)
+        if self.sio.connected:
+            await self.send_join()
+
+    async def on_wire_format(self, data):
+        self.wire_codec = data.get('codec')
+
+    async def on_request_static(self, payload):
+        self.static_sent = False
+        await self.send_update()
+
+    async def on_update_result(self, result):
+        if result.get('success'):
+            self.stats.updates_acked += 1
+        else:
+            self.stats.updates_rejected += 1
+
+    async def on_host_command(self, payload):
+        data = decode_message(payload)
+        if not data or data.get('hostname') != self.hostname:
+            return
+        self.stats.commands += 1
+        if data.get('command') == 'check':
+            await self.send_update()
+
+    async def send_update(self):
+        if not self.sio.connected:
+            return
+        self.sample_id += 1
+        message = {
+            'hostname': self.hostname,
+            'static_hash': self.static_hash,
+            'dynamic': {
+                'hostname': self.hostname,
+                'cpu_usage': round(random.uniform(0, 100), 1),
+                'memory_usage': round(random.uniform(20, 95), 1),
+                'disk_usage': round(random.uniform(10, 90), 1),
+                'network_usage': random.randint(10 ** 6, 10 ** 9),
+                'sample_id': self.sample_id,
+            },
+        }
+        if not self.static_sent:
+            message['static'] = self.static
+            self.static_sent = True
+        self.stats.sent[(self.hostname, self.sample_id)] = time.perf_counter()
+        self.stats.updates_sent += 1
+        try:
+            await self.sio.emit('update_computer_data', self.encode(message))
+        except Exception:
+            pass
+
+    async def run_updates(self, rate, stop_at):
+        if rate <= 0:
+            return
+        await asyncio.sleep(random.uniform(0, 1 / rate))
+        while time.monotonic() < stop_at:
+            await self.send_update()
+            await asyncio.sleep(min(random.expovariate(rate), max(0, stop_at - time.monotonic())))
+
+
+class Dashboard:
+    def __init__(self, url, stats, username, password, transports):
+        self.url = url
+        self.stats = stats
+        self.username = username
+        self.password = password
+        self.transports = transports
+        self.sio = socketio.AsyncClient()
+        self.sio.on('computer_delta', self.on_delta)
+        self.sio.on('computer_deltas', self.on_deltas)
+        self.sio.on('computer_delta_batch', self.on_deltas)
+
+    async def connect(self):
+        # ნაგულისხმევი cookie jar IP მისამართზე cookie-ს არ ინახავს
+        async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+            async with session.post(f'{self.url}/login', json={'username': self.username, 'password': self.password}) as response:
+                if response.status != 200:
+                    raise RuntimeError(f'login failed: HTTP {response.status}')
+                cookie = '; '.join(f'{c.key}={c.value}' for c in session.cookie_jar)
+        await self.sio.connect(self.url, headers={'Cookie': cookie}, transports=self.transports)
+
+    async def on_delta(self, delta):
+        received = time.perf_counter()
+        self.stats.deltas += 1
+        hostname = delta.get('hostname')
+        sample_id = (delta.get('patch') or {}).get('dynamic', {}).get('sample_id')
+        self.stats.joined_seen.add(hostname)
+        if sample_id is not None:
+            sent = self.stats.sent.pop((hostname, sample_id), None)
+            if sent is not None:
+                self.stats.latencies.append(received - sent)
+
+    async def on_deltas(self, deltas):
+        for delta in deltas:
+            await self.on_delta(delta)
+
+
+class ServerMonitor:
+    # სერვერის პროცესის (და შვილი პროცესების) CPU, RSS და დისკზე ჩაწერილი ბაიტები
+    def __init__(self, pid, data_dir=None):
+        self.process = psutil.Process(pid) if pid else None
+        self.data_dir = data_dir
+        self.cpu_samples = []
+        self.rss_samples = []
+        self.write_bytes_start = self.write_bytes()
+
+    def processes(self):
+        if self.process is None:
+            return []
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def write_bytes(self):
+        total = 0
+        for process in self.processes():
+            try:
+                total += process.io_counters().write_bytes
+            except (psutil.Error, AttributeError):
+                pass
+        return total
+
+    async def run(self, stop):
+        for process in self.processes():
+            process.cpu_percent(None)
+        while not stop.is_set():
+            await asyncio.sleep(1)
+            cpu = rss = 0
+            for process in self.processes():
+                try:
+                    cpu += process.cpu_percent(None)
+                    rss += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.cpu_samples.append(cpu)
+            self.rss_samples.append(rss)
+
+    def report(self):
+        files = {}
+        if self.data_dir:
+            for name in ('computers.json', 'computers.journal', 'history.bin'):
+                path = os.path.join(self.data_dir, name)
+                if os.path.exists(path):
+                    files[name] = os.path.getsize(path)
+        return {
+            'cpu_percent_avg': round(sum(self.cpu_samples) / len(self.cpu_samples), 1) if self.cpu_samples else None,
+            'cpu_percent_max': max(self.cpu_samples, default=None),
+            'rss_bytes_max': max(self.rss_samples, default=None),
+            'disk_write_bytes': self.write_bytes() - self.write_bytes_start if self.process else None,
+            'data_file_sizes': files,
+        }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, extra_env):
+    data_dir = tempfile.mkdtemp(prefix='swarm-')
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+    with open(os.path.join(data_dir, 'users.json'), 'w') as f:
+        json.dump({BENCH_USER: {'password_hash': password_hash}}, f)
+    env = dict(os.environ, DATA_DIR=data_dir, PORT=str(port), HOST='127.0.0.1', **extra_env)
+    # ახალი Flask-SocketIO Werkzeug-ს tty-ის გარეშე არ უშვებს, ამიტომ stdin-ად pty ეძლევა
+    _, tty = pty.openpty()
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=SERVER_DIR, env=env, stdin=tty,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process, data_dir
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('server did not start')
+
+
+async def connect_all(agents, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(agent):
+        async with semaphore:
+            return await agent.connect()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(connect(agent) for agent in agents))
+    return sum(results), time.perf_counter() - started
+
+
+async def wait_for_joins(stats, hostnames, timeout):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if hostnames <= stats.joined_seen:
+            break
+        await asyncio.sleep(0.05)
+    return time.perf_counter() - started, len(hostnames & stats.joined_seen)
+
+
+async def run(args):
+    server = None
+    data_dir = args.data_dir
+    url = args.url
+    username, password = args.username, args.password
+    if args.start_server:
+        port = free_port()
+        server, data_dir = start_server(port, dict(item.split('=', 1) for item in args.server_env))
+        url = f'http://127.0.0.1:{port}'
+        username, password = BENCH_USER, BENCH_PASSWORD
+
+    transports = [args.transport]
+    stats = Stats()
+    monitor = ServerMonitor(server.pid if server else args.server_pid, data_dir)
+    stop_monitor = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor.run(stop_monitor))
+    results = {'params': vars(args), 'revision': git_revision(), 'started_at': time.time()}
+
+    try:
+        dashboards = [Dashboard(url, stats, username, password, transports) for _ in range(args.dashboards)]
+        for dashboard in dashboards:
+            await dashboard.connect()
+
+        agents = [SimAgent(i, url, stats, args.codec, transports) for i in range(args.agents)]
+        hostnames = {agent.hostname for agent in agents}
+        connected, connect_seconds = await connect_all(agents, args.connect_concurrency)
+        join_seconds, joined = await wait_for_joins(stats, hostnames, args.join_timeout)
+        results['connect'] = {'connected': connected, 'seconds': round(connect_seconds, 3),
+                              'all_joined_seconds': round(join_seconds, 3), 'joined_seen': joined,
+                              'join_retries': stats.join_retries}
+
+        stats.latencies.clear()
+        sent_before, acked_before, deltas_before = stats.updates_sent, stats.updates_acked, stats.deltas
+        started = time.perf_counter()
+        stop_at = time.monotonic() + args.duration
+        await asyncio.gather(*(agent.run_updates(args.rate, stop_at) for agent in agents))
+        await asyncio.sleep(args.drain)
+        elapsed = time.perf_counter() - started
+        results['steady_state'] = {
+            'seconds': round(elapsed, 3),
+            'updates_sent': stats.updates_sent - sent_before,
+            'updates_acked': stats.updates_acked - acked_before,
+            'updates_rejected': stats.updates_rejected,
+            'updates_per_second': round((stats.updates_acked - acked_before) / args.duration, 1),
+            'deltas_received': stats.deltas - deltas_before,
+            'latency_samples': len(stats.latencies),
+            'latency_p50_ms': round(percentile(stats.latencies, 0.5) * 1000, 2) if stats.latencies else None,
+            'latency_p99_ms': round(percentile(stats.latencies, 0.99) * 1000, 2) if stats.latencies else None,
+        }
+
+        if args.storm:
+            # ყველა აგენტი ერთდროულად წყდება და ერთად უკავშირდება თავიდან
+            await asyncio.gather(*(agent.disconnect() for agent in agents))
+            await asyncio.sleep(1)
+            stats.joined_seen.clear()
+            connected, connect_seconds = await connect_all(agents, args.storm_concurrency)
+            join_seconds, joined = await wait_for_joins(stats, hostnames, args.join_timeout)
+            results['reconnect_storm'] = {'connected': connected, 'connect_seconds': round(connect_seconds, 3),
+                                          'all_joined_seconds': round(join_seconds, 3), 'joined_seen': joined,
+                                          'connect_errors': stats.connect_errors,
+                                          'join_retries': stats.join_retries}
+
+        await asyncio.gather(*(agent.disconnect() for agent in agents))
+        for dashboard in dashboards:
+            await dashboard.sio.disconnect()
+    finally:
+        stop_monitor.set()
+        await monitor_task
+        results['server'] = monitor.report()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated agent swarm load test')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--start-server', action='store_true', help='launch server/app.py with a temporary data dir')
+    parser.add_argument('--server-env', nargs='*', default=[], metavar='KEY=VALUE',
+                        help='extra environment for the launched server, e.g. JOURNAL_FSYNC=always')
+    parser.add_argument('--server-pid', type=int, help='pid to sample CPU/RSS/IO from when not using --start-server')
+    parser.add_argument('--data-dir', help='server data dir to report file sizes from when not using --start-server')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--agents', type=int, default=500)
+    parser.add_argument('--dashboards', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=0.2, help='updates per second per agent')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--drain', type=float, default=2, help='seconds to wait for in-flight deltas')
+    parser.add_argument('--codec', choices=CODECS, help='compact wire codec to offer (default: legacy text)')
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default='websocket')
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    parser.add_argument('--storm', action='store_true', help='disconnect and reconnect every agent at once')
+    parser.add_argument('--storm-concurrency', type=int, default=1000)
+    parser.add_argument('--join-timeout', type=float, default=120)
+    parser.add_argument('--output', default='swarm_results.json')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({key: value for key, value in results.items() if key != 'params'}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
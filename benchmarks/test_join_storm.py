@@ -0,0 +1,21 @@
+# join_storm.py-ის შემოწმება pytest-ით: 5000 აგენტის შტორმი, მათ შორის ძველი კლიენტები, რომლებიც
+# join_retry-ს არ იცნობენ. ყველა უნდა შეუერთდეს თავის ოთახს და გამოჩნდეს დაფაზე timeout-ში, ძველი
+# კლიენტების შეერთებისთანავე გაგზავნილი განახლება კი რეესტრში უნდა მოხვდეს.
+#
+#   python -m pytest benchmarks/test_join_storm.py
+import shutil
+
+import join_storm
+
+AGENTS = 5000
+LEGACY_FRACTION = 0.2
+TIMEOUT = 120
+
+
+def test_join_storm_admits_every_agent():
+    try:
+        result = join_storm.run(AGENTS, None, TIMEOUT, LEGACY_FRACTION)
+    finally:
+        join_storm.server.history.close()
+        shutil.rmtree(join_storm.DATA_DIR, ignore_errors=True)
+    assert join_storm.check(result, TIMEOUT) == [], result
@@ -0,0 +1,74 @@
+# ადარებს ძველ JSON/Fernet ტექსტს და კომპაქტურ ბინარულ კადრებს:
+# ბაიტები ერთ შეტყობინებაზე და კოდირების/დეკოდირების დრო
+#
+#   python benchmarks/wire_benchmark.py [--iterations 2000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server'))
+
+from wire import CODECS, encode_message, decode_message
+
+STATIC = {
+    'hostname': 'A2F0002',
+    'ip_address': '172.16.2.251',
+    'os': 'Windows',
+    'os_version': '10.0.22631',
+    'cpu_info': 'Intel64 Family 6 Model 151 Stepping 5, GenuineIntel',
+    'cpu_count': 8,
+    'cpu_freq': 3300.0,
+    'memory_total': 8318795776,
+    'disk_space_total': 269458862080,
+    'anydesk_id': '1914644524'
+}
+
+DYNAMIC = {
+    'hostname': 'A2F0002',
+    'cpu_usage': 12.5,
+    'memory_usage': 82.9,
+    'disk_usage': 28.2,
+    'network_usage': 370471299,
+    'last_update': '2024-11-09T14:37:55.888725'
+}
+
+MESSAGES = {
+    'join': {'hostname': 'A2F0002', 'codecs': list(CODECS)},
+    'update (static_hash)': {'hostname': 'A2F0002', 'static_hash': '3f2a9c1d8e7b6a50', 'dynamic': DYNAMIC},
+    'update (full static)': {'hostname': 'A2F0002', 'static_hash': '3f2a9c1d8e7b6a50', 'static': STATIC, 'dynamic': DYNAMIC},
+    'host_command': {'hostname': 'A2F0002', 'command': 'check'},
+}
+
+
+def measure(message, codec, iterations):
+    encoded = encode_message(message, codec)
+    size = len(encoded.encode() if isinstance(encoded, str) else encoded)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode_message(message, codec)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode_message(encoded)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+    return size, encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'message':<22} {'codec':<14} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for name, message in MESSAGES.items():
+        for codec in (None,) + CODECS:
+            size, encode_us, decode_us = measure(message, codec, args.iterations)
+            print(f"{name:<22} {codec or 'legacy':<14} {size:>7} {encode_us:>10.1f} {decode_us:>10.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
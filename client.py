@@ -1,29 +1,74 @@
 import asyncio
+import base64
+import hashlib
 import json
 import logging
 import os
 import platform
+import random
 import socket
+import struct
 import subprocess
 import sys
 import time
+import zlib
 from datetime import datetime
 
 import psutil
 import socketio
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+
+try:
+    import msgpack
+except ImportError:  # msgpack-ის გარეშე კომპაქტური ფორმატი JSON-ს იყენებს
+    msgpack = None
 
 # კონფიგურაცია
 SOCKET_SERVER_URL = 'http://172.16.2.251:5000'
 ENCRYPTION_KEY = b'C5Nk6UxL2R1_F0fSj1U5E5y9I7G6dK1O9O5wX5oW9dY='
+# გასაღებების როტაციისთვის: ENCRYPTION_KEYS=ახალი,ძველი (პირველით იშიფრება, ყველა გამოიყენება გასაშიფრად)
+ENCRYPTION_KEYS = [key.strip().encode() for key in os.environ.get('ENCRYPTION_KEYS', '').split(',') if key.strip()]
+
+# ტელემეტრიის განრიგი (წამებში)
+SAMPLE_INTERVAL = 5           # რამდენად ხშირად ვზომავთ მეტრიკებს (იაფია, არ იგზავნება)
+REPORT_INTERVAL = 30          # ჩვეულებრივი გაგზავნის ინტერვალი
+MIN_REPORT_INTERVAL = 5       # მკვეთრი ცვლილებისას
+# სერვერის ONLINE_WINDOW (server/config.py): ამაზე დიდი შუალედით გაგზავნისას ჰოსტი დაფაზე idle-ად გადადის
+SERVER_ONLINE_WINDOW = 300
+# უმოქმედო ჰოსტის heartbeat-ის მაქსიმალური ინტერვალი - ONLINE_WINDOW-ზე შესამჩნევად ნაკლები, რომ SAMPLE_INTERVAL-ის
+# დამრგვალებამ და ქსელის დაყოვნებამ ჰოსტი online -> idle -> online ციკლში არ ჩააგდოს. ONLINE_WINDOW-ის შეცვლისას
+# SERVER_ONLINE_WINDOW-იც უნდა შეიცვალოს
+IDLE_HEARTBEAT_INTERVAL = int(SERVER_ONLINE_WINDOW * 0.8)
+CHANGE_THRESHOLD = 10         # პროცენტული პუნქტი, რომლის ზემოთაც ცვლილება მკვეთრად ითვლება
+IDLE_CPU_THRESHOLD = 5        # CPU %, რომლის ქვემოთაც ჰოსტი უმოქმედოდ ითვლება
+CHANGE_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+STATIC_REFRESH_INTERVAL = 3600  # სტატიკური ინფორმაციის (OS, CPU, AnyDesk ID) ხელახალი შეგროვება
+RECONNECT_BASE_DELAY = 2      # ხელახალი დაკავშირების საწყისი დაყოვნება (ორმაგდება ყოველ წარუმატებელ ცდაზე)
+RECONNECT_MAX_DELAY = 300     # დაყოვნების ზედა ზღვარი
+SPOOL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'telemetry.spool')
+SPOOL_MAX_RECORDS = 17280     # offline ნიმუშების ზღვარი (24 საათი SAMPLE_INTERVAL=5-ით, ~480 KB)
+BACKFILL_CHUNK_RECORDS = 2000 # რამდენი ჩანაწერი იგზავნება ერთ bulk_backfill შეტყობინებაში
+
+# ბინარული კადრი: 1 ბაიტი flags + Fernet ტოკენი base64-ის გარეშე
+FLAG_MSGPACK = 0x01
+FLAG_ZLIB = 0x02
+COMPRESS_MIN_BYTES = 256
+# spool-ის ფორმატი იგივეა, რასაც სერვერის wire.decode_spool_records კითხულობს
+SPOOL_FORMAT = 'spool-v1'
+SPOOL_MAGIC = b'SPL1'
+SPOOL_HEADER = struct.Struct('<4sIII')  # magic, capacity, start, count
+SPOOL_RECORD = struct.Struct('<dfffd')  # timestamp, cpu, memory, disk, network
+SUPPORTED_CODECS = ('msgpack+zlib', 'msgpack', 'json+zlib', 'json') if msgpack else ('json+zlib', 'json')
 
 # ლოგირების კონფიგურაცია
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # SocketIO კლიენტის ინიციალიზაცია
-sio = socketio.AsyncClient(logger=True, engineio_logger=True)
-fernet = Fernet(ENCRYPTION_KEY)
+# ხელახალ დაკავშირებას main() მართავს jitter-იანი backoff-ით, ჩაშენებული reconnection გამორთულია
+sio = socketio.AsyncClient(reconnection=False, logger=True, engineio_logger=True)
+fernet = MultiFernet([Fernet(key) for key in ENCRYPTION_KEYS or [ENCRYPTION_KEY]])
+wire_codec = None  # სერვერთან შეთანხმებული ფორმატი; None - JSON/Fernet ტექსტი
 
 # დაშიფვრა და გაშიფვრა
 def encrypt_data(data):
@@ -44,6 +89,39 @@ def decrypt_data(encrypted_data):
         logger.error(f"მონაცემების გაშიფვრის შეცდომა: {e}")
         return None
 
+def encode_message(data):
+    if wire_codec is None:
+        return encrypt_data(data)
+    try:
+        if wire_codec.startswith('msgpack'):
+            body = msgpack.packb(data, use_bin_type=True)
+            flags = FLAG_MSGPACK
+        else:
+            body = json.dumps(data, separators=(',', ':')).encode()
+            flags = 0
+        if wire_codec.endswith('+zlib') and len(body) >= COMPRESS_MIN_BYTES:
+            body = zlib.compress(body)
+            flags |= FLAG_ZLIB
+        return bytes([flags]) + base64.urlsafe_b64decode(fernet.encrypt(body))
+    except Exception as e:
+        logger.error(f"მონაცემების კოდირების შეცდომა: {e}")
+        return None
+
+def decode_message(payload):
+    if not isinstance(payload, (bytes, bytearray)):
+        return decrypt_data(payload)
+    try:
+        flags = payload[0]
+        body = fernet.decrypt(base64.urlsafe_b64encode(bytes(payload[1:])))
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        if flags & FLAG_MSGPACK:
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+    except Exception as e:
+        logger.error(f"ბინარული კადრის გაშიფვრის შეცდომა: {e}")
+        return None
+
 # სისტემური ინფორმაციის მიღება
 async def get_anydesk_id():
     try:
@@ -63,56 +141,273 @@ async def get_anydesk_id():
         logger.error(f"AnyDesk ID მიღების შეცდომა: {e}")
     return None
 
-async def get_system_info():
+def rated_cpu_freq():
+    # current იცვლება დატვირთვასთან ერთად და სტატიკურ hash-ს ყოველ შეგროვებაზე შეცვლიდა; ამიტომ
+    # ინახება ნომინალური max, ხოლო თუ ის უცნობია (ზოგი VM 0-ს აბრუნებს) - current 100 MHz-მდე დამრგვალებული
+    freq = psutil.cpu_freq()
+    if freq is None:
+        return None
+    return freq.max or round(freq.current, -2)
+
+def collect_static_info(anydesk_id):
+    return {
+        'hostname': socket.gethostname(),
+        'ip_address': socket.gethostbyname(socket.gethostname()),
+        'os': platform.system(),
+        'os_version': platform.version(),
+        'cpu_info': platform.processor(),
+        'cpu_count': psutil.cpu_count(),
+        'cpu_freq': rated_cpu_freq(),
+        'memory_total': psutil.virtual_memory().total,
+        'disk_space_total': psutil.disk_usage('/').total,
+        'anydesk_id': anydesk_id
+    }
+
+def collect_dynamic_info():
+    net_io = psutil.net_io_counters()
+    return {
+        'hostname': socket.gethostname(),
+        # interval=None არ ბლოკავს: აბრუნებს დატვირთვას წინა გამოძახების შემდეგ
+        'cpu_usage': psutil.cpu_percent(interval=None),
+        'memory_usage': psutil.virtual_memory().percent,
+        'disk_usage': psutil.disk_usage('/').percent,
+        'network_usage': net_io.bytes_sent + net_io.bytes_recv,
+        'last_update': datetime.now().isoformat()
+    }
+
+async def sample_dynamic_info():
+    # psutil-ის გამოძახებები executor-ში, რომ event loop არ დაიბლოკოს
+    return await asyncio.get_running_loop().run_in_executor(None, collect_dynamic_info)
+
+def static_fingerprint(static_info):
+    return hashlib.sha256(json.dumps(static_info, sort_keys=True).encode()).hexdigest()[:16]
+
+class StaticFactsCache:
+    # სტატიკური ინფორმაცია იშვიათად იცვლება: ვინახავთ, ვაახლებთ STATIC_REFRESH_INTERVAL-ში ერთხელ
+    # და სერვერს ვუგზავნით მხოლოდ hash-ს, სანამ ის არ შეიცვლება
+    def __init__(self):
+        self.info = None
+        self.hash = None
+        self.collected_at = 0
+        self.sent_hash = None
+
+    async def get(self, refresh=False):
+        if refresh or self.info is None or time.monotonic() - self.collected_at >= STATIC_REFRESH_INTERVAL:
+            anydesk_id = await get_anydesk_id()
+            self.info = await asyncio.get_running_loop().run_in_executor(None, collect_static_info, anydesk_id)
+            self.hash = static_fingerprint(self.info)
+            self.collected_at = time.monotonic()
+        return self.info, self.hash
+
+static_facts = StaticFactsCache()
+
+async def get_system_info(dynamic_info=None, refresh_static=False):
     try:
-        anydesk_id = await get_anydesk_id()
-        static_info = {
-            'hostname': socket.gethostname(),
-            'ip_address': socket.gethostbyname(socket.gethostname()),
-            'os': platform.system(),
-            'os_version': platform.version(),
-            'cpu_info': platform.processor(),
-            'cpu_count': psutil.cpu_count(),
-            'cpu_freq': psutil.cpu_freq().current,
-            'memory_total': psutil.virtual_memory().total,
-            'disk_space_total': psutil.disk_usage('/').total,
-            'anydesk_id': anydesk_id
-        }
-        dynamic_info = {
-            'hostname': socket.gethostname(),
-            'cpu_usage': psutil.cpu_percent(interval=1),
-            'memory_usage': psutil.virtual_memory().percent,
-            'disk_usage': psutil.disk_usage('/').percent,
-            'network_usage': psutil.net_io_counters().bytes_sent + psutil.net_io_counters().bytes_recv,
-            'last_update': datetime.now().isoformat()
-        }
-        return {'static': static_info, 'dynamic': dynamic_info}
+        static_info, static_hash = await static_facts.get(refresh_static)
+        if dynamic_info is None:
+            dynamic_info = await sample_dynamic_info()
+        return {'static': static_info, 'static_hash': static_hash, 'dynamic': dynamic_info}
     except Exception as e:
         logger.error(f"სისტემური ინფორმაციის მიღების შეცდომა: {e}")
         return None
 
-# Socket მოვლენები
-@sio.event
-async def connect():
-    logger.info("სერვერთან დაკავშირება წარმატებით განხორციელდა.")
-    hostname = socket.gethostname()
-    encrypted_data = encrypt_data({'hostname': hostname})
+class ReportPolicy:
+    # წყვეტს, როდის გაიგზავნოს ნიმუში: მკვეთრი ცვლილებისას - მალე,
+    # უმოქმედო ჰოსტზე ინტერვალი ორმაგდება IDLE_HEARTBEAT_INTERVAL-მდე
+    def __init__(self):
+        self.interval = REPORT_INTERVAL
+        self.last_sent = None
+        self.last_sent_at = 0
+
+    def change_from_last(self, sample):
+        if self.last_sent is None:
+            return float('inf')
+        return max(abs((sample.get(m) or 0) - (self.last_sent.get(m) or 0)) for m in CHANGE_METRICS)
+
+    def should_send(self, sample, now):
+        if self.change_from_last(sample) >= CHANGE_THRESHOLD:
+            return True
+        return now - self.last_sent_at >= self.interval
+
+    def mark_sent(self, sample, now):
+        change = self.change_from_last(sample)
+        if self.last_sent is None:
+            self.interval = REPORT_INTERVAL
+        elif change >= CHANGE_THRESHOLD:
+            self.interval = MIN_REPORT_INTERVAL
+        elif (sample.get('cpu_usage') or 0) < IDLE_CPU_THRESHOLD and change < CHANGE_THRESHOLD / 2:
+            self.interval = min(max(self.interval, REPORT_INTERVAL) * 2, IDLE_HEARTBEAT_INTERVAL)
+        else:
+            self.interval = REPORT_INTERVAL
+        self.last_sent = sample
+        self.last_sent_at = now
+
+report_policy = ReportPolicy()
+
+class Backoff:
+    # ექსპონენციალური backoff სრული jitter-ით: სერვერის გადატვირთვის შემდეგ აგენტები
+    # ერთდროულად აღარ ბრუნდებიან, არამედ თანაბრად ნაწილდებიან დაყოვნების ფანჯარაში
+    def __init__(self, base=RECONNECT_BASE_DELAY, maximum=RECONNECT_MAX_DELAY):
+        self.base = base
+        self.maximum = maximum
+        self.attempts = 0
+
+    def next_delay(self):
+        delay = random.uniform(0, min(self.maximum, self.base * 2 ** self.attempts))
+        self.attempts += 1
+        return delay
+
+    def reset(self):
+        self.attempts = 0
+
+reconnect_backoff = Backoff()
+
+class SampleSpool:
+    # კავშირის გაწყვეტისას ნიმუშები იწერება დისკზე ფიქსირებული ზომის ring ფაილში;
+    # გავსებისას უძველესი ჩანაწერი გადაიწერება, ასე რომ ფაილი SPOOL_MAX_RECORDS-ზე არ იზრდება
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self.start = 0
+        self.count = 0
+        self.file = None
+
+    def open(self):
+        self.file = open(self.path, 'r+b' if os.path.exists(self.path) else 'w+b')
+        header = self.file.read(SPOOL_HEADER.size)
+        if len(header) == SPOOL_HEADER.size:
+            magic, capacity, start, count = SPOOL_HEADER.unpack(header)
+            if magic == SPOOL_MAGIC and capacity == self.capacity and start < capacity and count <= capacity:
+                self.start, self.count = start, count
+                return
+        # ახალი ან შეუთავსებელი ფაილი - თავიდან ვქმნით
+        self.start = self.count = 0
+        self.file.truncate(SPOOL_HEADER.size + self.capacity * SPOOL_RECORD.size)
+        self._write_header()
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(SPOOL_HEADER.pack(SPOOL_MAGIC, self.capacity, self.start, self.count))
+        self.file.flush()
+
+    def append(self, timestamp, sample):
+        if self.file is None:
+            return
+        index = (self.start + self.count) % self.capacity
+        self.file.seek(SPOOL_HEADER.size + index * SPOOL_RECORD.size)
+        self.file.write(SPOOL_RECORD.pack(
+            timestamp,
+            sample.get('cpu_usage') or 0,
+            sample.get('memory_usage') or 0,
+            sample.get('disk_usage') or 0,
+            sample.get('network_usage') or 0,
+        ))
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+        self._write_header()
+
+    def read(self, limit):
+        # უძველესი limit ჩანაწერი თანმიმდევრობით (ring-ის გადატანის გათვალისწინებით)
+        limit = min(limit, self.count)
+        first = min(limit, self.capacity - self.start)
+        self.file.seek(SPOOL_HEADER.size + self.start * SPOOL_RECORD.size)
+        data = self.file.read(first * SPOOL_RECORD.size)
+        if limit > first:
+            self.file.seek(SPOOL_HEADER.size)
+            data += self.file.read((limit - first) * SPOOL_RECORD.size)
+        return data
+
+    def consume(self, records):
+        records = min(records, self.count)
+        self.start = (self.start + records) % self.capacity
+        self.count -= records
+        self._write_header()
+
+spool = SampleSpool(SPOOL_FILE, SPOOL_MAX_RECORDS)
+joined = False          # სერვერმა შეერთება დაადასტურა ('status')
+backfill_running = False
+
+async def upload_backlog():
+    # offline ნიმუშები იგზავნება შეკუმშული პაკეტებით; ჩანაწერი spool-იდან იშლება მხოლოდ სერვერის ack-ის შემდეგ
+    global backfill_running
+    if backfill_running or spool.file is None:
+        return
+    backfill_running = True
+    try:
+        while spool.count and joined:
+            records = spool.read(BACKFILL_CHUNK_RECORDS)
+            count = len(records) // SPOOL_RECORD.size
+            blob = zlib.compress(records)
+            payload = {
+                'hostname': socket.gethostname(),
+                'format': SPOOL_FORMAT,
+                # msgpack-ს bytes პირდაპირ გადააქვს, JSON-ს - base64 ტექსტად
+                'records': blob if wire_codec and wire_codec.startswith('msgpack') else base64.b64encode(blob).decode(),
+            }
+            result = await sio.call('bulk_backfill', encode_message(payload), timeout=30)
+            if not result or not result.get('success'):
+                logger.warning(f"backfill-ი უარყოფილია: {result}")
+                break
+            spool.consume(count)
+            logger.info(f"სერვერზე აიტვირთა {count} შენახული ნიმუში, დარჩა {spool.count}")
+    except Exception as e:
+        logger.error(f"შეცდომა backfill-ის გაგზავნისას: {str(e)}")
+    finally:
+        backfill_running = False
+
+async def send_join():
+    encrypted_data = encode_message({'hostname': socket.gethostname(), 'codecs': SUPPORTED_CODECS})
     if encrypted_data:
         await sio.emit('join', encrypted_data)
-        await send_system_info()
     else:
         logger.error("hostname-ის დაშიფვრა ვერ მოხერხდა.")
 
-async def send_system_info():
+# Socket მოვლენები
+@sio.event
+async def connect():
+    logger.info("სერვერთან დაკავშირება წარმატებით განხორციელდა.")
+    await send_join()
+
+@sio.on('status')
+async def on_status(data):
+    # შეერთება მიღებულია - მხოლოდ ახლა იგზავნება მონაცემები
+    global joined
+    logger.info(f"სერვერის სტატუსი: {data.get('message')}")
+    joined = True
+    reconnect_backoff.reset()
+    await send_system_info()
+    if spool.count:
+        asyncio.create_task(upload_backlog())
+
+@sio.on('join_retry')
+async def on_join_retry(data):
+    # სერვერი გადატვირთულია და შეერთებას მითითებულ დროს გადადებს
+    delay = float(data.get('retry_after', RECONNECT_BASE_DELAY)) + random.uniform(0, 1)
+    logger.info(f"შეერთება გადაიდო {delay:.1f} წამით")
+    asyncio.create_task(rejoin_after(delay))
+
+async def rejoin_after(delay):
+    await asyncio.sleep(delay)
+    if sio.connected:
+        await send_join()
+
+async def send_system_info(dynamic_info=None, refresh_static=False):
     try:
-        info = await get_system_info()
+        info = await get_system_info(dynamic_info, refresh_static)
         if info:
             info['hostname'] = socket.gethostname()
+            if info['static_hash'] == static_facts.sent_hash:
+                # სერვერმა ეს სტატიკური ბლოკი უკვე იცის
+                del info['static']
             logger.info(f"მოსამზადებელი ინფორმაცია გასაგზავნად: {info}")
-            encrypted_data = encrypt_data(info)
+            encrypted_data = encode_message(info)
             if encrypted_data:
                 logger.info(f"დაშიფრული მონაცემები გასაგზავნად: {encrypted_data[:50]}...")  # ვაჩვენოთ პირველი 50 სიმბოლო
                 await sio.emit('update_computer_data', encrypted_data)
+                static_facts.sent_hash = info['static_hash']
+                report_policy.mark_sent(info['dynamic'], time.monotonic())
                 logger.info("სისტემური ინფორმაცია წარმატებით გაიგზავნა სერვერზე.")
             else:
                 logger.error("სისტემური ინფორმაციის დაშიფვრა ვერ მოხერხდა.")
@@ -123,8 +418,9 @@ async def send_system_info():
 
 @sio.on('host_command')
 async def on_host_command(encrypted_data):
+    data = None
     try:
-        data = decrypt_data(encrypted_data)
+        data = decode_message(encrypted_data)
         if not data:
             logger.error("მიღებული ბრძანების გაშიფვრა ვერ მოხერხდა.")
             return
@@ -137,30 +433,106 @@ async def on_host_command(encrypted_data):
             return
 
         logger.info(f"მიღებულია ბრძანება: {command}")
+        # ჯგუფური ბრძანებები (command_id-ით) სერვერს უდასტურებენ მიღებას და აცნობებენ შედეგს
+        command_id = data.get('command_id')
+        if command_id:
+            await sio.emit('command_ack', encode_message({'hostname': hostname, 'command_id': command_id}))
 
         if command == 'check':
-            await send_system_info()
+            await send_system_info(refresh_static=True)
+            await report_command_result(command_id, True, 'მონაცემები გაიგზავნა')
         elif command == 'restart':
             logger.info("კომპიუტერის გადატვირთვა...")
+            # შედეგი იგზავნება გადატვირთვამდე - მის შემდეგ კავშირი აღარ იქნება
+            await report_command_result(command_id, True, 'გადატვირთვა დაიწყო')
             if platform.system() == "Windows":
                 os.system("shutdown /r /t 1")
             else:
                 os.system("sudo reboot")
+        else:
+            await report_command_result(command_id, False, f'უცნობი ბრძანება: {command}')
     except Exception as e:
         logger.error(f"შეცდომა ბრძანების დამუშავებისას: {str(e)}")
+        await report_command_result(data.get('command_id') if data else None, False, str(e))
+
+async def report_command_result(command_id, success, message):
+    if not command_id:
+        return
+    try:
+        await sio.emit('command_result', encode_message({
+            'hostname': socket.gethostname(),
+            'command_id': command_id,
+            'success': success,
+            'message': message,
+        }))
+    except Exception as e:
+        logger.error(f"ბრძანების შედეგის გაგზავნა ვერ მოხერხდა: {str(e)}")
+
+@sio.on('request_static')
+async def on_request_static(encrypted_data):
+    data = decode_message(encrypted_data)
+    if not data or data.get('hostname') != socket.gethostname():
+        return
+    logger.info("სერვერმა მოითხოვა სრული სტატიკური ინფორმაცია.")
+    static_facts.sent_hash = None
+    await send_system_info()
+
+@sio.on('wire_format')
+async def on_wire_format(data):
+    global wire_codec
+    codec = data.get('codec')
+    if codec in SUPPORTED_CODECS:
+        wire_codec = codec
+        logger.info(f"სერვერთან შეთანხმებული ფორმატი: {codec}")
+
+@sio.on('error')
+async def on_error(data):
+    global wire_codec
+    logger.error(f"სერვერის შეცდომა: {data}")
+    if wire_codec is not None:
+        # შესაძლოა სერვერი ძველი ვერსიისაა და ბინარულ კადრებს ვერ კითხულობს
+        wire_codec = None
+        await sio.emit('join', encrypt_data({'hostname': socket.gethostname(), 'codecs': SUPPORTED_CODECS}))
 
 @sio.event
 async def disconnect():
+    global joined
+    joined = False
     logger.info("სერვერთან კავშირი გაწყდა.")
 
+async def telemetry_loop():
+    while True:
+        await asyncio.sleep(SAMPLE_INTERVAL)
+        try:
+            sample = await sample_dynamic_info()
+            if not sio.connected or not joined:
+                # კავშირის გარეშე ნიმუში spool-ში ინახება და აღდგენის შემდეგ აიტვირთება
+                spool.append(time.time(), sample)
+                continue
+            if report_policy.should_send(sample, time.monotonic()):
+                await send_system_info(sample)
+        except Exception as e:
+            logger.error(f"შეცდომა ტელემეტრიის ციკლში: {str(e)}")
+
 async def main():
+    # პირველი cpu_percent(None) აბრუნებს 0-ს - ვიწყებთ გაზომვის ფანჯარას
+    psutil.cpu_percent(interval=None)
+    try:
+        spool.open()
+    except OSError as e:
+        logger.error(f"offline spool-ის გახსნა ვერ მოხერხდა, ნიმუშები არ შეინახება: {e}")
+        spool.file = None
+    asyncio.create_task(telemetry_loop())
     while True:
         try:
-            await sio.connect(SOCKET_SERVER_URL)
+            # join_retry: სერვერმა იცის, რომ გადადებულ შეერთებას აგენტი თავად გაიმეორებს
+            await sio.connect(SOCKET_SERVER_URL, auth={'join_retry': True})
             await sio.wait()
         except Exception as e:
             logger.error(f"სერვერთან დაკავშირების შეცდომა: {e}")
-            await asyncio.sleep(5)
+        delay = reconnect_backoff.next_delay()
+        logger.info(f"ხელახალი დაკავშირება {delay:.1f} წამში")
+        await asyncio.sleep(delay)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
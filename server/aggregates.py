@@ -0,0 +1,215 @@
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+AGGREGATE_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'network_usage')
+PERCENT_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+GROUP_FIELDS = ('status', 'os', 'subnet')
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+MAX_BINS = 100
+UNKNOWN = 'unknown'
+
+
+def subnet_of(ip, prefix):
+    try:
+        address = ipaddress.ip_address(ip)
+    except (TypeError, ValueError):
+        return UNKNOWN
+    prefix = prefix if address.version == 4 else max(prefix, 64)
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+
+class FleetColumns:
+    # ბოლო დინამიკური მეტრიკები სვეტებად (ჰოსტი = სტრიქონი): values[row, metric] და ჯგუფების
+    # კოდები labels[row, field]. ჩანაწერი იცვლება ყოველ განახლებაზე, აგრეგატები კი ითვლება
+    # ვექტორულად და ქეშიდან ბრუნდება, სანამ version არ შეიცვლება ან შედეგი max_age წამზე ახალია -
+    # version თითქმის ყოველ ნიმუშზე იზრდება, ასე რომ დატვირთვისას გამოთვლა წამში ერთხელ ხდება
+    def __init__(self, capacity=1024, subnet_prefix=24, cache_size=64, max_age=1.0):
+        self.lock = threading.Lock()
+        self.subnet_prefix = subnet_prefix
+        self.values = np.full((capacity, len(AGGREGATE_METRICS)), np.nan)
+        self.labels = np.full((capacity, len(GROUP_FIELDS)), -1, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        # hostname -> სტრიქონი; წაშლილი ჰოსტების სტრიქონები ხელახლა გამოიყენება
+        self.rows = {}
+        self.free = []
+        self.size = 0
+        # hostname -> (values, labels) ცვლილების შესამოწმებლად
+        self.entries = {}
+        # თითო ჯგუფის ველისთვის: label -> კოდი და კოდი -> label
+        self.codes = [{} for _ in GROUP_FIELDS]
+        self.names = [[] for _ in GROUP_FIELDS]
+        self.version = 0
+        # key -> (შედეგი, გამოთვლის დრო monotonic-ით)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.max_age = max_age
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _code(self, field, label):
+        codes = self.codes[field]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(self.names[field])
+            self.names[field].append(label)
+        return code
+
+    def _row(self, hostname):
+        row = self.rows.get(hostname)
+        if row is not None:
+            return row
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == len(self.active):
+                # სვეტები ორმაგდება; ახალი სტრიქონები ცარიელია
+                self.values = np.concatenate([self.values, np.full_like(self.values, np.nan)])
+                self.labels = np.concatenate([self.labels, np.full_like(self.labels, -1)])
+                self.active = np.concatenate([self.active, np.zeros_like(self.active)])
+            row = self.size
+            self.size += 1
+        self.rows[hostname] = row
+        self.active[row] = True
+        return row
+
+    def _store(self, hostname, values, labels):
+        if self.entries.get(hostname) == (values, labels):
+            return
+        row = self._row(hostname)
+        self.values[row] = values
+        self.labels[row] = [self._code(field, label) for field, label in enumerate(labels)]
+        self.entries[hostname] = (values, labels)
+        self.version += 1
+
+    def update(self, hostname, data, status):
+        dynamic = data.get('dynamic', {})
+        static = data.get('static', {})
+        values = tuple(float(dynamic[metric]) if isinstance(dynamic.get(metric), (int, float)) else np.nan
+                       for metric in AGGREGATE_METRICS)
+        labels = (status, (static.get('os') or UNKNOWN).lower(), subnet_of(static.get('ip_address'), self.subnet_prefix))
+        with self.lock:
+            self._store(hostname, values, labels)
+
+    def set_status(self, hostname, status):
+        with self.lock:
+            entry = self.entries.get(hostname)
+            if entry is not None:
+                self._store(hostname, entry[0], (status,) + entry[1][1:])
+
+    def remove(self, hostname):
+        with self.lock:
+            row = self.rows.pop(hostname, None)
+            if row is None:
+                return
+            del self.entries[hostname]
+            self.active[row] = False
+            self.values[row] = np.nan
+            self.labels[row] = -1
+            self.free.append(row)
+            self.version += 1
+
+    @staticmethod
+    def _summary(column, percentiles, bins, value_range, above):
+        column = column[~np.isnan(column)]
+        summary = {'count': int(column.size)}
+        if not column.size:
+            return summary
+        summary.update(
+            mean=float(column.mean()),
+            min=float(column.min()),
+            max=float(column.max()),
+        )
+        if percentiles:
+            summary['percentiles'] = {f'p{q:g}': float(value)
+                                      for q, value in zip(percentiles, np.percentile(column, percentiles))}
+        if bins:
+            counts, edges = np.histogram(column, bins=bins, range=value_range)
+            summary['histogram'] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+        if above is not None:
+            summary['above'] = int(np.count_nonzero(column > above))
+        return summary
+
+    def _metrics(self, values, metrics, percentiles, bins, above):
+        result = {}
+        for metric in metrics:
+            column = values[:, AGGREGATE_METRICS.index(metric)]
+            # პროცენტული მეტრიკების ჰისტოგრამა ყოველთვის 0-100-ზეა, რომ ჯგუფები შედარებადი იყოს
+            value_range = (0, 100) if metric in PERCENT_METRICS else None
+            result[metric] = self._summary(column, percentiles, bins, value_range,
+                                           above if metric in PERCENT_METRICS else None)
+        return result
+
+    def aggregate(self, metrics=AGGREGATE_METRICS, group_by=None, percentiles=DEFAULT_PERCENTILES, bins=0, above=None):
+        metrics = tuple(metrics)
+        percentiles = tuple(percentiles)
+        if not metrics or any(metric not in AGGREGATE_METRICS for metric in metrics):
+            raise ValueError(f"მეტრიკა უნდა იყოს: {', '.join(AGGREGATE_METRICS)}")
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise ValueError(f"დაჯგუფება შესაძლებელია ველით: {', '.join(GROUP_FIELDS)}")
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("პროცენტილი უნდა იყოს 0-დან 100-მდე")
+        if not 0 <= bins <= MAX_BINS:
+            raise ValueError(f"bins უნდა იყოს 0-დან {MAX_BINS}-მდე")
+
+        key = (metrics, group_by, percentiles, bins, above)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None and (cached[0]['version'] == self.version or now - cached[1] < self.max_age):
+                self.cache_hits += 1
+                self.cache.move_to_end(key)
+                return cached[0]
+            self.cache_misses += 1
+            # სვეტების ასლი ლოკის ქვეშ; თავად გამოთვლა ლოკის გარეთ, რომ ingest არ შეფერხდეს
+            version = self.version
+            mask = self.active[:self.size]
+            values = self.values[:self.size][mask]
+            codes = self.labels[:self.size, GROUP_FIELDS.index(group_by)][mask] if group_by else None
+            names = list(self.names[GROUP_FIELDS.index(group_by)]) if group_by else None
+
+        result = {
+            'version': version,
+            'hosts': int(values.shape[0]),
+            'overall': self._metrics(values, metrics, percentiles, bins, above),
+        }
+        if group_by:
+            # სტრიქონები ლაგდება ჯგუფის კოდით და იჭრება ჯგუფებად ერთი გავლით
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            unique, starts = np.unique(sorted_codes, return_index=True)
+            groups = {}
+            for code, part in zip(unique, np.split(values[order], starts[1:])):
+                groups[names[code]] = {
+                    'hosts': int(part.shape[0]),
+                    'metrics': self._metrics(part, metrics, percentiles, bins, above),
+                }
+            result['group_by'] = group_by
+            result['groups'] = groups
+
+        with self.lock:
+            # პარალელურად გამოთვლილ უფრო ახალ შედეგს არ ვცვლით
+            previous = self.cache.get(key)
+            if previous is None or previous[0]['version'] <= version:
+                self.cache[key] = (result, now)
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hosts': len(self.rows),
+                'capacity': len(self.active),
+                'version': self.version,
+                'cache_entries': len(self.cache),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+            }
@@ -0,0 +1,228 @@
+import heapq
+import json
+import logging
+import operator
+import os
+import threading
+import time
+
+from utils import load_data
+
+logger = logging.getLogger(__name__)
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+SEVERITIES = ('info', 'warning', 'critical')
+
+# ALERT_RULES_FILE-ის არარსებობისას
+DEFAULT_RULES = [
+    {'name': 'cpu_high', 'metric': 'cpu_usage', 'op': '>', 'threshold': 90, 'duration': 300, 'severity': 'warning'},
+    {'name': 'memory_high', 'metric': 'memory_usage', 'op': '>', 'threshold': 90, 'duration': 600, 'severity': 'warning'},
+    {'name': 'disk_full', 'metric': 'disk_usage', 'op': '>', 'threshold': 95, 'duration': 0, 'severity': 'critical'},
+    {'name': 'host_offline', 'type': 'offline', 'duration': 900, 'severity': 'critical'},
+]
+
+
+class Rule:
+    # type='threshold': metric op threshold უწყვეტად duration წამის განმავლობაში
+    # type='offline': ჰოსტს duration წამია განახლება არ გამოუგზავნია
+    def __init__(self, name, type='threshold', metric=None, op='>', threshold=None, duration=0, severity='warning'):
+        if type not in ('threshold', 'offline'):
+            raise ValueError(f"წესი {name}: უცნობი ტიპი {type}")
+        if type == 'threshold' and (not metric or op not in OPERATORS or not isinstance(threshold, (int, float))):
+            raise ValueError(f"წესი {name}: საჭიროა metric, op ({', '.join(OPERATORS)}) და რიცხვითი threshold")
+        if severity not in SEVERITIES:
+            raise ValueError(f"წესი {name}: უცნობი severity {severity}")
+        self.name = name
+        self.type = type
+        self.metric = metric
+        self.op = op
+        self.compare = OPERATORS.get(op)
+        self.threshold = threshold
+        self.duration = float(duration or 0)
+        self.severity = severity
+
+    def value(self, dynamic):
+        value = dynamic.get(self.metric)
+        return value if isinstance(value, (int, float)) else None
+
+    def describe(self):
+        if self.type == 'offline':
+            return {'name': self.name, 'type': self.type, 'duration': self.duration, 'severity': self.severity}
+        return {'name': self.name, 'type': self.type, 'metric': self.metric, 'op': self.op,
+                'threshold': self.threshold, 'duration': self.duration, 'severity': self.severity}
+
+
+def load_rules(filename):
+    rules = load_data(filename, strict=True) if filename and os.path.exists(filename) else None
+    return [Rule(**rule) for rule in (rules or DEFAULT_RULES)]
+
+
+class AlertLog:
+    # ალერტების ლოკალური ჟურნალი: თითო მოვლენა ერთი JSON ხაზია
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.file = None
+
+    def write(self, events):
+        with self.lock:
+            try:
+                if self.file is None:
+                    self.file = open(self.filename, 'a', encoding='utf-8')
+                for event in events:
+                    self.file.write(json.dumps(event, ensure_ascii=False) + '\n')
+                self.file.flush()
+            except OSError as e:
+                logger.error(f"ალერტების ჟურნალში ჩაწერა ვერ მოხერხდა: {str(e)}")
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class AlertEngine:
+    # წესები ფასდება მხოლოდ შემოსული განახლებისას და მხოლოდ ამ ჰოსტისთვის; duration-იანი წესები
+    # და offline წესი ვადების heap-ით მოწმდება, ასე რომ ფლოტის ხელახალი გადახედვა არასდროს ხდება
+    def __init__(self, rules, budget=0.001):
+        self.threshold_rules = [rule for rule in rules if rule.type == 'threshold']
+        self.offline_rules = [rule for rule in rules if rule.type == 'offline']
+        self.rules = {rule.name: rule for rule in rules}
+        if len(self.rules) != len(rules):
+            raise ValueError("წესების სახელები უნიკალური უნდა იყოს")
+        self.budget = budget
+        self.lock = threading.Lock()
+        # hostname -> {rule name -> {'since', 'firing', 'value', 'fired_at'}}
+        self.states = {}
+        # ბიუჯეტის ამოწურვისას შემდეგი განახლება გამოტოვებული წესიდან იწყება
+        self.cursors = {}
+        # (deadline, hostname, rule name); თითო ჰოსტ-წესზე მაქსიმუმ ერთი ჩანაწერი (scheduled)
+        self.deadlines = []
+        self.scheduled = set()
+        self.evaluations = 0
+        self.budget_exceeded = 0
+        self.skipped_rules = 0
+
+    def _event(self, hostname, rule, state, status, now):
+        event = {
+            'hostname': hostname,
+            'rule': rule.name,
+            'severity': rule.severity,
+            'state': status,
+            'since': state['since'],
+            'at': now,
+        }
+        if rule.type == 'threshold':
+            event.update(metric=rule.metric, op=rule.op, threshold=rule.threshold, value=state.get('value'))
+        return event
+
+    def _schedule(self, hostname, rule, deadline):
+        # არსებული ვადა ამოვარდნისას ახალი since-ით გადაიგეგმება, ამიტომ მეორე ჩანაწერი არ ემატება
+        key = (hostname, rule.name)
+        if key not in self.scheduled:
+            heapq.heappush(self.deadlines, (deadline, hostname, rule.name))
+            self.scheduled.add(key)
+
+    def _touch(self, hostname, states, last_seen, now, events):
+        for rule in self.offline_rules:
+            state = states.get(rule.name)
+            if state is None:
+                state = states[rule.name] = {'since': last_seen, 'firing': False}
+            elif state['firing']:
+                state['firing'] = False
+                events.append(self._event(hostname, rule, state, 'resolved', now))
+            state['since'] = last_seen
+            self._schedule(hostname, rule, last_seen + rule.duration)
+
+    def touch(self, hostname, last_seen, now=None):
+        # ჰოსტი ცოცხალია (შეერთება ან განახლება) - მხოლოდ offline წესებისთვის
+        now = time.time() if now is None else now
+        events = []
+        with self.lock:
+            self._touch(hostname, self.states.setdefault(hostname, {}), last_seen, now, events)
+        return events
+
+    def evaluate(self, hostname, dynamic, now=None):
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        events = []
+        with self.lock:
+            self.evaluations += 1
+            states = self.states.setdefault(hostname, {})
+            rules = self.threshold_rules
+            start = self.cursors.get(hostname, 0)
+            for i in range(len(rules)):
+                if i and time.perf_counter() - started > self.budget:
+                    self.cursors[hostname] = (start + i) % len(rules)
+                    self.budget_exceeded += 1
+                    self.skipped_rules += len(rules) - i
+                    break
+                rule = rules[(start + i) % len(rules)]
+                value = rule.value(dynamic)
+                state = states.get(rule.name)
+                if value is not None and rule.compare(value, rule.threshold):
+                    if state is None:
+                        state = states[rule.name] = {'since': now, 'firing': False}
+                        if rule.duration > 0:
+                            self._schedule(hostname, rule, now + rule.duration)
+                    state['value'] = value
+                    if not state['firing'] and now - state['since'] >= rule.duration:
+                        state['firing'] = True
+                        state['fired_at'] = now
+                        events.append(self._event(hostname, rule, state, 'firing', now))
+                elif state is not None:
+                    del states[rule.name]
+                    if state['firing']:
+                        state['value'] = value
+                        events.append(self._event(hostname, rule, state, 'resolved', now))
+            else:
+                self.cursors.pop(hostname, None)
+            self._touch(hostname, states, now, now, events)
+        return events
+
+    def remove(self, hostname, now=None):
+        # წაშლილი ჰოსტის აქტიური ალერტები იხურება; heap-ში დარჩენილი ვადები expire-ისას გამოიტოვება
+        now = time.time() if now is None else now
+        with self.lock:
+            states = self.states.pop(hostname, {})
+            self.cursors.pop(hostname, None)
+            return [self._event(hostname, self.rules[name], state, 'resolved', now)
+                    for name, state in states.items() if state['firing']]
+
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        events = []
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                _, hostname, name = heapq.heappop(self.deadlines)
+                self.scheduled.discard((hostname, name))
+                rule = self.rules[name]
+                state = self.states.get(hostname, {}).get(name)
+                if state is None or state['firing']:
+                    continue
+                if state['since'] + rule.duration > now:
+                    # since შუალედში განახლდა (ახალი განახლება ან პირობის თავიდან დაწყება)
+                    self._schedule(hostname, rule, state['since'] + rule.duration)
+                    continue
+                state['firing'] = True
+                state['fired_at'] = now
+                events.append(self._event(hostname, rule, state, 'firing', now))
+        return events
+
+    def active(self):
+        with self.lock:
+            return [self._event(hostname, self.rules[name], state, 'firing', state['fired_at'])
+                    for hostname, states in self.states.items()
+                    for name, state in states.items() if state['firing']]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'rules': [rule.describe() for rule in self.rules.values()],
+                'evaluations': self.evaluations,
+                'budget_seconds': self.budget,
+                'budget_exceeded': self.budget_exceeded,
+                'skipped_rules': self.skipped_rules,
+                'pending_deadlines': len(self.deadlines),
+            }
@@ -1,29 +1,487 @@
 import logging
-from flask import Flask, send_from_directory, jsonify, request, session, redirect, url_for
+from flask import Flask, send_from_directory, jsonify, request, session, redirect, url_for, g, Response
 from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from functools import wraps
 import json
+import os
+import threading
+import time
 
 from config import Config
-from utils import login_required, load_data, save_data, check_password, encrypt_data, decrypt_data
+from utils import login_required, load_data, check_password
+from wire import negotiate, encode_message, decode_message, decode_spool_records
+from registry import Registry
+from shared_state import SqliteRegistry, SharedState, SqliteQueueManager
+from history import HistoryStore, METRICS
+from pipeline import UpdatePipeline, JoinAdmission
+from status import StatusIndex, parse_last_update
+from query import FleetIndex, RANGE_METRICS, project
+from responses import (negotiate_encoding, compress, compress_stream, should_compress, export_rows,
+                       EXPORT_FORMATS, EXPORT_FIELDS)
+from commands import CommandDispatcher
+from alerts import AlertEngine, AlertLog, load_rules
+from auth import CryptoExecutor, LoginLimiter
+from aggregates import FleetColumns, AGGREGATE_METRICS, DEFAULT_PERCENTILES
+import metrics
+from metrics import (SampledLog, SampledSize, Counter, Gauge, HTTP_LATENCY, SOCKET_LATENCY, BROADCAST_EVENTS, BROADCAST_RECIPIENTS,
+                     PAYLOAD_BYTES, CONNECTED_CLIENTS)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+payload_log = SampledLog(logger, Config.LOG_SAMPLE_EVERY)
+payload_bytes_out = SampledSize(PAYLOAD_BYTES, Config.PAYLOAD_SAMPLE_EVERY)
 
 app = Flask(__name__, static_folder='../static', template_folder='../templates')
 app.config.from_object(Config)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+if Config.MESSAGE_QUEUE and Config.MESSAGE_QUEUE.startswith('sqlite://'):
+    socketio = SocketIO(app, cors_allowed_origins="*", client_manager=SqliteQueueManager(Config.MESSAGE_QUEUE))
+else:
+    socketio = SocketIO(app, cors_allowed_origins="*", message_queue=Config.MESSAGE_QUEUE)
 
-def emit_update_computers(computers):
-    socketio.emit('update_computer_list', computers)
+if Config.STATE_DB:
+    # რამდენიმე worker-ის რეჟიმი (cluster.py): რეესტრი და აგენტების კავშირები საერთო SQLite-შია
+    registry = SqliteRegistry(
+        Config.STATE_DB,
+        Config.WORKER_ID,
+        snapshot_file=Config.COMPUTERS_FILE,
+        journal_file=Config.JOURNAL_FILE,
+        compact_interval=Config.COMPACT_INTERVAL,
+        delta_history=Config.DELTA_HISTORY,
+    )
+    shared_state = SharedState(Config.STATE_DB, Config.WORKER_ID)
+else:
+    registry = Registry(
+        Config.COMPUTERS_FILE,
+        Config.JOURNAL_FILE,
+        fsync_policy=Config.JOURNAL_FSYNC,
+        fsync_interval=Config.JOURNAL_FSYNC_INTERVAL,
+        compact_interval=Config.COMPACT_INTERVAL,
+        compact_max_entries=Config.COMPACT_MAX_ENTRIES,
+        delta_history=Config.DELTA_HISTORY,
+    )
+    shared_state = None
+
+def worker_file(filename):
+    # ისტორიის mmap და ალერტების ჟურნალი თითო worker-ს თავისი აქვს
+    if shared_state is None:
+        return filename
+    base, ext = os.path.splitext(filename)
+    return f'{base}.{Config.WORKER_ID}{ext}'
+
+history = HistoryStore(worker_file(Config.HISTORY_FILE), worker_file(Config.HISTORY_INDEX_FILE))
+
+status_index = StatusIndex(Config.ONLINE_WINDOW, Config.IDLE_WINDOW)
+
+fleet_index = FleetIndex()
+
+fleet_columns = FleetColumns(subnet_prefix=Config.AGGREGATE_SUBNET_PREFIX, max_age=Config.AGGREGATE_MAX_AGE)
+
+alert_engine = AlertEngine(load_rules(Config.ALERT_RULES_FILE), Config.ALERT_BUDGET_MS / 1000)
+
+alert_log = AlertLog(worker_file(Config.ALERT_LOG_FILE))
+
+crypto_executor = CryptoExecutor(Config.CRYPTO_WORKERS, Config.CRYPTO_MAX_PENDING)
+
+login_limiter = LoginLimiter(Config.LOGIN_RATE / 60, Config.LOGIN_BURST)
+
+DASHBOARD_ROOM = 'dashboards'
+
+# static_hash -> ბოლო ცნობილი სტატიკური ბლოკი; აგენტი სრულ ბლოკს აგზავნის მხოლოდ მისი შეცვლისას.
+# ბლოკი იშლება, როცა მის hash-ს აღარცერთი ჰოსტი აღარ მიუთითებს (static_refs)
+static_blocks = {}
+static_refs = {}
+host_static = {}
+static_lock = threading.Lock()
+
+# hostname -> შეთანხმებული კომპაქტური კოდეკი (None - ძველი JSON/Fernet ტექსტი)
+agent_codecs = {}
+
+# დაკავშირებული დაფები (sid) და აგენტები (sid -> hostname, hostname -> sid)
+dashboard_sids = set()
+agent_sids = {}
+agent_hosts = {}
+# აგენტები, რომლებიც join_retry-ს იცნობენ (connect auth: {'join_retry': true})
+retry_sids = set()
+
+def encode_for_host(hostname, data):
+    return encode_message(data, agent_codecs.get(hostname))
+
+def send_to_host(event, hostname, data):
+    # აგენტი შეიძლება სხვა worker-ზე იყოს დაკავშირებული: მაშინ კოდეკი საერთო მდგომარეობიდან იკითხება
+    # და შეტყობინება ჰოსტის ოთახში შეტყობინებების რიგით მიდის. False - აგენტი არსად არის დაკავშირებული
+    local = hostname in agent_hosts
+    if local or shared_state is None:
+        codec = agent_codecs.get(hostname)
+    else:
+        agent = shared_state.agent(hostname)
+        if agent is None:
+            return False
+        codec = agent['codec']
+    payload = encode_message(data, codec)
+    PAYLOAD_BYTES.inc(len(payload), event=event, direction='out')
+    socketio.emit(event, payload, room=hostname, ignore_queue=local)
+    return local or shared_state is not None
+
+def broadcast(event, data, local=False):
+    # ყველა დაფაზე გაგზავნა; fan-out და ბაიტები ითვლება /metrics-ისთვის.
+    # local - მხოლოდ ამ worker-ის დაფებზე (როცა ყველა worker იგივე მოვლენას თავად აგზავნის)
+    recipients = len(dashboard_sids)
+    BROADCAST_EVENTS.inc(event=event)
+    BROADCAST_RECIPIENTS.inc(recipients, event=event)
+    if recipients:
+        payload_bytes_out.inc(event, data, recipients)
+    socketio.emit(event, data, room=DASHBOARD_ROOM, ignore_queue=local)
+
+def send_host_command(hostname, command, command_id):
+    # False - აგენტი ამ მომენტში დაკავშირებული არ არის
+    return send_to_host('host_command', hostname, {'hostname': hostname, 'command': command, 'command_id': command_id})
+
+def socket_handler(event):
+    # socketio.on + დამუშავების დროის ჰისტოგრამა
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args):
+            with SOCKET_LATENCY.time(event=event):
+                return f(*args)
+        return socketio.on(event)(wrapper)
+    return decorator
+
+def decorate_computer(hostname, data):
+    # სტატუსი და ფერი წინასწარ არის გამოთვლილი status_index-ში
+    data['status'], data['color'] = status_index.get(hostname)
+    return data
+
+def make_delta(change):
+    seq, hostname, patch = change
+    delta = {'epoch': registry.epoch, 'seq': seq, 'hostname': hostname}
+    if patch is None:
+        delta['deleted'] = True
+        return delta
+
+    delta['patch'] = patch
+    delta['status'], delta['color'] = status_index.get(hostname)
+    return delta
+
+def emit_changes(changes):
+    # დაფებს ეგზავნება მხოლოდ შეცვლილი ჰოსტების ველები და არა მთელი სია; ერთი პარტიის ყველა ცვლილება
+    # ერთ მოვლენად (მაგ. ათასობით შეერთება გადატვირთვის შემდეგ). ყოველი worker თავის დაფებს აწვდის
+    if len(changes) == 1:
+        broadcast('computer_delta', make_delta(changes[0]), local=True)
+    elif changes:
+        broadcast('computer_delta_batch', [make_delta(change) for change in changes], local=True)
+
+def emit_full_computer_list():
+    # token იკითხება სტატუსების დამატებამდე: შუაში მომხდარ გადასვლას შემდეგი resync თავიდან გამოგზავნის
+    status_version = status_index.token()
+    epoch, seq, computers = registry.versioned_snapshot()
+    for hostname, data in computers.items():
+        decorate_computer(hostname, data)
+    payload = {'epoch': epoch, 'seq': seq, 'status_version': status_version, 'computers': computers}
+    payload_bytes_out.inc('update_computer_list', payload)
+    emit('update_computer_list', payload)
+
+def merge_update(hostname, computer, system_info, sid):
+    static_hash = system_info.get('static_hash')
+    if 'static' in system_info:
+        computer['static'] = system_info['static']
+        if static_hash:
+            static_blocks[static_hash] = system_info['static']
+            computer['static_hash'] = static_hash
+    elif static_hash and static_hash != computer.get('static_hash'):
+        if static_hash in static_blocks:
+            computer['static'] = static_blocks[static_hash]
+            computer['static_hash'] = static_hash
+        else:
+            logger.info(f"უცნობი static_hash {hostname}-სთვის, ვითხოვთ სრულ ინფორმაციას")
+            socketio.emit('request_static', encode_for_host(hostname, {'hostname': hostname}), to=sid)
+
+    computer['dynamic'] = system_info.get('dynamic', {})
+
+def publish_alerts(events):
+    alert_log.write(events)
+    broadcast('alerts', events)
+
+def apply_host_updates(hostname, items, alerts):
+    # ერთი ჰოსტის რამდენიმე ცვლილება ერთიანდება და რეესტრში იწერება ერთხელ
+    computer = registry.get(hostname)
+    changed = False
+    for item in items:
+        op = item['op']
+        if op == 'backfill':
+            # offline პერიოდის ნიმუშები ისტორიაში; რეესტრი იცვლება მხოლოდ თუ ბოლო ნიმუში უფრო ახალია
+            if computer is None or not item['data']:
+                continue
+            history.record_many(hostname, item['data'])
+            timestamp, dynamic = item['data'][-1]
+            last_seen = parse_last_update(computer)
+            if last_seen is None or timestamp > last_seen:
+                computer.setdefault('dynamic', {}).update(dynamic)
+                computer['dynamic']['last_update'] = datetime.fromtimestamp(timestamp).isoformat()
+                changed = True
+            continue
+        changed = True
+        if op == 'join':
+            if computer is None:
+                computer = {'static': {}, 'dynamic': {}}
+                logger.info(f"დაემატა ახალი კომპიუტერი: {hostname}")
+            computer.setdefault('dynamic', {})['last_update'] = item['received_at']
+            alerts.extend(alert_engine.touch(hostname, item['timestamp']))
+        elif op == 'update':
+            if computer is None:
+                logger.warning(f"მიღებულია განახლება უცნობი კომპიუტერისთვის: {hostname}")
+                socketio.emit('update_result', {'success': False, 'message': f"კომპიუტერი {hostname} ვერ მოიძებნა"},
+                              to=item['sid'])
+                continue
+            merge_update(hostname, computer, item['data'], item['sid'])
+            computer['dynamic']['last_update'] = item['received_at']
+            history.record(hostname, computer['dynamic'], item['timestamp'])
+            # წესები ფასდება თითო ნიმუშზე, მხოლოდ ამ ჰოსტისთვის
+            alerts.extend(alert_engine.evaluate(hostname, computer['dynamic'], item['timestamp']))
+        elif op == 'delete':
+            computer = None
+            history.drop(hostname)
+            alerts.extend(alert_engine.remove(hostname))
+
+    if not changed:
+        return None
+    if computer is None:
+        change = registry.delete(hostname)
+        unindex_host(hostname)
+        return change
+    change = registry.put(hostname, computer)
+    index_host(hostname, computer)
+    return change
+
+def apply_updates(batch):
+    changes = []
+    alerts = []
+    with registry.batch():
+        for hostname, items in batch.items():
+            # ერთი ჰოსტის შეცდომა პარტიის დანარჩენ ჰოსტებს არ უნდა შეეხოს
+            try:
+                with registry.savepoint():
+                    change = apply_host_updates(hostname, items, alerts)
+            except Exception as e:
+                logger.error(f"შეცდომა {hostname}-ის ცვლილებების გამოყენებისას: {str(e)}")
+                continue
+            if change is not None:
+                changes.append(change)
+    # რამდენიმე worker-ის რეჟიმში ცვლილებებს დაფებს follow_changes აწვდის საერთო seq-ის რიგით
+    if shared_state is None:
+        emit_changes(changes)
+    if alerts:
+        publish_alerts(alerts)
+
+def apply_remote_change(hostname, data, patch, alerts):
+    # ჰოსტი სხვა worker-მა განაახლა: აქ ახლდება მხოლოდ ინდექსები და ისტორია. ალერტებს ის worker აფასებს,
+    # რომელთანაც აგენტია დაკავშირებული, ამიტომ აქ არსებული მდგომარეობა (თუ ჰოსტი აქედან გადავიდა) იხურება
+    alerts.extend(alert_engine.remove(hostname))
+    if data is None:
+        unindex_host(hostname)
+        history.drop(hostname)
+        return
+    index_host(hostname, data)
+    last_seen = parse_last_update(data)
+    if last_seen is not None and any(metric in (patch or {}).get('dynamic', {}) for metric in METRICS):
+        history.record(hostname, data['dynamic'], last_seen)
+
+def follow_changes():
+    followed = registry.follow()
+    if followed is None:
+        logger.warning("ცვლილებების ჟურნალის საჭირო ნაწილი უკვე წაიშალა, რეესტრი თავიდან იტვირთება")
+        computers = registry.reload()
+        for hostname in set(fleet_index.hosts) - set(computers):
+            unindex_host(hostname)
+        for hostname, data in computers.items():
+            index_host(hostname, data)
+        return
+    changes = []
+    alerts = []
+    for change, data, local in followed:
+        if not local:
+            apply_remote_change(change[1], data, change[2], alerts)
+        changes.append(change)
+    emit_changes(changes)
+    if alerts:
+        publish_alerts(alerts)
+
+update_pipeline = UpdatePipeline(
+    apply_updates,
+    maxsize=Config.UPDATE_QUEUE_SIZE,
+    batch_size=Config.UPDATE_BATCH_SIZE,
+    batch_window=Config.UPDATE_BATCH_WINDOW,
+    put_timeout=Config.UPDATE_QUEUE_TIMEOUT,
+)
+
+join_admission = JoinAdmission(Config.JOIN_RATE, Config.JOIN_BURST)
+
+command_dispatcher = CommandDispatcher(
+    send_host_command,
+    lambda progress: broadcast('bulk_command_progress', progress),
+    sleep=socketio.sleep,
+    wave_size=Config.COMMAND_WAVE_SIZE,
+    wave_interval=Config.COMMAND_WAVE_INTERVAL,
+    timeout=Config.COMMAND_TIMEOUT,
+    poll=shared_state.pop_command_results if shared_state is not None else None,
+)
+
+def queue_update(hostname, op, data, sid=None):
+    return update_pipeline.submit(hostname, {
+        'op': op,
+        'data': data,
+        'sid': sid or request.sid,
+        'received_at': datetime.now().isoformat(),
+        'timestamp': time.time(),
+    })
+
+def track_static(hostname, data):
+    # data=None - ჰოსტი წაიშალა
+    static_hash = data.get('static_hash') if data else None
+    with static_lock:
+        previous = host_static.get(hostname)
+        if static_hash:
+            static_blocks.setdefault(static_hash, data.get('static', {}))
+        if static_hash == previous:
+            return
+        if static_hash:
+            host_static[hostname] = static_hash
+            static_refs[static_hash] = static_refs.get(static_hash, 0) + 1
+        else:
+            host_static.pop(hostname, None)
+        if previous:
+            static_refs[previous] -= 1
+            if not static_refs[previous]:
+                del static_refs[previous]
+                static_blocks.pop(previous, None)
+
+def index_host(hostname, data):
+    track_static(hostname, data)
+    status, color = status_index.update(hostname, data)
+    fleet_index.update(hostname, data, status, color)
+    fleet_columns.update(hostname, data, status)
+
+def unindex_host(hostname):
+    track_static(hostname, None)
+    status_index.remove(hostname)
+    fleet_index.remove(hostname)
+    fleet_columns.remove(hostname)
 
 def clean_computer_data():
-    computers = load_data(Config.COMPUTERS_FILE)
-    cleaned_computers = {hostname: data for hostname, data in computers.items() if hostname and isinstance(data, dict)}
-    save_data(Config.COMPUTERS_FILE, cleaned_computers)
-    return cleaned_computers
+    # snapshot + ჟურნალის აღდგენა და გასუფთავებული snapshot-ის ჩაწერა
+    computers = registry.load()
+    # რამდენიმე worker-ის რეჟიმში გაშვებისას offline ალერტებს პირველი worker ადევნებს თვალს,
+    # სანამ ჰოსტი რომელიმე worker-ს არ შეუერთდება
+    track_offline = shared_state is None or Config.WORKER_ID == 0
+    for hostname, data in computers.items():
+        index_host(hostname, data)
+        last_seen = parse_last_update(data)
+        if last_seen is not None and track_offline:
+            alert_engine.touch(hostname, last_seen)
+    if shared_state is not None:
+        shared_state.clear_worker()
+    history.open()
+    return computers
+
+def registry_maintenance_loop():
+    last_history_flush = time.monotonic()
+    while True:
+        socketio.sleep(Config.JOURNAL_FSYNC_INTERVAL)
+        try:
+            registry.maintain()
+            if shared_state is not None:
+                shared_state.maintain()
+            if time.monotonic() - last_history_flush >= Config.HISTORY_FLUSH_INTERVAL:
+                history.flush()
+                last_history_flush = time.monotonic()
+        except Exception as e:
+            logger.error(f"შეცდომა რეესტრის ჟურნალის მომსახურებისას: {str(e)}")
+
+def follow_changes_loop():
+    # რამდენიმე worker-ის რეჟიმი: სხვა worker-ების ცვლილებები საერთო ჟურნალიდან
+    while True:
+        socketio.sleep(Config.FOLLOW_INTERVAL)
+        try:
+            follow_changes()
+        except Exception as e:
+            logger.error(f"შეცდომა საერთო ცვლილებების კითხვისას: {str(e)}")
+
+def status_timer_loop():
+    # online -> idle -> offline გადასვლები; დაფებს ეგზავნება მხოლოდ შეცვლილი სტატუსები.
+    # იმავე ტაიმერზე მოწმდება ალერტების ვადები (duration და offline წესები)
+    while True:
+        socketio.sleep(Config.STATUS_TIMER_INTERVAL)
+        try:
+            transitions = status_index.expire()
+            for transition in transitions:
+                fleet_index.set_status(transition['hostname'], transition['status'])
+                fleet_columns.set_status(transition['hostname'], transition['status'])
+            if transitions:
+                # ყოველი worker სტატუსებს თავად ითვლის, ამიტომ საკუთარ დაფებს აწვდის
+                broadcast('status_changes', transitions, local=True)
+            events = alert_engine.expire()
+            if events:
+                publish_alerts(events)
+        except Exception as e:
+            logger.error(f"შეცდომა სტატუსების განახლებისას: {str(e)}")
+
+Gauge('update_queue_depth', 'Pending items in the update pipeline', function=lambda: update_pipeline.queue.qsize())
+Counter('update_queue_rejected_total', 'Updates rejected because the pipeline was full',
+        function=lambda: update_pipeline.rejected)
+Counter('joins_deferred_total', 'Agent joins deferred by admission control', function=lambda: join_admission.deferred)
+Gauge('alerts_active', 'Currently firing alerts', function=lambda: len(alert_engine.active()))
+Counter('alert_budget_exceeded_total', 'Updates whose rule evaluation ran out of time budget',
+        function=lambda: alert_engine.budget_exceeded)
+Counter('crypto_tasks_rejected_total', 'Password checks rejected because the crypto executor was full',
+        function=lambda: crypto_executor.rejected)
+Counter('login_attempts_limited_total', 'Login attempts rejected by the per-user rate limit',
+        function=lambda: login_limiter.rejected)
+Gauge('registry_hosts', 'Hosts in the in-memory registry', function=lambda: len(registry))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                             method=request.method, status=response.status_code)
+    return response
+
+@app.after_request
+def compress_response(response):
+    # დიდი JSON/CSV პასუხები gzip-ით ან brotli-თ (Accept-Encoding-ის მიხედვით)
+    if not should_compress(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def not_modified(etag):
+    # If-None-Match მოწმდება პასუხის აგებამდე; ETag სუსტია, რადგან სხეული შეიძლება შეკუმშული იყოს
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def fleet_etag():
+    epoch, seq = registry.version()
+    return f'{epoch}-{seq}-{status_index.version}'
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 @login_required
@@ -43,10 +501,32 @@ def login():
     if not username or not password:
         return jsonify({"success": False, "message": "სახელი და პაროლი აუცილებელია"}), 400
 
-    if username in users and check_password(password, users[username].get('password_hash')):
-        session['user_id'] = username
-        logger.info(f"მომხმარებელმა {username} წარმატებით გაიარა ავტორიზაცია")
-        return jsonify({"success": True, "message": "ავტორიზაცია წარმატებულია"})
+    allowed, retry_after = login_limiter.allow(username)
+    if not allowed:
+        logger.warning(f"ავტორიზაციის მცდელობების ლიმიტი ამოიწურა მომხმარებლისთვის {username}")
+        response = jsonify({"success": False, "message": "ძალიან ბევრი მცდელობა, სცადეთ მოგვიანებით"})
+        response.headers['Retry-After'] = str(int(retry_after) + 1)
+        return response, 429
+
+    if username in users:
+        # bcrypt შეზღუდულ ნაკადებზე სრულდება, რომ შესვლებმა ტელემეტრიის დამუშავება არ შეაფერხოს
+        future = crypto_executor.submit(check_password, password, users[username].get('password_hash'))
+        valid = None
+        if future is not None:
+            try:
+                valid = future.result(timeout=Config.CRYPTO_TIMEOUT)
+            except FutureTimeoutError:
+                pass
+        if valid is None:
+            logger.warning(f"ავტორიზაცია გადაიდო: პაროლის შემოწმების რიგი სავსეა ({username})")
+            response = jsonify({"success": False, "message": "სერვერი დატვირთულია, სცადეთ მოგვიანებით"})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        if valid:
+            login_limiter.reset(username)
+            session['user_id'] = username
+            logger.info(f"მომხმარებელმა {username} წარმატებით გაიარა ავტორიზაცია")
+            return jsonify({"success": True, "message": "ავტორიზაცია წარმატებულია"})
 
     logger.warning(f"ავტორიზაციის მცდელობა წარუმატებელია მომხმარებლისთვის {username}")
     return jsonify({"success": False, "message": "არასწორი მომხმარებელი ან პაროლი"}), 401
@@ -60,24 +540,22 @@ def logout():
 @login_required
 def get_computers():
     try:
-        computers = load_data(Config.COMPUTERS_FILE)
-        current_time = datetime.now()
+        # სტატუსის ვერსია ETag-ში სნეპშოტამდე იკითხება: შუალედური გადასვლა შემდეგ მოთხოვნაზე გამოჩნდება
+        etag = fleet_etag()
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        epoch, seq, computers = registry.versioned_snapshot()
         for hostname, data in computers.items():
-            last_update = datetime.fromisoformat(data.get('dynamic', {}).get('last_update', ''))
-            time_diff = current_time - last_update
+            decorate_computer(hostname, data)
 
-            if time_diff <= timedelta(minutes=5):
-                data['status'] = 'online'
-            elif time_diff <= timedelta(hours=1):
-                data['status'] = 'idle'
-            else:
-                data['status'] = 'offline'
-
-            cpu_usage = data.get('dynamic', {}).get('cpu_usage', 0)
-            data['color'] = 'green' if cpu_usage < 50 else 'yellow' if cpu_usage < 80 else 'red'
-
-        logger.info(f"იგზავნება განახლებული კომპიუტერების მონაცემები: {computers}")
-        return jsonify(computers)
+        logger.info("იგზავნება %d კომპიუტერის მონაცემები", len(computers))
+        response = jsonify(computers)
+        response.headers['X-Registry-Epoch'] = epoch
+        response.headers['X-Registry-Seq'] = str(seq)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(etag, weak=True)
+        return response
     except Exception as e:
         logger.error(f"შეცდომა კომპიუტერების მიღებისას: {str(e)}")
         return jsonify({"success": False, "message": "შეცდომა კომპიუტერების მიღებისას"}), 500
@@ -86,83 +564,344 @@ def get_computers():
 @login_required
 def get_host_info(hostname):
     try:
-        computers = load_data(Config.COMPUTERS_FILE)
-        if hostname in computers:
-            host_info = computers[hostname]
+        if hostname not in registry:
+            return jsonify({"success": False, "message": "ჰოსტი ვერ მოიძებნა"}), 404
+        epoch, version = registry.version(hostname)
+        status, color = status_index.get(hostname)
+        etag = f'{epoch}-{version}-{status}-{color}'
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        host_info = registry.get(hostname)
+        if host_info is not None:
+            decorate_computer(hostname, host_info)
             host_info['hostname'] = hostname
-            return jsonify({"success": True, "info": host_info})
+            response = jsonify({"success": True, "info": host_info})
+            response.headers['Cache-Control'] = 'no-cache'
+            response.set_etag(etag, weak=True)
+            return response
         else:
             return jsonify({"success": False, "message": "ჰოსტი ვერ მოიძებნა"}), 404
     except Exception as e:
         logger.error(f"შეცდომა ჰოსტის ინფორმაციის მიღებისას: {str(e)}")
         return jsonify({"success": False, "message": "შეცდომა ჰოსტის ინფორმაციის მიღებისას"}), 500
 
-@socketio.on('join')
-def handle_join(encrypted_data):
+@app.route('/query_computers')
+@login_required
+def query_computers():
+    try:
+        args = request.args
+        filters = {
+            'q': args.get('q'),
+            'prefix': args.get('prefix'),
+            'subnet': args.get('subnet'),
+        }
+        for key in ('status', 'color', 'os'):
+            filters[key] = [value for value in args.get(key, '').split(',') if value]
+        for metric in RANGE_METRICS:
+            filters[f'{metric}_min'] = args.get(f'{metric}_min', type=float)
+            filters[f'{metric}_max'] = args.get(f'{metric}_max', type=float)
+        fields = [field for field in args.get('fields', '').split(',') if field]
+
+        hostnames, total, next_cursor = fleet_index.search(
+            filters,
+            sort=args.get('sort', 'hostname'),
+            limit=args.get('limit', default=100, type=int),
+            cursor=args.get('cursor'),
+        )
+
+        items = []
+        for hostname in hostnames:
+            data = registry.get(hostname)
+            if data is not None:
+                items.append(project(hostname, decorate_computer(hostname, data), fields))
+        return jsonify({"success": True, "total": total, "items": items, "next_cursor": next_cursor})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"შეცდომა კომპიუტერების ძებნისას: {str(e)}")
+        return jsonify({"success": False, "message": "შეცდომა კომპიუტერების ძებნისას"}), 500
+
+@app.route('/export_computers')
+@login_required
+def export_computers():
+    # ინვენტარის ექსპორტი ჩანაწერ-ჩანაწერ (NDJSON ან CSV); მეხსიერებაში მხოლოდ hostname-ების სია და ერთი chunk-ია
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "message": f"ფორმატი უნდა იყოს: {', '.join(EXPORT_FORMATS)}"}), 400
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    if fmt == 'csv':
+        fields = fields or list(EXPORT_FIELDS)
+    epoch, seq = registry.version()
+    hostnames = registry.hostnames()
+
+    def rows():
+        for hostname in hostnames:
+            data = registry.get(hostname)
+            if data is not None:
+                yield project(hostname, decorate_computer(hostname, data), fields)
+
+    def generate():
+        try:
+            yield from export_rows(rows(), fmt, fields)
+        except Exception as e:
+            logger.error(f"შეცდომა ინვენტარის ექსპორტისას: {str(e)}")
+            raise
+
+    chunks = generate()
+    encoding = negotiate_encoding(request.accept_encodings)
+    response = Response(compress_stream(chunks, encoding) if encoding else chunks, mimetype=EXPORT_FORMATS[fmt])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Content-Disposition'] = f'attachment; filename=computers-{epoch}-{seq}.{fmt}'
+    response.headers['X-Registry-Epoch'] = epoch
+    response.headers['X-Registry-Seq'] = str(seq)
+    return response
+
+@app.route('/get_host_history/<hostname>')
+@login_required
+def get_host_history(hostname):
+    try:
+        end = request.args.get('end', default=time.time(), type=float)
+        start = request.args.get('start', default=end - 3600, type=float)
+        resolution = request.args.get('resolution', 'auto')
+        max_points = request.args.get('max_points', type=int)
+        metrics = request.args.get('metrics')
+        metrics = tuple(metrics.split(',')) if metrics else METRICS
+        if any(metric not in METRICS for metric in metrics):
+            return jsonify({"success": False, "message": "უცნობი მეტრიკა"}), 400
+
+        result = history.query(hostname, start, end, resolution, metrics, max_points)
+        if result is None:
+            return jsonify({"success": False, "message": "ჰოსტის ისტორია ვერ მოიძებნა"}), 404
+        return jsonify({"success": True, "hostname": hostname, **result})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"შეცდომა ჰოსტის ისტორიის მიღებისას: {str(e)}")
+        return jsonify({"success": False, "message": "შეცდომა ჰოსტის ისტორიის მიღებისას"}), 500
+
+@app.route('/fleet_aggregates')
+@login_required
+def fleet_aggregates():
+    # მაგ. ?metrics=memory_usage&group_by=os&percentiles=95 ან ?metrics=disk_usage&above=80
+    try:
+        args = request.args
+        metrics = tuple(metric for metric in args.get('metrics', '').split(',') if metric) or AGGREGATE_METRICS
+        percentiles = args.get('percentiles')
+        percentiles = tuple(float(q) for q in percentiles.split(',') if q) if percentiles is not None \
+            else DEFAULT_PERCENTILES
+        result = fleet_columns.aggregate(
+            metrics,
+            group_by=args.get('group_by') or None,
+            percentiles=percentiles,
+            bins=args.get('bins', default=0, type=int),
+            above=args.get('above', type=float),
+        )
+        return jsonify({"success": True, **result})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"შეცდომა ფლოტის აგრეგატების გამოთვლისას: {str(e)}")
+        return jsonify({"success": False, "message": "შეცდომა ფლოტის აგრეგატების გამოთვლისას"}), 500
+
+@app.route('/bulk_commands')
+@login_required
+def bulk_commands():
+    return jsonify({"success": True, "jobs": command_dispatcher.list()})
+
+@app.route('/bulk_commands/<job_id>')
+@login_required
+def bulk_command_details(job_id):
+    job = command_dispatcher.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "ბრძანება ვერ მოიძებნა"}), 404
+    return jsonify({"success": True, "job": job})
+
+@app.route('/alerts')
+@login_required
+def get_alerts():
+    return jsonify({"success": True, "alerts": alert_engine.active(), **alert_engine.stats()})
+
+@app.route('/pipeline_stats')
+@login_required
+def pipeline_stats():
+    return jsonify(dict(update_pipeline.stats(), joins=join_admission.stats(), aggregates=fleet_columns.stats(),
+                        crypto=crypto_executor.stats(), logins=login_limiter.stats()))
+
+@socket_handler('connect')
+def handle_connect(auth=None):
+    if 'user_id' in session:
+        join_room(DASHBOARD_ROOM)
+        dashboard_sids.add(request.sid)
+        CONNECTED_CLIENTS.set(len(dashboard_sids), kind='dashboard')
+    elif isinstance(auth, dict) and auth.get('join_retry'):
+        retry_sids.add(request.sid)
+
+@socket_handler('disconnect')
+def handle_disconnect(reason=None):
+    dashboard_sids.discard(request.sid)
+    retry_sids.discard(request.sid)
+    join_admission.unpark(request.sid)
+    hostname = agent_sids.pop(request.sid, None)
+    if hostname is not None and agent_hosts.get(hostname) == request.sid:
+        del agent_hosts[hostname]
+        if shared_state is not None:
+            shared_state.unregister_agent(hostname)
+    CONNECTED_CLIENTS.set(len(dashboard_sids), kind='dashboard')
+    CONNECTED_CLIENTS.set(len(agent_sids), kind='agent')
+
+@socket_handler('resync')
+def handle_resync(data):
+    if 'user_id' not in session:
+        # დაფამ resyncPending უნდა მოხსნას, თორემ შემდეგ delta-ებს აღარ მიიღებს
+        emit('resync_error', {'message': 'სესია ვადაგასულია, გთხოვთ თავიდან შეხვიდეთ სისტემაში'})
+        return
+
+    data = data or {}
+    since = data.get('since')
+    changes = None
+    if data.get('epoch') == registry.epoch and isinstance(since, int):
+        changes = registry.changes_since(since)
+
+    if changes is None:
+        logger.info(f"დაფას ეგზავნება სრული სია (since={since})")
+        emit_full_computer_list()
+    else:
+        emit('computer_deltas', [make_delta(change) for change in changes])
+        # idle/offline გადასვლები seq-ს არ ცვლის, ამიტომ გამოტოვებულები ცალკე იგზავნება
+        transitions = status_index.changes_since(data.get('status_version'))
+        if transitions:
+            emit('status_changes', transitions)
+
+def defer_join(sid, encrypted_data, retry_after):
+    # ძველი აგენტები join_retry-ს ყურადღებას არ აქცევენ და თავიდან აღარ უერთდებიან - მათ შეერთებას
+    # სერვერი ინახავს და deferred_join_loop-ში თავად ამუშავებს, როცა სლოტი გათავისუფლდება
+    if sid in retry_sids:
+        socketio.emit('join_retry', {'retry_after': round(retry_after, 3)}, to=sid)
+    else:
+        join_admission.park(sid, encrypted_data)
+
+def process_join(sid, encrypted_data):
+    # request-ის კონტექსტის გარეშეც მუშაობს (გადადებული შეერთებები), ამიტომ ყველაფერი sid-ით
     try:
-        data = decrypt_data(encrypted_data)
+        data = decode_message(encrypted_data)
         hostname = data.get('hostname')
         if not hostname:
             logger.error("მიღებულია შეერთების მოთხოვნა hostname-ის გარეშე")
             return
 
-        logger.info(f"შეერთდა: {hostname}")
+        codec = negotiate(data.get('codecs'))
+        agent_codecs[hostname] = codec
 
-        computers = load_data(Config.COMPUTERS_FILE)
-        if hostname not in computers:
-            computers[hostname] = {'static': {}, 'dynamic': {}}
-            logger.info(f"დაემატა ახალი კომპიუტერი: {hostname}")
-        else:
-            logger.info(f"არსებული კომპიუტერი ხელახლა დაუკავშირდა: {hostname}")
+        logger.info(f"შეერთდა: {hostname}")
 
-        computers[hostname]['dynamic']['last_update'] = datetime.now().isoformat()
-        save_data(Config.COMPUTERS_FILE, computers)
+        if not queue_update(hostname, 'join', data, sid):
+            logger.warning(f"ცვლილებების რიგი სავსეა, შეერთება გადაიდო: {hostname}")
+            defer_join(sid, encrypted_data, max(1.0, update_pipeline.queue.qsize() / Config.JOIN_RATE))
+            return
 
-        join_room(hostname)
+        socketio.server.enter_room(sid, hostname, namespace='/')
+        agent_sids[sid] = hostname
+        agent_hosts[hostname] = sid
+        if shared_state is not None:
+            shared_state.register_agent(hostname, codec)
+        CONNECTED_CLIENTS.set(len(agent_sids), kind='agent')
 
-        emit('status', {'message': f'{hostname} დაკავშირებულია'})
-        emit_update_computers(computers)
+        socketio.emit('status', {'message': f'{hostname} დაკავშირებულია'}, to=sid)
+        if codec:
+            socketio.emit('wire_format', {'codec': codec}, to=sid)
     except Exception as e:
         logger.error(f"შეცდომა შეერთების დამუშავებისას: {str(e)}")
-        emit('error', {'message': 'შეცდომა შეერთების დამუშავებისას'})
+        socketio.emit('error', {'message': 'შეცდომა შეერთების დამუშავებისას'}, to=sid)
+
+def deferred_join_loop():
+    while True:
+        socketio.sleep(0.1)
+        for sid, encrypted_data, update in join_admission.release():
+            process_join(sid, encrypted_data)
+            # შეერთება ისევ გადაიდო (რიგი სავსეა) - განახლება მასთან ერთად რჩება
+            if update is None or join_admission.hold(sid, update):
+                continue
+            if not queue_update(update['hostname'], 'update', update, sid):
+                logger.warning(f"ცვლილებების რიგი სავსეა, გადადებული განახლება უარყოფილია: {update['hostname']}")
+
+@socket_handler('join')
+def handle_join(encrypted_data):
+    PAYLOAD_BYTES.inc(len(encrypted_data), event='join', direction='in')
+    # დაშვება გაშიფვრამდე მოწმდება, რომ შეერთებების ტალღამ CPU არ დაიკავოს
+    admitted, retry_after = join_admission.admit()
+    if not admitted:
+        defer_join(request.sid, encrypted_data, retry_after)
+        return
+    # აგენტმა თავად გაიმეორა შეერთება - გადადებული ასლი აღარ სჭირდება
+    join_admission.unpark(request.sid)
+    process_join(request.sid, encrypted_data)
 
-@socketio.on('update_computer_data')
+def valid_update(system_info):
+    # რიგში ხვდება მხოლოდ ის, რასაც მწერალი უსაფრთხოდ გამოიყენებს
+    return (isinstance(system_info.get('dynamic', {}), dict)
+            and isinstance(system_info.get('static', {}), dict)
+            and isinstance(system_info.get('static_hash'), (str, type(None))))
+
+@socket_handler('update_computer_data')
 def handle_update_computer_data(encrypted_data):
     try:
-        system_info = decrypt_data(encrypted_data)
+        PAYLOAD_BYTES.inc(len(encrypted_data), event='update_computer_data', direction='in')
+        system_info = decode_message(encrypted_data)
         hostname = system_info.get('hostname')
 
         if not hostname:
-            logger.error(f"მიღებულია განახლება ცარიელი hostname-ით. მონაცემები: {system_info}")
+            logger.error("მიღებულია განახლება ცარიელი hostname-ით. მონაცემები: %s", system_info)
             return
 
-        logger.info(f"მიღებულია განახლება {hostname}-სთვის: {system_info}")
-
-        computers = load_data(Config.COMPUTERS_FILE)
-
-        if hostname in computers:
-            if 'static' in system_info:
-                computers[hostname]['static'] = system_info['static']
-
-            computers[hostname]['dynamic'] = system_info.get('dynamic', {})
-            computers[hostname]['dynamic']['last_update'] = datetime.now().isoformat()
+        # payload-ი სტრიქონად მხოლოდ შერჩეულ ჩანაწერებში იქცევა
+        payload_log.info("მიღებულია განახლება %s-სთვის: %s", hostname, system_info)
 
-            save_data(Config.COMPUTERS_FILE, computers)
+        if not valid_update(system_info):
+            logger.error(f"მიღებულია არასწორი ფორმატის განახლება {hostname}-სთვის")
+            emit('update_result', {'success': False, 'message': 'განახლების არასწორი ფორმატი'})
+            return
 
-            logger.info(f"განახლებული მონაცემები {hostname}-სთვის: {computers[hostname]}")
-            emit_update_computers(computers)
-            logger.info(f"გაგზავნილია განახლებული კომპიუტერების სია")
+        # ძველი აგენტი განახლებას შეერთებისთანავე აგზავნის; სანამ შეერთება გადადებულია, ინახება ბოლო
+        # განახლება და რიგში შეერთების შემდეგ ხვდება, თორემ ჰოსტი ჯერ არ არსებობს და განახლება დაიკარგება
+        if join_admission.hold(request.sid, system_info):
+            emit('update_result', {'success': True, 'message': f"მიღებულია განახლებული ინფორმაცია {hostname}-სთვის"})
+            return
 
+        if queue_update(hostname, 'update', system_info):
             emit('update_result', {'success': True, 'message': f"მიღებულია განახლებული ინფორმაცია {hostname}-სთვის"})
         else:
-            logger.warning(f"მიღებულია განახლება უცნობი კომპიუტერისთვის: {hostname}")
-            emit('update_result', {'success': False, 'message': f"კომპიუტერი {hostname} ვერ მოიძებნა"})
+            logger.warning(f"ცვლილებების რიგი სავსეა, განახლება უარყოფილია: {hostname}")
+            emit('update_result', {'success': False, 'message': 'სერვერი გადატვირთულია, სცადეთ მოგვიანებით'})
 
     except Exception as e:
         logger.error(f"შეცდომა კომპიუტერის მონაცემების განახლებისას: {str(e)}")
         emit('error', {'message': 'შეცდომა მონაცემების განახლებისას'})
 
-@socketio.on('restart_host')
+@socket_handler('bulk_backfill')
+def handle_bulk_backfill(encrypted_data):
+    # აგენტის offline spool-ი ერთი შეკუმშული შეტყობინებით; პასუხი ბრუნდება Socket.IO ack-ით
+    try:
+        PAYLOAD_BYTES.inc(len(encrypted_data), event='bulk_backfill', direction='in')
+        data = decode_message(encrypted_data)
+        hostname = agent_sids.get(request.sid)
+        if hostname is None or hostname != data.get('hostname'):
+            return {'success': False, 'message': 'ჰოსტი არ არის შეერთებული'}
+
+        samples = decode_spool_records(data.get('records') or b'')
+        if not queue_update(hostname, 'backfill', sorted(samples, key=lambda sample: sample[0])):
+            return {'success': False, 'message': 'სერვერი გადატვირთულია, სცადეთ მოგვიანებით'}
+        logger.info(f"{hostname}-დან მიღებულია {len(samples)} შენახული ნიმუში")
+        return {'success': True, 'accepted': len(samples)}
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}
+    except Exception as e:
+        logger.error(f"შეცდომა backfill-ის დამუშავებისას: {str(e)}")
+        return {'success': False, 'message': 'შეცდომა backfill-ის დამუშავებისას'}
+
+@socket_handler('restart_host')
 def handle_restart_host(data):
     try:
         hostname = data.get('hostname')
@@ -170,15 +909,14 @@ def handle_restart_host(data):
             logger.error("გადატვირთვის ბრძანება მიღებულია hostname-ის გარეშე")
             return
 
-        encrypted_command = encrypt_data({'hostname': hostname, 'command': 'restart'})
-        socketio.emit('host_command', encrypted_command, room=hostname)
+        send_to_host('host_command', hostname, {'hostname': hostname, 'command': 'restart'})
         logger.info(f"გადატვირთვის ბრძანება გაიგზავნა {hostname}-ზე")
         emit('restart_result', {'success': True, 'message': f'{hostname}-ზე გაიგზავნა გადატვირთვის ბრძანება'})
     except Exception as e:
         logger.error(f"შეცდომა გადატვირთვის ბრძანების გაგზავნისას: {str(e)}")
         emit('restart_result', {'success': False, 'message': 'შეცდომა გადატვირთვის ბრძანების გაგზავნისას'})
 
-@socketio.on('check_host')
+@socket_handler('check_host')
 def handle_check_host(data):
     try:
         hostname = data.get('hostname')
@@ -187,12 +925,10 @@ def handle_check_host(data):
             return
 
         logger.info(f"მიღებულია შემოწმების მოთხოვნა {hostname}-სთვის")
-        computers = load_data(Config.COMPUTERS_FILE)
 
-        if hostname in computers:
-            encrypted_request = encrypt_data({'hostname': hostname, 'command': 'check'})
+        if hostname in registry:
             logger.info(f"იგზავნება შემოწმების მოთხოვნა {hostname}-ზე")
-            socketio.emit('host_command', encrypted_request, room=hostname)
+            send_to_host('host_command', hostname, {'hostname': hostname, 'command': 'check'})
 
             logger.info(f"შემოწმების მოთხოვნა გაგზავნილია {hostname}-ზე")
             emit('check_result', {'success': True, 'message': f'{hostname}-ზე გაიგზავნა შემოწმების მოთხოვნა'})
@@ -203,17 +939,73 @@ def handle_check_host(data):
         logger.error(f"შეცდომა შემოწმების მოთხოვნის გაგზავნისას: {str(e)}")
         emit('check_result', {'success': False, 'message': 'შეცდომა შემოწმების მოთხოვნის გაგზავნისას'})
 
-@socketio.on('delete_host')
+@socket_handler('bulk_command')
+def handle_bulk_command(data):
+    if 'user_id' not in session:
+        return
+    try:
+        data = data or {}
+        selector = data.get('selector') or {}
+        hostnames = selector.get('hostnames')
+        statuses = selector.get('status')
+        if isinstance(statuses, str):
+            statuses = [statuses]
+        pattern = selector.get('pattern')
+        if hostnames is None and not statuses and not pattern:
+            emit('bulk_command_result', {'success': False, 'message': 'ჰოსტების სელექტორი აუცილებელია'})
+            return
+
+        job = command_dispatcher.create(
+            data.get('command'),
+            fleet_index.select(hostnames, statuses, pattern),
+            wave_size=data.get('wave_size'),
+            wave_interval=data.get('wave_interval'),
+            timeout=data.get('timeout'),
+        )
+        logger.info(f"ჯგუფური ბრძანება {job.command} ({job.id}) {len(job.hosts)} ჰოსტზე, "
+                    f"მომხმარებელი {session['user_id']}")
+        socketio.start_background_task(command_dispatcher.run, job)
+        emit('bulk_command_result', {'success': True, 'job_id': job.id, 'total': len(job.hosts),
+                                     'message': f'{job.command} იგზავნება {len(job.hosts)} ჰოსტზე'})
+    except ValueError as e:
+        emit('bulk_command_result', {'success': False, 'message': str(e)})
+    except Exception as e:
+        logger.error(f"შეცდომა ჯგუფური ბრძანების გაშვებისას: {str(e)}")
+        emit('bulk_command_result', {'success': False, 'message': 'შეცდომა ჯგუფური ბრძანების გაშვებისას'})
+
+@socket_handler('command_ack')
+def handle_command_ack(encrypted_data):
+    try:
+        data = decode_message(encrypted_data)
+        # ჰოსტი განისაზღვრება კავშირით და არა payload-ით; სხვა worker-ის ბრძანების პასუხი საერთო მდგომარეობაში იწერება
+        command_id, hostname = data.get('command_id'), agent_sids.get(request.sid)
+        if not command_dispatcher.ack(command_id, hostname) and shared_state is not None and command_id and hostname:
+            shared_state.push_command_result(command_id, hostname, 'acked')
+    except Exception as e:
+        logger.error(f"შეცდომა ბრძანების დადასტურების დამუშავებისას: {str(e)}")
+
+@socket_handler('command_result')
+def handle_command_result(encrypted_data):
+    try:
+        data = decode_message(encrypted_data)
+        command_id, hostname = data.get('command_id'), agent_sids.get(request.sid)
+        success = bool(data.get('success'))
+        if (not command_dispatcher.result(command_id, hostname, success, data.get('message'))
+                and shared_state is not None and command_id and hostname):
+            shared_state.push_command_result(command_id, hostname, 'done' if success else 'failed', data.get('message'))
+    except Exception as e:
+        logger.error(f"შეცდომა ბრძანების შედეგის დამუშავებისას: {str(e)}")
+
+@socket_handler('delete_host')
 def handle_delete_host(data):
     try:
         hostname = data.get('hostname')
-        computers = load_data(Config.COMPUTERS_FILE)
-        if hostname in computers:
-            del computers[hostname]
-            save_data(Config.COMPUTERS_FILE, computers)
+        if hostname in registry:
+            if not queue_update(hostname, 'delete', {}):
+                emit('delete_result', {'success': False, 'message': 'სერვერი გადატვირთულია, სცადეთ მოგვიანებით'})
+                return
             logger.info(f"ჰოსტი წაიშალა: {hostname}")
             emit('delete_result', {'success': True, 'message': f'{hostname} წარმატებით წაიშალა'})
-            emit_update_computers(computers)
         else:
             logger.warning(f"წაშლის მოთხოვნა უცნობი ჰოსტისთვის: {hostname}")
             emit('delete_result', {'success': False, 'message': f'ჰოსტი {hostname} ვერ მოიძებნა'})
@@ -223,4 +1015,11 @@ def handle_delete_host(data):
 
 if __name__ == '__main__':
     clean_computer_data()
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.start_background_task(registry_maintenance_loop)
+    socketio.start_background_task(update_pipeline.run)
+    socketio.start_background_task(status_timer_loop)
+    socketio.start_background_task(deferred_join_loop)
+    if shared_state is not None:
+        socketio.start_background_task(follow_changes_loop)
+    # reloader-ი მეორე პროცესში ხელახლა გაუშვებდა აპს და ერთსა და იმავე ჟურნალს ორი რეესტრი ჩაწერდა
+    socketio.run(app, debug=True, use_reloader=False, host=Config.HOST, port=Config.PORT)
\ No newline at end of file
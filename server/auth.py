@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CryptoExecutor:
+    # bcrypt-ის მსგავსი CPU-მძიმე ოპერაციები workers ნაკადზე სრულდება; ერთდროულად მაქსიმუმ
+    # workers + max_pending დავალებაა, დანარჩენი მაშინვე უარყოფილია, რომ შესვლების ტალღამ
+    # ტელემეტრიის დამუშავებას CPU არ წაართვას
+    def __init__(self, workers=2, max_pending=16):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crypto')
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def _release(self, future):
+        self.slots.release()
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+        with self.lock:
+            self.submitted += 1
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def stats(self):
+        with self.lock:
+            return {'workers': self.workers, 'max_pending': self.max_pending,
+                    'submitted': self.submitted, 'rejected': self.rejected}
+
+
+class LoginLimiter:
+    # შესვლის მცდელობების token bucket თითო მომხმარებელზე: rate მცდელობა წამში, burst-მდე ერთბაშად.
+    # ცნობილი მომხმარებლების რაოდენობა შეზღუდულია max_users-ით (ყველაზე ძველი bucket-ები იშლება)
+    def __init__(self, rate=10 / 60, burst=5, max_users=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self.lock = threading.Lock()
+        # username -> (tokens, updated)
+        self.buckets = OrderedDict()
+        self.rejected = 0
+
+    def allow(self, username, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens, updated = self.buckets.pop(username, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.rejected += 1
+            self.buckets[username] = (tokens, now)
+            while len(self.buckets) > self.max_users:
+                self.buckets.popitem(last=False)
+        return (True, 0.0) if allowed else (False, (1 - tokens) / self.rate)
+
+    def reset(self, username):
+        with self.lock:
+            self.buckets.pop(username, None)
+
+    def stats(self):
+        with self.lock:
+            return {'tracked_users': len(self.buckets), 'rejected': self.rejected}
@@ -0,0 +1,99 @@
+# სერვერის გაშვება რამდენიმე worker პროცესად. worker-ები იზიარებენ SQLite მდგომარეობას (STATE_DB) და
+# Socket.IO-ს შეტყობინებების რიგს (MESSAGE_QUEUE), თითო worker უსმენს საკუთარ პორტს: PORT, PORT+1, ...
+#
+#   WORKERS=4 PORT=5000 python cluster.py
+#   MESSAGE_QUEUE=redis://127.0.0.1:6379/0 WORKERS=4 python cluster.py
+#
+# worker-ების წინ საჭიროა balancer-ი sticky სესიებით (Socket.IO-ს polling-ის მოთხოვნები ერთსა და იმავე
+# worker-ზე უნდა მოხვდეს), მაგალითად nginx:
+#
+#   upstream monitor {
+#       ip_hash;
+#       server 127.0.0.1:5000;
+#       server 127.0.0.1:5001;
+#   }
+#   server {
+#       listen 80;
+#       location / {
+#           proxy_pass http://monitor;
+#           proxy_http_version 1.1;
+#           proxy_set_header Upgrade $http_upgrade;
+#           proxy_set_header Connection "upgrade";
+#           proxy_set_header Host $host;
+#       }
+#   }
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from config import Config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+# ზედიზედ სწრაფად ჩამოვარდნილი worker-ი ხელახლა ამ დაყოვნების შემდეგ ეშვება
+RESTART_DELAY = 1.0
+
+
+class Cluster:
+    def __init__(self, workers, port, state_db, message_queue):
+        self.workers = workers
+        self.port = port
+        self.state_db = state_db
+        self.message_queue = message_queue
+        # worker id -> Popen
+        self.processes = {}
+        self.stopping = False
+
+    def environment(self, worker_id):
+        return dict(os.environ, WORKER_ID=str(worker_id), PORT=str(self.port + worker_id),
+                    STATE_DB=self.state_db, MESSAGE_QUEUE=self.message_queue)
+
+    def spawn(self, worker_id):
+        # stdin გადაეცემა მშობლისგან: Werkzeug-ს tty სჭირდება
+        process = subprocess.Popen([sys.executable, 'app.py'], cwd=SERVER_DIR, env=self.environment(worker_id))
+        self.processes[worker_id] = process
+        logger.info(f"worker {worker_id} გაეშვა (pid {process.pid}, პორტი {self.port + worker_id})")
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        # პირველი worker ქმნის ბაზას და გადააქვს ძველი snapshot; დანარჩენები მის შემდეგ ეშვება
+        self.spawn(0)
+        time.sleep(RESTART_DELAY)
+        for worker_id in range(1, self.workers):
+            self.spawn(worker_id)
+        while not self.stopping:
+            time.sleep(0.5)
+            for worker_id, process in list(self.processes.items()):
+                if self.stopping or process.poll() is None:
+                    continue
+                logger.warning(f"worker {worker_id} დასრულდა კოდით {process.returncode}, ხელახლა ეშვება")
+                time.sleep(RESTART_DELAY)
+                self.spawn(worker_id)
+        for worker_id, process in self.processes.items():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"worker {worker_id} არ დასრულდა, იკვლება")
+                process.kill()
+
+
+if __name__ == '__main__':
+    state_db = Config.STATE_DB or os.path.join(Config.DATA_DIR, 'state.db')
+    Cluster(
+        workers=int(os.environ.get('WORKERS', os.cpu_count() or 1)),
+        port=Config.PORT,
+        state_db=state_db,
+        message_queue=Config.MESSAGE_QUEUE or f'sqlite:///{state_db}',
+    ).run()
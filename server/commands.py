@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ('restart', 'check')
+STATES = ('pending', 'sent', 'acked', 'done', 'failed', 'timeout', 'offline')
+TERMINAL_STATES = ('done', 'failed', 'timeout', 'offline')
+# დაფიდან მოსული პარამეტრების დასაშვები საზღვრები (ჩათვლით)
+WAVE_SIZE_RANGE = (1, 10000)
+WAVE_INTERVAL_RANGE = (0.0, 3600.0)
+TIMEOUT_RANGE = (1.0, 3600.0)
+
+
+def parameter(name, value, default, cast, bounds):
+    # None - ნაგულისხმევი; სხვა მნიშვნელობა რიცხვად გარდაიქმნება და მოწმდება, არასწორზე ValueError
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} უნდა იყოს რიცხვი: {value!r}")
+    low, high = bounds
+    if not low <= number <= high:
+        raise ValueError(f"{name} უნდა იყოს {low}-დან {high}-მდე: {value!r}")
+    return number
+
+
+class BulkJob:
+    def __init__(self, command, hostnames, wave_size, wave_interval, timeout):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.wave_size = wave_size
+        self.wave_interval = wave_interval
+        self.timeout = timeout
+        self.created_at = time.time()
+        self.finished_at = None
+        self.hosts = {hostname: {'state': 'pending', 'message': None} for hostname in hostnames}
+        # გაგზავნილი, მაგრამ ჯერ დაუსრულებელი ჰოსტები გაგზავნის რიგით: hostname -> sent_at
+        self.outstanding = OrderedDict()
+        self.counts = dict.fromkeys(STATES, 0)
+        self.counts['pending'] = len(self.hosts)
+        self.changed = True
+
+    def set_state(self, hostname, state, message=None):
+        host = self.hosts[hostname]
+        if host['state'] == state or host['state'] in TERMINAL_STATES:
+            return False
+        self.counts[host['state']] -= 1
+        self.counts[state] += 1
+        host['state'] = state
+        if message is not None:
+            host['message'] = message
+        if state in TERMINAL_STATES:
+            self.outstanding.pop(hostname, None)
+        self.changed = True
+        return True
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def progress(self):
+        return {
+            'job_id': self.id,
+            'command': self.command,
+            'total': len(self.hosts),
+            'counts': dict(self.counts),
+            'finished': self.finished,
+        }
+
+    def details(self):
+        return dict(self.progress(), created_at=self.created_at, finished_at=self.finished_at,
+                    hosts={hostname: dict(host) for hostname, host in self.hosts.items()})
+
+
+class CommandDispatcher:
+    # ბრძანება ბევრ ჰოსტზე: იგზავნება wave_size-იან ტალღებად wave_interval-ის შუალედით,
+    # თითო ჰოსტზე ითვლება ack/result/timeout და დაფებს ეგზავნება შეჯამებული პროგრესი.
+    # poll(job_id) აბრუნებს სხვა worker-ზე მიღებულ (hostname, state, message) პასუხებს
+    def __init__(self, send, publish, sleep=time.sleep, wave_size=50, wave_interval=1.0, timeout=30,
+                 progress_interval=0.5, max_jobs=100, poll=None):
+        self.send = send
+        self.publish = publish
+        self.sleep = sleep
+        self.poll = poll
+        self.wave_size = wave_size
+        self.wave_interval = wave_interval
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+
+    def create(self, command, hostnames, wave_size=None, wave_interval=None, timeout=None):
+        if command not in COMMANDS:
+            raise ValueError(f"უცნობი ბრძანება: {command}")
+        if not hostnames:
+            raise ValueError("სელექტორს არცერთი ჰოსტი არ შეესაბამება")
+        job = BulkJob(
+            command,
+            hostnames,
+            parameter('wave_size', wave_size, self.wave_size, int, WAVE_SIZE_RANGE),
+            parameter('wave_interval', wave_interval, self.wave_interval, float, WAVE_INTERVAL_RANGE),
+            parameter('timeout', timeout, self.timeout, float, TIMEOUT_RANGE),
+        )
+        with self.lock:
+            self.jobs[job.id] = job
+            # იშლება უძველესი დასრულებული ბრძანებები; დაუსრულებელი რჩება და სხვებს არ აბრკოლებს
+            excess = len(self.jobs) - self.max_jobs
+            for job_id in [job_id for job_id, old in self.jobs.items() if old.finished][:max(0, excess)]:
+                del self.jobs[job_id]
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.details() if job is not None else None
+
+    def list(self):
+        with self.lock:
+            return [job.progress() for job in self.jobs.values()]
+
+    def ack(self, job_id, hostname):
+        # False - ბრძანება ამ პროცესში არ შექმნილა
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and hostname in job.hosts and job.hosts[hostname]['state'] == 'sent':
+                job.set_state(hostname, 'acked')
+            return job is not None
+
+    def result(self, job_id, hostname, success, message=None):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and hostname in job.hosts:
+                job.set_state(hostname, 'done' if success else 'failed', message)
+            return job is not None
+
+    def _poll_results(self, job):
+        for hostname, state, message in self.poll(job.id):
+            if state == 'acked':
+                self.ack(job.id, hostname)
+            else:
+                self.result(job.id, hostname, state == 'done', message)
+
+    def _send_wave(self, job, wave):
+        for hostname in wave:
+            # sent ჩაიწერება გაგზავნამდე, რომ სწრაფი ack წინ არ გაუსწროს
+            with self.lock:
+                job.set_state(hostname, 'sent')
+                job.outstanding[hostname] = time.monotonic()
+            try:
+                delivered = self.send(hostname, job.command, job.id)
+            except Exception as e:
+                logger.error(f"შეცდომა ბრძანების გაგზავნისას {hostname}-ზე: {str(e)}")
+                with self.lock:
+                    job.set_state(hostname, 'failed', str(e))
+                continue
+            if not delivered:
+                with self.lock:
+                    job.set_state(hostname, 'offline')
+
+    def _expire(self, job, now):
+        with self.lock:
+            while job.outstanding:
+                hostname, sent_at = next(iter(job.outstanding.items()))
+                if now - sent_at < job.timeout:
+                    break
+                job.outstanding.popitem(last=False)
+                job.set_state(hostname, 'timeout')
+
+    def _publish(self, job):
+        with self.lock:
+            job.changed = False
+            progress = job.progress()
+        self.publish(progress)
+
+    def run(self, job):
+        # შეცდომის შემთხვევაშიც ბრძანება სრულდება: დაუმთავრებელი ჰოსტები failed-ია, finished_at ყოველთვის იწერება
+        try:
+            self._run(job)
+        except Exception as e:
+            logger.error(f"შეცდომა ბრძანების {job.command} შესრულებისას ({job.id}): {str(e)}")
+            with self.lock:
+                for hostname, host in job.hosts.items():
+                    if host['state'] not in TERMINAL_STATES:
+                        job.set_state(hostname, 'failed', str(e))
+        finally:
+            with self.lock:
+                unfinished = job.finished_at is None
+                if unfinished:
+                    job.finished_at = time.time()
+            if unfinished:
+                self._publish(job)
+
+    def _run(self, job):
+        hostnames = list(job.hosts)
+        next_wave = last_publish = 0.0
+        sent = 0
+        while True:
+            now = time.monotonic()
+            if sent < len(hostnames) and now >= next_wave:
+                wave = hostnames[sent:sent + job.wave_size]
+                sent += len(wave)
+                self._send_wave(job, wave)
+                next_wave = now + job.wave_interval
+            if self.poll is not None:
+                self._poll_results(job)
+            self._expire(job, now)
+
+            if sent >= len(hostnames):
+                with self.lock:
+                    done = not job.outstanding
+                    if done:
+                        job.finished_at = time.time()
+                if done:
+                    self._publish(job)
+                    logger.info(f"ბრძანება {job.command} დასრულდა ({job.id}): {job.counts}")
+                    return
+
+            if job.changed and now - last_publish >= self.progress_interval:
+                self._publish(job)
+                last_publish = now
+            self.sleep(0.1)
@@ -2,6 +2,67 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key'
-    COMPUTERS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'computers.json')
-    USERS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'users.json')
+    # Fernet გასაღებები მძიმით: პირველით იშიფრება, დანარჩენები მხოლოდ გასაშიფრადაა.
+    # როტაცია: ახალი გასაღები ჯერ ბოლოში ემატება სერვერსაც და აგენტებსაც, შემდეგ გადადის
+    # პირველ ადგილზე და ძველი ამოიღება. ცარიელი - utils.ENCRYPTION_KEY
+    ENCRYPTION_KEYS = [key.strip().encode() for key in os.environ.get('ENCRYPTION_KEYS', '').split(',') if key.strip()]
+    HOST = os.environ.get('HOST', '0.0.0.0')
+    PORT = int(os.environ.get('PORT', 5000))
+    DATA_DIR = os.environ.get('DATA_DIR') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    COMPUTERS_FILE = os.path.join(DATA_DIR, 'computers.json')
+    JOURNAL_FILE = os.path.join(DATA_DIR, 'computers.journal')
+    # always - fsync ყოველ ჩანაწერზე, interval - fsync JOURNAL_FSYNC_INTERVAL წამში ერთხელ, never - მხოლოდ flush
+    JOURNAL_FSYNC = os.environ.get('JOURNAL_FSYNC', 'interval')
+    JOURNAL_FSYNC_INTERVAL = float(os.environ.get('JOURNAL_FSYNC_INTERVAL', 1.0))
+    COMPACT_INTERVAL = float(os.environ.get('COMPACT_INTERVAL', 300))
+    COMPACT_MAX_ENTRIES = int(os.environ.get('COMPACT_MAX_ENTRIES', 10000))
+    # რამდენი ბოლო ცვლილება ინახება დაფების resync-ისთვის
+    DELTA_HISTORY = int(os.environ.get('DELTA_HISTORY', 5000))
+    HISTORY_FILE = os.path.join(DATA_DIR, 'history.bin')
+    HISTORY_INDEX_FILE = os.path.join(DATA_DIR, 'history.index.json')
+    HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 30))
+    # ცვლილებების რიგი: ზომა, პარტიის მაქსიმუმი, პარტიის შეგროვების ფანჯარა და ლოდინი სავსე რიგზე (წამები)
+    UPDATE_QUEUE_SIZE = int(os.environ.get('UPDATE_QUEUE_SIZE', 10000))
+    UPDATE_BATCH_SIZE = int(os.environ.get('UPDATE_BATCH_SIZE', 500))
+    UPDATE_BATCH_WINDOW = float(os.environ.get('UPDATE_BATCH_WINDOW', 0.05))
+    UPDATE_QUEUE_TIMEOUT = float(os.environ.get('UPDATE_QUEUE_TIMEOUT', 0.5))
+    # შეერთებების დაშვება: წამში JOIN_RATE, ერთდროულად JOIN_BURST; დანარჩენებს ეგზავნება join_retry
+    JOIN_RATE = float(os.environ.get('JOIN_RATE', 500))
+    JOIN_BURST = int(os.environ.get('JOIN_BURST', 1000))
+    # ჰოსტი online-ია ბოლო განახლებიდან ONLINE_WINDOW წამი, idle - IDLE_WINDOW წამამდე, შემდეგ offline.
+    # client.py-ის IDLE_HEARTBEAT_INTERVAL ONLINE_WINDOW-ზე ნაკლები უნდა იყოს (SERVER_ONLINE_WINDOW)
+    ONLINE_WINDOW = int(os.environ.get('ONLINE_WINDOW', 5 * 60))
+    IDLE_WINDOW = int(os.environ.get('IDLE_WINDOW', 60 * 60))
+    STATUS_TIMER_INTERVAL = float(os.environ.get('STATUS_TIMER_INTERVAL', 1.0))
+    # ჯგუფური ბრძანებები: ტალღის ზომა, ტალღებს შორის შუალედი და ჰოსტის პასუხის ლოდინი (წამები)
+    COMMAND_WAVE_SIZE = int(os.environ.get('COMMAND_WAVE_SIZE', 50))
+    COMMAND_WAVE_INTERVAL = float(os.environ.get('COMMAND_WAVE_INTERVAL', 1.0))
+    COMMAND_TIMEOUT = float(os.environ.get('COMMAND_TIMEOUT', 60))
+    # ალერტების წესები (JSON სია; ფაილის გარეშე - alerts.DEFAULT_RULES), ჟურნალი და
+    # ერთი განახლების შეფასების დროის ბიუჯეტი მილიწამებში
+    ALERT_RULES_FILE = os.path.join(DATA_DIR, 'alert_rules.json')
+    ALERT_LOG_FILE = os.path.join(DATA_DIR, 'alerts.log')
+    ALERT_BUDGET_MS = float(os.environ.get('ALERT_BUDGET_MS', 1.0))
+    # ფლოტის აგრეგატების subnet დაჯგუფების პრეფიქსი (IPv4; IPv6-ისთვის მინიმუმ /64)
+    AGGREGATE_SUBNET_PREFIX = int(os.environ.get('AGGREGATE_SUBNET_PREFIX', 24))
+    # აგრეგატის ქეშირებული შედეგის მაქსიმალური ასაკი წამებში (0 - ყოველი ცვლილებისას ხელახლა ითვლება)
+    AGGREGATE_MAX_AGE = float(os.environ.get('AGGREGATE_MAX_AGE', 1.0))
+    # bcrypt-ის შესრულება: ნაკადები, რიგის ზღვარი და პასუხის ლოდინი (წამები)
+    CRYPTO_WORKERS = int(os.environ.get('CRYPTO_WORKERS', 2))
+    CRYPTO_MAX_PENDING = int(os.environ.get('CRYPTO_MAX_PENDING', 16))
+    CRYPTO_TIMEOUT = float(os.environ.get('CRYPTO_TIMEOUT', 10))
+    # შესვლის მცდელობები თითო მომხმარებელზე: LOGIN_RATE წუთში, ერთბაშად LOGIN_BURST
+    LOGIN_RATE = float(os.environ.get('LOGIN_RATE', 10))
+    LOGIN_BURST = int(os.environ.get('LOGIN_BURST', 5))
+    # რამდენიმე worker-ის რეჟიმი (server/cluster.py): საერთო SQLite მდგომარეობა, Socket.IO-ს
+    # შეტყობინებების რიგი (sqlite:///... ან redis://...), worker-ის ნომერი და ცვლილებების კითხვის შუალედი
+    STATE_DB = os.environ.get('STATE_DB')
+    MESSAGE_QUEUE = os.environ.get('MESSAGE_QUEUE')
+    WORKER_ID = int(os.environ.get('WORKER_ID', 0))
+    FOLLOW_INTERVAL = float(os.environ.get('FOLLOW_INTERVAL', 0.05))
+    # დიდი payload-ების ლოგიდან იწერება ყოველი LOG_SAMPLE_EVERY-ე
+    LOG_SAMPLE_EVERY = int(os.environ.get('LOG_SAMPLE_EVERY', 100))
+    # დაფებზე გაგზავნილი dict-ების ზომა (/metrics) იზომება ყოველ PAYLOAD_SAMPLE_EVERY-ე შეტყობინებაზე
+    PAYLOAD_SAMPLE_EVERY = int(os.environ.get('PAYLOAD_SAMPLE_EVERY', 20))
+    USERS_FILE = os.path.join(DATA_DIR, 'users.json')
     DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
\ No newline at end of file
@@ -0,0 +1,252 @@
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+
+from utils import load_data, save_data
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'network_usage')
+
+# (სახელი, bucket-ის სიგრძე წამებში, slot-ების რაოდენობა):
+# raw - 10 წამი 1 საათის განმავლობაში, 1m - 1 დღე, 15m - 30 დღე
+TIERS = (
+    ('raw', 10, 360),
+    ('1m', 60, 1440),
+    ('15m', 900, 2880),
+)
+
+# ერთი slot: [bucket_start, count, metric sums...]
+RECORD_SIZE = 2 + len(METRICS)
+ITEM_SIZE = 8
+TIER_OFFSETS = {}
+_offset = 0
+for _name, _width, _slots in TIERS:
+    TIER_OFFSETS[_name] = _offset
+    _offset += _slots * RECORD_SIZE
+HOST_RECORDS = _offset
+HOST_BYTES = HOST_RECORDS * ITEM_SIZE
+
+
+class HistoryStore:
+    # მეტრიკების ისტორია ring buffer-ებში, ერთ memory-mapped ფაილში;
+    # თითოეულ ჰოსტს აქვს ფიქსირებული ზომის ბლოკი, ინდექსი hostname -> ბლოკი ცალკე ინახება.
+    # ბლოკის მინიჭება/გათავისუფლება მაშინვე იწერება ინდექსის ჟურნალში (ring-ის მონაცემები mmap-ში
+    # მაშინვე ჩნდება), ასე რომ ავარიის შემდეგ ბლოკი სხვა ჰოსტს არ მიენიჭება; flush-ისას ჟურნალი ინდექსში ერთიანდება
+    def __init__(self, data_file, index_file, grow_step=256):
+        self.data_file = data_file
+        self.index_file = index_file
+        self.journal_file = os.path.splitext(index_file)[0] + '.journal'
+        self.grow_step = grow_step
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.free_slots = []
+        self.capacity = 0
+        self._index_dirty = False
+        self._journal = None
+        self._file = None
+        self._mmap = None
+        self._view = None
+
+    def open(self):
+        with self.lock:
+            index = load_data(self.index_file) if os.path.exists(self.index_file) else {}
+            self.slots = {hostname: slot for hostname, slot in index.get('slots', {}).items()}
+            self.free_slots = list(index.get('free', []))
+            replayed = self._replay_journal()
+            if replayed:
+                self._save_index()
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+
+            if not os.path.exists(self.data_file):
+                open(self.data_file, 'wb').close()
+            self._file = open(self.data_file, 'r+b')
+            capacity = os.path.getsize(self.data_file) // HOST_BYTES
+            used = max(self.slots.values(), default=-1) + 1
+            self._map(max(capacity, used, self.grow_step))
+            logger.info(f"მეტრიკების ისტორია ჩაიტვირთა: {len(self.slots)} ჰოსტი")
+
+    def _map(self, capacity):
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+        if os.path.getsize(self.data_file) < capacity * HOST_BYTES:
+            # ფაილი იზრდება sparse-ად, ამიტომ დისკზე იკავებს მხოლოდ გამოყენებულ გვერდებს
+            self._file.truncate(capacity * HOST_BYTES)
+        self._mmap = mmap.mmap(self._file.fileno(), capacity * HOST_BYTES)
+        self._view = memoryview(self._mmap).cast('d')
+        self.capacity = capacity
+
+    def _replay_journal(self):
+        # ბოლო flush-ის შემდეგ მინიჭებული/გათავისუფლებული ბლოკები; დაზიანებული ბოლო ხაზი გამოიტოვება
+        if not os.path.exists(self.journal_file):
+            return 0
+        replayed = 0
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    op, hostname, slot = json.loads(line)
+                except ValueError:
+                    logger.warning(f"ისტორიის ინდექსის ჟურნალის დაზიანებული ჩანაწერი გამოტოვებულია: {self.journal_file}")
+                    continue
+                if op == 'assign':
+                    if slot in self.free_slots:
+                        self.free_slots.remove(slot)
+                    self.slots[hostname] = slot
+                elif self.slots.get(hostname) == slot:
+                    del self.slots[hostname]
+                    self.free_slots.append(slot)
+                replayed += 1
+        return replayed
+
+    def _log_slot(self, op, hostname, slot):
+        if self._journal is not None:
+            self._journal.write(json.dumps([op, hostname, slot], ensure_ascii=False) + '\n')
+            self._journal.flush()
+
+    def _save_index(self):
+        save_data(self.index_file, {'slots': self.slots, 'free': self.free_slots})
+        self._index_dirty = False
+        # ჟურნალის ყველა ჩანაწერი ახლა ინდექსშია
+        if self._journal is not None:
+            self._journal.truncate(0)
+        elif os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def _slot_for(self, hostname, create):
+        slot = self.slots.get(hostname)
+        if slot is not None or not create:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.slots) + len(self.free_slots)
+            if slot >= self.capacity:
+                self._map(self.capacity + self.grow_step)
+        self.slots[hostname] = slot
+        # მთლიანი ინდექსი ინახება flush-ისას, რომ ახალი ჰოსტების ტალღამ ყოველ ჯერზე არ გადაწეროს
+        self._log_slot('assign', hostname, slot)
+        self._index_dirty = True
+        return slot
+
+    @staticmethod
+    def _values(dynamic):
+        values = []
+        for metric in METRICS:
+            try:
+                values.append(float(dynamic.get(metric) or 0))
+            except (TypeError, ValueError):
+                values.append(0.0)
+        return values
+
+    def _record(self, slot, values, timestamp):
+        view = self._view
+        host_base = slot * HOST_RECORDS
+        for name, width, slots in TIERS:
+            bucket = timestamp - timestamp % width
+            base = host_base + TIER_OFFSETS[name] + int(bucket // width) % slots * RECORD_SIZE
+            if view[base] > bucket:
+                # დაგვიანებული ნიმუში (მაგ. backfill) - slot-ში უკვე უფრო ახალი bucket-ია
+                continue
+            if view[base] != bucket:
+                # slot-ში ძველი bucket-ია - ring buffer გადაიწერება
+                view[base:base + RECORD_SIZE] = memoryview(bytes(RECORD_SIZE * ITEM_SIZE)).cast('d')
+                view[base] = bucket
+            view[base + 1] += 1
+            for i, value in enumerate(values):
+                view[base + 2 + i] += value
+
+    def record(self, hostname, dynamic, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        values = self._values(dynamic)
+        with self.lock:
+            self._record(self._slot_for(hostname, create=True), values, timestamp)
+
+    def record_many(self, hostname, samples):
+        # samples: [(timestamp, dynamic), ...] - მთელი პარტია ერთი lock-ით
+        rows = [(timestamp, self._values(dynamic)) for timestamp, dynamic in samples]
+        with self.lock:
+            slot = self._slot_for(hostname, create=True)
+            for timestamp, values in rows:
+                self._record(slot, values, timestamp)
+
+    def drop(self, hostname):
+        with self.lock:
+            slot = self.slots.pop(hostname, None)
+            if slot is None:
+                return
+            base = slot * HOST_RECORDS
+            self._view[base:base + HOST_RECORDS] = memoryview(bytes(HOST_BYTES)).cast('d')
+            self.free_slots.append(slot)
+            self._log_slot('drop', hostname, slot)
+            self._index_dirty = True
+
+    def pick_tier(self, start, end):
+        for name, width, slots in TIERS:
+            # ერთი bucket-ის დაშვება, რომ "ბოლო საათი" raw-ში მოხვდეს
+            if time.time() - start <= width * (slots + 1):
+                return name
+        return TIERS[-1][0]
+
+    def query(self, hostname, start, end, resolution='auto', metrics=METRICS, max_points=None):
+        if resolution == 'auto':
+            resolution = self.pick_tier(start, end)
+        tier = next((tier for tier in TIERS if tier[0] == resolution), None)
+        if tier is None:
+            raise ValueError(f"უცნობი რეზოლუცია: {resolution}")
+        name, width, slots = tier
+        columns = [METRICS.index(metric) for metric in metrics]
+
+        timestamps = []
+        series = {metric: [] for metric in metrics}
+        with self.lock:
+            slot = self._slot_for(hostname, create=False)
+            if slot is None:
+                return None
+            view = self._view
+            tier_base = slot * HOST_RECORDS + TIER_OFFSETS[name]
+            # ring buffer-ზე მეტს ვერ დავაბრუნებთ
+            start = max(start, end - width * slots)
+            bucket = start - start % width
+            while bucket <= end:
+                base = tier_base + int(bucket // width) % slots * RECORD_SIZE
+                count = view[base + 1]
+                if view[base] == bucket and count:
+                    timestamps.append(bucket)
+                    for metric, column in zip(metrics, columns):
+                        series[metric].append(round(view[base + 2 + column] / count, 2))
+                bucket += width
+
+        if max_points and len(timestamps) > max_points:
+            step = -(-len(timestamps) // max_points)
+            timestamps = timestamps[::step]
+            series = {metric: [round(sum(values[i:i + step]) / len(values[i:i + step]), 2)
+                               for i in range(0, len(values), step)]
+                      for metric, values in series.items()}
+        return {'resolution': name, 'step': width, 'timestamps': timestamps, 'series': series}
+
+    def flush(self):
+        with self.lock:
+            if self._mmap is not None:
+                self._mmap.flush()
+            if self._index_dirty:
+                self._save_index()
+
+    def close(self):
+        with self.lock:
+            if self._index_dirty:
+                self._save_index()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._view is not None:
+                self._view.release()
+                self._mmap.flush()
+                self._mmap.close()
+                self._file.close()
+                self._view = None
+                self._mmap = None
+                self._file = None
@@ -0,0 +1,214 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        _metrics.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        # function: კომპონენტის საკუთარი მონოტონური მთვლელი, იკითხება მხოლოდ /metrics-ის მოთხოვნისას
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        if self.function is not None:
+            items = [((), self.function())]
+        else:
+            with self.lock:
+                items = sorted(self.values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                                for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        # function: გამოითვლება მხოლოდ /metrics-ის მოთხოვნისას, ცხელ გზაზე არაფერი ხდება
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        if self.function is not None:
+            items = [((), self.function())]
+        else:
+            with self.lock:
+                items = sorted(self.values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                                for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self.values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{labels} {state["count"]}')
+        return lines
+
+
+def render():
+    # Prometheus text exposition format 0.0.4
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class SampledLog:
+    # დიდი payload-ების ლოგი: იწერება ყოველი every-ე გამოძახება და მხოლოდ ჩართულ დონეზე;
+    # ფორმატირება %-არგუმენტებით ხდება, ასე რომ გამოტოვებული ჩანაწერი dict-ს სტრიქონად არ აქცევს
+    def __init__(self, logger, every=100):
+        self.logger = logger
+        self.every = max(1, every)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def log(self, level, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        with self.lock:
+            self.calls += 1
+            if (self.calls - 1) % self.every:
+                return
+        self.logger.log(level, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+
+class SampledSize:
+    # გამავალი payload-ების ბაიტები: უკვე კოდირებული შეტყობინება ითვლება ზუსტად, dict კი JSON-ად
+    # სერიალიზდება მხოლოდ ყოველ every-ე გამოძახებაზე (თითო მოვლენაზე) და შედეგი every-ზე მრავლდება
+    def __init__(self, counter, every=100):
+        self.counter = counter
+        self.every = max(1, every)
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def inc(self, event, data, recipients=1, direction='out'):
+        if isinstance(data, (str, bytes, bytearray)):
+            self.counter.inc(len(data) * recipients, event=event, direction=direction)
+            return
+        with self.lock:
+            calls = self.calls[event] = self.calls.get(event, 0) + 1
+            if (calls - 1) % self.every:
+                return
+        size = len(json.dumps(data, separators=(',', ':'), default=str))
+        self.counter.inc(size * recipients * self.every, event=event, direction=direction)
+
+
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'HTTP route latency', ('endpoint', 'method', 'status'))
+SOCKET_LATENCY = Histogram('socketio_handler_duration_seconds', 'Socket.IO handler latency', ('event',))
+STORAGE_LATENCY = Histogram('storage_operation_duration_seconds', 'JSON file load/save time', ('operation',))
+DECRYPT_LATENCY = Histogram('fernet_decrypt_duration_seconds', 'Fernet decrypt time for agent messages', ('format',))
+BROADCAST_EVENTS = Counter('broadcast_events_total', 'Events emitted to dashboards', ('event',))
+BROADCAST_RECIPIENTS = Counter('broadcast_recipients_total', 'Dashboard deliveries (events x connected dashboards)', ('event',))
+PAYLOAD_BYTES = Counter('payload_bytes_total', 'Serialized payload bytes by event and direction', ('event', 'direction'))
+CONNECTED_CLIENTS = Gauge('connected_clients', 'Connected Socket.IO clients by kind', ('kind',))
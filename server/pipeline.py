@@ -0,0 +1,173 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class UpdatePipeline:
+    # შემოსული ცვლილებების შეზღუდული რიგი ერთი მწერლით: handler-ები მხოლოდ რიგში დებენ,
+    # მწერალი აგროვებს პარტიას, აჯგუფებს ერთი ჰოსტის ცვლილებებს და ერთად იყენებს
+    def __init__(self, apply_batch, maxsize=10000, batch_size=500, batch_window=0.05, put_timeout=0.5):
+        self.apply_batch = apply_batch
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.put_timeout = put_timeout
+        self.lock = threading.Lock()
+        self.enqueued = 0
+        self.rejected = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def submit(self, hostname, item):
+        # რიგის გავსებისას handler ცოტას ელოდება (backpressure), შემდეგ უარს ამბობს
+        started = time.monotonic()
+        try:
+            self.queue.put_nowait((hostname, item))
+        except queue.Full:
+            try:
+                self.queue.put((hostname, item), timeout=self.put_timeout)
+            except queue.Full:
+                with self.lock:
+                    self.rejected += 1
+                    self.blocked_seconds += time.monotonic() - started
+                return False
+            with self.lock:
+                self.blocked_seconds += time.monotonic() - started
+        with self.lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def _collect(self):
+        hostname, item = self.queue.get()
+        batch = {hostname: [item]}
+        count = 1
+        deadline = time.monotonic() + self.batch_window
+        while count < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                hostname, item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.setdefault(hostname, []).append(item)
+            count += 1
+        return batch, count
+
+    def run(self):
+        while True:
+            batch, count = self._collect()
+            started = time.perf_counter()
+            try:
+                self.apply_batch(batch)
+            except Exception as e:
+                with self.lock:
+                    self.errors += 1
+                logger.error(f"შეცდომა ცვლილებების პარტიის გამოყენებისას: {str(e)}")
+            with self.lock:
+                self.batches += 1
+                self.applied += count
+                self.coalesced += count - len(batch)
+                self.last_batch_size = count
+                self.last_batch_seconds = time.perf_counter() - started
+
+    def stats(self):
+        with self.lock:
+            return {
+                'depth': self.queue.qsize(),
+                'capacity': self.maxsize,
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'applied': self.applied,
+                'coalesced': self.coalesced,
+                'batches': self.batches,
+                'errors': self.errors,
+                'last_batch_size': self.last_batch_size,
+                'last_batch_seconds': round(self.last_batch_seconds, 6),
+                'blocked_seconds': round(self.blocked_seconds, 6),
+            }
+
+
+class JoinAdmission:
+    # შეერთებების token bucket: წამში rate შეერთება, ერთდროულად burst-მდე. უარყოფილ აგენტს
+    # ეძლევა შემდეგი თავისუფალი სლოტი, ასე რომ სერვერის გადატვირთვის შემდეგ ისინი თანაბრად ნაწილდებიან
+    def __init__(self, rate=500, burst=1000):
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.next_slot = 0.0
+        self.admitted = 0
+        self.deferred = 0
+        # join_retry-ს არმცოდნე (ძველი) აგენტების გადადებული შეერთებები: key -> item, რიგის მიხედვით
+        self.parked = OrderedDict()
+        # გადადებული შეერთების დროს მოსული ბოლო განახლება: key -> item, release-ისას შეერთებას მოჰყვება
+        self.held = {}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def admit(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.admitted += 1
+                return True, 0.0
+            self.next_slot = max(self.next_slot, now) + 1 / self.rate
+            self.deferred += 1
+            return False, self.next_slot - now
+
+    def park(self, key, item):
+        # შეერთებას სერვერი თავად დაუშვებს, როცა სლოტი გათავისუფლდება (release)
+        with self.lock:
+            self.parked.pop(key, None)
+            self.parked[key] = item
+
+    def unpark(self, key):
+        with self.lock:
+            self.parked.pop(key, None)
+            self.held.pop(key, None)
+
+    def hold(self, key, item):
+        # False - key-ს შეერთება გადადებული არ არის და item ჩვეულებრივად უნდა დამუშავდეს
+        with self.lock:
+            if key not in self.parked:
+                return False
+            self.held[key] = item
+            return True
+
+    def release(self, now=None):
+        # გადადებული შეერთებები, რომლებსაც ახლა სლოტი ეკუთვნის: [(key, item, held)], held - შენახული
+        # განახლება ან None
+        now = time.monotonic() if now is None else now
+        released = []
+        with self.lock:
+            self._refill(now)
+            while self.parked and self.tokens >= 1:
+                self.tokens -= 1
+                self.admitted += 1
+                key, item = self.parked.popitem(last=False)
+                released.append((key, item, self.held.pop(key, None)))
+        return released
+
+    def stats(self):
+        with self.lock:
+            return {'admitted': self.admitted, 'deferred': self.deferred, 'tokens': round(self.tokens, 1),
+                    'parked': len(self.parked), 'held': len(self.held)}
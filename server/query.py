@@ -0,0 +1,225 @@
+import base64
+import fnmatch
+import ipaddress
+import json
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+RANGE_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+SORT_FIELDS = ('hostname', 'status') + RANGE_METRICS
+MAX_LIMIT = 1000
+
+
+def encode_cursor(key, hostname):
+    return base64.urlsafe_b64encode(json.dumps([key, hostname]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        key, hostname = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return key, hostname
+    except (ValueError, TypeError):
+        raise ValueError("არასწორი cursor")
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def parse_ip(value):
+    try:
+        return int(ipaddress.ip_address(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class FleetIndex:
+    # რეესტრის მეორადი ინდექსები: hostname (დალაგებული სია + trigram-ები), status, color, os,
+    # IP (დალაგებული მთელ რიცხვებად) და მეტრიკები (დალაგებული (value, hostname) სიები)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+        self.hostnames = []
+        self.trigrams = {}
+        self.by_status = {}
+        self.by_color = {}
+        self.by_os = {}
+        self.by_ip = []
+        self.by_metric = {metric: [] for metric in RANGE_METRICS}
+
+    @staticmethod
+    def _metric(data, metric):
+        value = data.get('dynamic', {}).get(metric)
+        return float(value) if isinstance(value, (int, float)) else None
+
+    def _unindex(self, hostname):
+        entry = self.hosts.pop(hostname, None)
+        if entry is None:
+            return
+        self.hostnames.pop(bisect_left(self.hostnames, hostname))
+        for gram in trigrams(hostname.lower()):
+            names = self.trigrams.get(gram)
+            names.discard(hostname)
+            if not names:
+                del self.trigrams[gram]
+        for index, key in ((self.by_status, 'status'), (self.by_color, 'color'), (self.by_os, 'os')):
+            names = index.get(entry[key])
+            names.discard(hostname)
+            if not names:
+                del index[entry[key]]
+        if entry['ip'] is not None:
+            self.by_ip.pop(bisect_left(self.by_ip, (entry['ip'], hostname)))
+        for metric in RANGE_METRICS:
+            if entry[metric] is not None:
+                values = self.by_metric[metric]
+                values.pop(bisect_left(values, (entry[metric], hostname)))
+
+    def _index(self, hostname, entry):
+        self.hosts[hostname] = entry
+        insort(self.hostnames, hostname)
+        for gram in trigrams(hostname.lower()):
+            self.trigrams.setdefault(gram, set()).add(hostname)
+        for index, key in ((self.by_status, 'status'), (self.by_color, 'color'), (self.by_os, 'os')):
+            index.setdefault(entry[key], set()).add(hostname)
+        if entry['ip'] is not None:
+            insort(self.by_ip, (entry['ip'], hostname))
+        for metric in RANGE_METRICS:
+            if entry[metric] is not None:
+                insort(self.by_metric[metric], (entry[metric], hostname))
+
+    def update(self, hostname, data, status, color):
+        entry = {
+            'status': status,
+            'color': color,
+            'os': (data.get('static', {}).get('os') or '').lower(),
+            'ip': parse_ip(data.get('static', {}).get('ip_address')),
+        }
+        for metric in RANGE_METRICS:
+            entry[metric] = self._metric(data, metric)
+        with self.lock:
+            if self.hosts.get(hostname) == entry:
+                return
+            self._unindex(hostname)
+            self._index(hostname, entry)
+
+    def set_status(self, hostname, status):
+        with self.lock:
+            entry = self.hosts.get(hostname)
+            if entry is None or entry['status'] == status:
+                return
+            self._unindex(hostname)
+            self._index(hostname, dict(entry, status=status))
+
+    def remove(self, hostname):
+        with self.lock:
+            self._unindex(hostname)
+
+    def _candidates(self, filters):
+        # თითოეული ფილტრი ინდექსიდან იძლევა სიმრავლეს; None ნიშნავს "შეზღუდვა არ არის"
+        sets = []
+        q = (filters.get('q') or '').lower()
+        if q:
+            if len(q) >= 3:
+                grams = sorted((self.trigrams.get(gram, set()) for gram in trigrams(q)), key=len)
+                names = set.intersection(*grams) if grams else set()
+            else:
+                names = self.hostnames
+            sets.append({name for name in names if q in name.lower()})
+        prefix = filters.get('prefix')
+        if prefix:
+            start = bisect_left(self.hostnames, prefix)
+            end = bisect_left(self.hostnames, prefix + '\U0010ffff')
+            sets.append(set(self.hostnames[start:end]))
+        for key, index in (('status', self.by_status), ('color', self.by_color), ('os', self.by_os)):
+            values = filters.get(key)
+            if values:
+                sets.append(set().union(*(index.get(value.lower(), set()) for value in values)))
+        subnet = filters.get('subnet')
+        if subnet:
+            network = ipaddress.ip_network(subnet, strict=False)
+            start = bisect_left(self.by_ip, (int(network.network_address), ''))
+            end = bisect_right(self.by_ip, (int(network.broadcast_address), '\U0010ffff'))
+            sets.append({hostname for _, hostname in self.by_ip[start:end]})
+        for metric in RANGE_METRICS:
+            low, high = filters.get(f'{metric}_min'), filters.get(f'{metric}_max')
+            if low is None and high is None:
+                continue
+            values = self.by_metric[metric]
+            start = 0 if low is None else bisect_left(values, (low, ''))
+            end = len(values) if high is None else bisect_right(values, (high, '\U0010ffff'))
+            sets.append({hostname for _, hostname in values[start:end]})
+
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set.intersection(*sets)
+
+    def select(self, hostnames=None, statuses=None, pattern=None):
+        # ბრძანებების სელექტორი: hostname-ების სია, სტატუსები და/ან glob შაბლონი (მაგ. 'LAB1-*')
+        with self.lock:
+            if hostnames is not None:
+                selected = {hostname for hostname in hostnames if hostname in self.hosts}
+            else:
+                selected = None
+            if statuses:
+                names = set().union(*(self.by_status.get(status.lower(), set()) for status in statuses))
+                selected = names if selected is None else selected & names
+            if pattern:
+                # შაბლონის პირველი wildcard-მდე ნაწილი დალაგებულ სიაში ვიწროვებს ძებნას
+                literal = re.split(r'[*?\[]', pattern, 1)[0]
+                start = bisect_left(self.hostnames, literal)
+                end = bisect_left(self.hostnames, literal + '\U0010ffff')
+                names = {name for name in self.hostnames[start:end] if fnmatch.fnmatchcase(name, pattern)}
+                selected = names if selected is None else selected & names
+        return sorted(selected or ())
+
+    def _sort_key(self, hostname, field):
+        if field == 'hostname':
+            return hostname
+        value = self.hosts[hostname][field]
+        return -1 if value is None else value
+
+    def search(self, filters, sort='hostname', limit=100, cursor=None):
+        descending = sort.startswith('-')
+        field = sort.lstrip('-')
+        if field not in SORT_FIELDS:
+            raise ValueError(f"დალაგება შეუძლებელია ველით: {field}")
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        with self.lock:
+            matches = self._candidates(filters)
+            if matches is None and field == 'hostname' and not descending:
+                # ფილტრის გარეშე hostname-ით დალაგება პირდაპირ ინდექსიდან, სრული სორტირების გარეშე
+                start = 0 if cursor is None else bisect_right(self.hostnames, decode_cursor(cursor)[1])
+                page = self.hostnames[start:start + limit + 1]
+                total = len(self.hostnames)
+                keys = [(hostname, hostname) for hostname in page]
+            else:
+                names = self.hosts.keys() if matches is None else matches
+                keys = sorted(((self._sort_key(hostname, field), hostname) for hostname in names),
+                              reverse=descending)
+                total = len(keys)
+                if cursor is not None:
+                    after = tuple(decode_cursor(cursor))
+                    keys = [key for key in keys if (key < after if descending else key > after)]
+                keys = keys[:limit + 1]
+
+        next_cursor = encode_cursor(*keys[limit - 1]) if len(keys) > limit else None
+        return [hostname for _, hostname in keys[:limit]], total, next_cursor
+
+
+def project(hostname, data, fields):
+    # fields: 'hostname', 'status', 'static.os', 'dynamic.cpu_usage', ან მთელი 'static'/'dynamic'
+    if not fields:
+        return dict(data, hostname=hostname)
+    item = {}
+    for field in fields:
+        if field == 'hostname':
+            item['hostname'] = hostname
+        elif '.' in field:
+            section, key = field.split('.', 1)
+            item.setdefault(section, {})[key] = data.get(section, {}).get(key)
+        else:
+            item[field] = data.get(field)
+    return item
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from utils import load_data, save_data
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+def diff_record(old, new):
+    # ერთი დონის სიღრმის განსხვავება: მხოლოდ შეცვლილი ველები, წაშლილი ველები - None
+    if not old:
+        return new
+    patch = {}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            changed = {k: v for k, v in value.items() if old_value.get(k) != v}
+            changed.update({k: None for k in old_value if k not in value})
+            if changed:
+                patch[key] = changed
+        elif old_value != value:
+            patch[key] = value
+    patch.update({key: None for key in old if key not in new})
+    return patch
+
+
+class Registry:
+    # კომპიუტერების რეესტრი მეხსიერებაში: წაკითხვა ხდება მეხსიერებიდან,
+    # ყოველი ცვლილება ემატება ჟურნალს, ჟურნალი პერიოდულად იკუმშება snapshot-ში
+    def __init__(self, snapshot_file, journal_file, fsync_policy='interval', fsync_interval=1.0,
+                 compact_interval=300, compact_max_entries=10000, delta_history=5000):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"უცნობი fsync პოლიტიკა: {fsync_policy}")
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.compact_interval = compact_interval
+        self.compact_max_entries = compact_max_entries
+        self.lock = threading.RLock()
+        self.computers = {}
+        # seq იზრდება ყოველ ცვლილებაზე; epoch იცვლება გადატვირთვისას, რომ დაფამ სრული resync მოითხოვოს
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        # hostname -> ბოლო ცვლილების seq (ჰოსტის ETag-ისთვის)
+        self.versions = {}
+        self.changes = deque(maxlen=delta_history)
+        self._journal = None
+        self._journal_entries = 0
+        self._dirty = False
+        self._batch_depth = 0
+        self._last_fsync = time.monotonic()
+        self._last_compact = time.monotonic()
+
+    def load(self):
+        with self.lock:
+            try:
+                computers = load_data(self.snapshot_file, strict=True)
+            except json.JSONDecodeError:
+                # დაზიანებულ snapshot-ს არ ვაქრობთ compact-ით - ვინახავთ გვერდზე ხელით აღსადგენად
+                corrupt_file = f"{self.snapshot_file}.corrupt-{int(time.time())}"
+                os.replace(self.snapshot_file, corrupt_file)
+                logger.error(f"snapshot დაზიანებულია, გადატანილია: {corrupt_file}")
+                computers = {}
+            replayed = 0
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # ავარიის შემდეგ ბოლო ჩანაწერი შეიძლება ნახევრად იყოს ჩაწერილი
+                            logger.warning(f"ჟურნალში დაზიანებული ჩანაწერი გამოტოვებულია: {self.journal_file}")
+                            break
+                        self._apply(computers, entry)
+                        replayed += 1
+
+            self.computers = {hostname: data for hostname, data in computers.items()
+                              if hostname and isinstance(data, dict)}
+            logger.info(f"რეესტრი ჩაიტვირთა: {len(self.computers)} კომპიუტერი, {replayed} ჟურნალის ჩანაწერი")
+            self.compact()
+            return self.snapshot()
+
+    @staticmethod
+    def _apply(computers, entry):
+        op = entry.get('op')
+        hostname = entry.get('hostname')
+        if not hostname:
+            return
+        if op == 'put':
+            computers[hostname] = entry.get('data', {})
+        elif op == 'delete':
+            computers.pop(hostname, None)
+
+    def _append(self, entry):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._journal_entries += 1
+        if self._batch_depth:
+            self._dirty = True
+            return
+        self._flush_journal()
+
+    def _flush_journal(self):
+        if self.fsync_policy == 'never':
+            self._dirty = True
+            return
+        self._journal.flush()
+        if self.fsync_policy == 'always':
+            os.fsync(self._journal.fileno())
+            self._dirty = False
+        else:
+            self._dirty = True
+
+    @contextmanager
+    def batch(self):
+        # პარტიის ყველა ჩანაწერი ჟურნალში იწერება ერთი flush/fsync-ით
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty and self._journal is not None:
+                    self._flush_journal()
+
+    @contextmanager
+    def savepoint(self):
+        # ერთი ჰოსტის ცვლილებები პარტიის შიგნით; put/delete მეხსიერებაში ატომურია, ამიტომ აქ დასაბრუნებელი არაფერია
+        with self.lock:
+            yield self
+
+    def __contains__(self, hostname):
+        return hostname in self.computers
+
+    def __len__(self):
+        return len(self.computers)
+
+    def get(self, hostname):
+        with self.lock:
+            data = self.computers.get(hostname)
+            if data is None:
+                return None
+            return {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+
+    def snapshot(self):
+        # ჩანაწერები არასოდეს იცვლება ადგილზე (put ცვლის მთლიანად), ამიტომ ზედაპირული ასლი საკმარისია
+        with self.lock:
+            return {hostname: dict(data) for hostname, data in self.computers.items()}
+
+    def _record_change(self, hostname, patch):
+        self.seq += 1
+        if patch is None:
+            self.versions.pop(hostname, None)
+        else:
+            self.versions[hostname] = self.seq
+        change = (self.seq, hostname, patch)
+        self.changes.append(change)
+        return change
+
+    def put(self, hostname, data):
+        with self.lock:
+            patch = diff_record(self.computers.get(hostname), data)
+            self.computers[hostname] = data
+            self._append({'op': 'put', 'hostname': hostname, 'data': data})
+            return self._record_change(hostname, patch)
+
+    def delete(self, hostname):
+        with self.lock:
+            if hostname not in self.computers:
+                return None
+            del self.computers[hostname]
+            self._append({'op': 'delete', 'hostname': hostname})
+            return self._record_change(hostname, None)
+
+    def changes_since(self, seq):
+        # None ნიშნავს, რომ საჭირო ცვლილებები აღარ ინახება და სრული snapshot უნდა გაიგზავნოს
+        with self.lock:
+            if seq >= self.seq:
+                return []
+            if not self.changes or seq < self.changes[0][0] - 1:
+                return None
+            return [change for change in self.changes if change[0] > seq]
+
+    def version(self, hostname=None):
+        # (epoch, seq) მთელი რეესტრისთვის ან ჰოსტის ბოლო ცვლილებისთვის; ჩატვირთვის შემდეგ შეუცვლელ ჰოსტს - 0
+        with self.lock:
+            if hostname is None:
+                return self.epoch, self.seq
+            return self.epoch, self.versions.get(hostname, 0)
+
+    def hostnames(self):
+        with self.lock:
+            return sorted(self.computers)
+
+    def versioned_snapshot(self):
+        with self.lock:
+            return self.epoch, self.seq, self.snapshot()
+
+    def sync(self):
+        with self.lock:
+            if self._journal is None or not self._dirty:
+                return
+            self._journal.flush()
+            if self.fsync_policy != 'never':
+                os.fsync(self._journal.fileno())
+            self._dirty = False
+            self._last_fsync = time.monotonic()
+
+    def compact(self):
+        with self.lock:
+            save_data(self.snapshot_file, self.computers)
+            if self._journal is not None:
+                self._journal.close()
+            # snapshot უკვე შეიცავს ყველა ცვლილებას, ამიტომ ჟურნალი თავიდან იწყება
+            self._journal = open(self.journal_file, 'w', encoding='utf-8')
+            self._journal_entries = 0
+            self._dirty = False
+            self._last_compact = time.monotonic()
+
+    def maintain(self):
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            self.sync()
+        if self._journal_entries and (self._journal_entries >= self.compact_max_entries
+                                      or now - self._last_compact >= self.compact_interval):
+            self.compact()
+            logger.info(f"რეესტრის ჟურნალი შეიკუმშა: {self.snapshot_file}")
+
+    def close(self):
+        with self.lock:
+            if self._journal_entries:
+                self.compact()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
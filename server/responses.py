@@ -0,0 +1,93 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli არასავალდებულოა - მის გარეშე მხოლოდ gzip
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain')
+# უპირატესობის მიხედვით
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_FIELDS = ('hostname', 'status', 'color', 'static.os', 'static.ip_address', 'static.anydesk_id',
+                 'dynamic.cpu_usage', 'dynamic.memory_usage', 'dynamic.disk_usage', 'dynamic.network_usage',
+                 'dynamic.last_update')
+# სტრიმის ჩანაწერები ამ ზომამდე გროვდება ერთ chunk-ად
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def negotiate_encoding(accept_encodings):
+    # accept_encodings - werkzeug-ის request.accept_encodings
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def compress_stream(chunks, encoding):
+    # ნაკადი იკუმშება chunk-ებად, ისე რომ მთლიანი პასუხი მეხსიერებაში არასდროს იკრიბება
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        flush = compressor.finish
+        process = compressor.process
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        flush = compressor.flush
+        process = compressor.compress
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield flush()
+
+
+def should_compress(response):
+    return (not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_TYPES
+            and (response.content_length or 0) >= COMPRESS_MIN_BYTES)
+
+
+def flatten(item, fields):
+    # query.project-ის შედეგი ერთ დონეზე: {'static': {'os': ...}} -> {'static.os': ...}
+    row = {}
+    for field in fields:
+        if '.' in field:
+            section, key = field.split('.', 1)
+            row[field] = item.get(section, {}).get(key)
+        else:
+            row[field] = item.get(field)
+    return row
+
+
+def export_rows(rows, fmt, fields):
+    # rows - (hostname, item) გენერატორი; ბრუნდება ბაიტების chunk-ები
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+    for item in rows:
+        if writer is not None:
+            writer.writerow(flatten(item, fields))
+        else:
+            buffer.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+            buffer.write('\n')
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import socketio
+
+from registry import Registry, diff_record
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS computers (hostname TEXT PRIMARY KEY, data TEXT NOT NULL, seq INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, hostname TEXT NOT NULL, data TEXT, patch TEXT, worker INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS agents (
+    hostname TEXT PRIMARY KEY, worker INTEGER NOT NULL, codec TEXT, connected_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS command_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, hostname TEXT NOT NULL, state TEXT NOT NULL,
+    message TEXT, created_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS command_results_job ON command_results (job_id);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, body TEXT NOT NULL, created_at REAL NOT NULL);
+'''
+
+
+def open_database(filename):
+    # autocommit რეჟიმი: ტრანზაქციებს BEGIN IMMEDIATE-ით ვხსნით ხელით
+    db = sqlite3.connect(filename, timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+class SqliteRegistry(Registry):
+    # რეესტრი რამდენიმე worker პროცესისთვის: ჩანაწერები და ცვლილებების ჟურნალი საერთო SQLite ფაილშია (WAL).
+    # თითო პროცესი მეხსიერებაში ინახავს ასლს, რომელიც follow()-ით მიჰყვება ჟურნალს seq-ის რიგით, ასე რომ
+    # snapshot/changes_since ყველა worker-ზე ერთნაირ, უწყვეტ seq-ებს აძლევს დაფებს
+    def __init__(self, filename, worker_id, snapshot_file=None, journal_file=None, compact_interval=300,
+                 delta_history=5000, retention=50000):
+        super().__init__(snapshot_file, journal_file, compact_interval=compact_interval, delta_history=delta_history)
+        self.filename = filename
+        self.worker_id = worker_id
+        self.retention = retention
+        self.db = open_database(filename)
+        self.db.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('epoch', self.epoch))
+        self.epoch = self.db.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+        # ამ worker-ის ჩაწერილი, მაგრამ follow()-ით ჯერ არ წაკითხული ჩანაწერები: hostname -> (seq, data, patch)
+        self.pending = {}
+        self.uncommitted = {}
+
+    def _import_snapshot(self):
+        # ერთპროცესიანი რეჟიმის snapshot + ჟურნალი გადადის ბაზაში მხოლოდ ერთხელ (meta.imported იმავე
+        # ტრანზაქციით იწერება). თითო ჰოსტს ეწერება changes ჩანაწერი, რომ უკვე გაშვებულმა worker-ებმა
+        # ის follow()-ით მიიღონ
+        if self.db.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+            return
+        computers = {}
+        if self.snapshot_file and os.path.exists(self.snapshot_file):
+            legacy = Registry(self.snapshot_file, self.journal_file)
+            computers = legacy.load()
+            legacy.close()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            if self.db.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+                computers = {}
+            elif self.db.execute('SELECT COUNT(*) FROM computers').fetchone()[0]:
+                # ბაზა უკვე შევსებულია (მაგ. ამ ალამამდე შექმნილი) - იმპორტი აღარ ხდება
+                computers = {}
+            for hostname, data in computers.items():
+                body = json.dumps(data, separators=(',', ':'))
+                seq = self.db.execute('INSERT INTO changes (hostname, data, patch, worker) VALUES (?, ?, ?, ?)',
+                                      (hostname, body, body, self.worker_id)).lastrowid
+                self.db.execute('INSERT INTO computers (hostname, data, seq) VALUES (?, ?, ?)', (hostname, body, seq))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported', ?)", (str(time.time()),))
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        if computers:
+            logger.info(f"საერთო მდგომარეობაში გადატანილია {len(computers)} კომპიუტერი: {self.snapshot_file}")
+
+    def _read(self):
+        # ჩანაწერები და ბოლო seq ერთი წაკითხვის ტრანზაქციით, რომ ერთმანეთს შეესაბამებოდეს
+        self.db.execute('BEGIN')
+        try:
+            computers = {hostname: json.loads(data) for hostname, data in
+                         self.db.execute('SELECT hostname, data FROM computers')}
+            row = self.db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        finally:
+            self.db.execute('COMMIT')
+        self.computers = computers
+        self.seq = row[0] if row else 0
+        self.changes.clear()
+        self.versions.clear()
+        self.pending = {hostname: entry for hostname, entry in self.pending.items() if entry[0] > self.seq}
+
+    def load(self):
+        with self.lock:
+            self._import_snapshot()
+            self._read()
+            logger.info(f"რეესტრი ჩაიტვირთა საერთო მდგომარეობიდან: {len(self.computers)} კომპიუტერი, seq {self.seq}")
+            return self.snapshot()
+
+    def reload(self):
+        # follow() ვერ აგრძელებს (ჟურნალის საჭირო ნაწილი უკვე წაიშალა) - ასლი თავიდან იკითხება
+        with self.lock:
+            self._read()
+            return self.snapshot()
+
+    @contextmanager
+    def batch(self):
+        # პარტია ერთი ტრანზაქციაა: სხვა worker-ები მას ან მთლიანად ხედავენ, ან საერთოდ ვერ
+        with self.lock:
+            self._batch_depth += 1
+            if self._batch_depth == 1:
+                self.db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    self.db.execute('ROLLBACK')
+                    self.uncommitted.clear()
+                raise
+            else:
+                if self._batch_depth == 1:
+                    self.db.execute('COMMIT')
+                    self.pending.update(self.uncommitted)
+                    self.uncommitted.clear()
+            finally:
+                self._batch_depth -= 1
+
+    @contextmanager
+    def savepoint(self):
+        # შეცდომისას უქმდება მხოლოდ ამ ჰოსტის ჩანაწერები და არა მთელი პარტია
+        with self.lock:
+            if not self._batch_depth:
+                with self.batch():
+                    yield self
+                return
+            uncommitted = dict(self.uncommitted)
+            self.db.execute('SAVEPOINT host')
+            try:
+                yield self
+            except BaseException:
+                self.db.execute('ROLLBACK TO host')
+                self.db.execute('RELEASE host')
+                self.uncommitted = uncommitted
+                raise
+            self.db.execute('RELEASE host')
+
+    def _current(self, hostname):
+        for overlay in (self.uncommitted, self.pending):
+            entry = overlay.get(hostname)
+            if entry is not None:
+                return entry[1]
+        return self.computers.get(hostname)
+
+    def _write(self, hostname, data, patch):
+        with self.batch():
+            body = None if data is None else json.dumps(data, separators=(',', ':'))
+            cursor = self.db.execute(
+                'INSERT INTO changes (hostname, data, patch, worker) VALUES (?, ?, ?, ?)',
+                (hostname, body, None if patch is None else json.dumps(patch, separators=(',', ':')), self.worker_id))
+            seq = cursor.lastrowid
+            if data is None:
+                self.db.execute('DELETE FROM computers WHERE hostname = ?', (hostname,))
+            else:
+                self.db.execute('INSERT INTO computers (hostname, data, seq) VALUES (?, ?, ?) '
+                                'ON CONFLICT (hostname) DO UPDATE SET data = excluded.data, seq = excluded.seq',
+                                (hostname, body, seq))
+            self.uncommitted[hostname] = (seq, data, patch)
+        return seq, hostname, patch
+
+    def __contains__(self, hostname):
+        with self.lock:
+            return self._current(hostname) is not None
+
+    def get(self, hostname):
+        with self.lock:
+            data = self._current(hostname)
+            if data is None:
+                return None
+            return {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+
+    def put(self, hostname, data):
+        with self.lock:
+            return self._write(hostname, data, diff_record(self._current(hostname), data))
+
+    def delete(self, hostname):
+        with self.lock:
+            if self._current(hostname) is None:
+                return None
+            return self._write(hostname, None, None)
+
+    def version(self, hostname=None):
+        with self.lock:
+            entry = self.pending.get(hostname) if hostname is not None else None
+            if entry is not None:
+                return self.epoch, entry[0]
+            return super().version(hostname)
+
+    def follow(self, limit=5000):
+        # ჟურნალის ახალი ჩანაწერები seq-ის რიგით: [(change, data, local)]; None - ასლი reload()-ით უნდა განახლდეს
+        with self.lock:
+            rows = self.db.execute('SELECT seq, hostname, data, patch, worker FROM changes WHERE seq > ? '
+                                   'ORDER BY seq LIMIT ?', (self.seq, limit)).fetchall()
+            if rows and rows[0][0] != self.seq + 1:
+                return None
+            followed = []
+            for seq, hostname, body, patch, worker in rows:
+                local = worker == self.worker_id
+                entry = self.pending.get(hostname) if local else None
+                if entry is not None and entry[0] == seq:
+                    # საკუთარი ჩანაწერი უკვე მეხსიერებაშია - JSON-ის ხელახლა გარჩევა არ სჭირდება
+                    del self.pending[hostname]
+                    data, patch = entry[1], entry[2]
+                else:
+                    data = None if body is None else json.loads(body)
+                    patch = None if patch is None else json.loads(patch)
+                if data is None:
+                    self.computers.pop(hostname, None)
+                    self.versions.pop(hostname, None)
+                else:
+                    self.computers[hostname] = data
+                    self.versions[hostname] = seq
+                change = (seq, hostname, patch)
+                self.changes.append(change)
+                self.seq = seq
+                followed.append((change, data, local))
+            return followed
+
+    def sync(self):
+        # WAL-ში commit-ი უკვე ჩაწერილია; ცალკე fsync საჭირო არ არის
+        pass
+
+    def compact(self):
+        # ჟურნალის ძველი ჩანაწერები იშლება; retention-ზე უფრო ჩამორჩენილი worker-ი reload()-ს აკეთებს
+        with self.lock:
+            self.db.execute('DELETE FROM changes WHERE seq <= ?', (self.seq - self.retention,))
+            self._last_compact = time.monotonic()
+
+    def maintain(self):
+        if time.monotonic() - self._last_compact >= self.compact_interval:
+            self.compact()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class SharedState:
+    # worker-ებს შორის გაზიარებული დამხმარე მდგომარეობა: სად არის დაკავშირებული აგენტი
+    # (ბრძანების სხვა worker-ზე მისაწოდებლად) და სხვა worker-ზე მიღებული ბრძანებების ack/result-ები
+    def __init__(self, filename, worker_id, result_retention=3600):
+        self.worker_id = worker_id
+        self.result_retention = result_retention
+        self.lock = threading.Lock()
+        self.db = open_database(filename)
+        self.last_maintenance = time.monotonic()
+
+    def clear_worker(self):
+        # გადატვირთული worker-ის ძველი კავშირები
+        with self.lock:
+            self.db.execute('DELETE FROM agents WHERE worker = ?', (self.worker_id,))
+
+    def register_agent(self, hostname, codec):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO agents (hostname, worker, codec, connected_at) VALUES (?, ?, ?, ?)',
+                            (hostname, self.worker_id, codec, time.time()))
+
+    def unregister_agent(self, hostname):
+        # აგენტი შეიძლება უკვე სხვა worker-ზე იყოს გადასული - იშლება მხოლოდ ამ worker-ის ჩანაწერი
+        with self.lock:
+            self.db.execute('DELETE FROM agents WHERE hostname = ? AND worker = ?', (hostname, self.worker_id))
+
+    def agent(self, hostname):
+        with self.lock:
+            row = self.db.execute('SELECT worker, codec FROM agents WHERE hostname = ?', (hostname,)).fetchone()
+        return {'worker': row[0], 'codec': row[1]} if row else None
+
+    def push_command_result(self, job_id, hostname, state, message=None):
+        with self.lock:
+            self.db.execute('INSERT INTO command_results (job_id, hostname, state, message, created_at) '
+                            'VALUES (?, ?, ?, ?, ?)', (job_id, hostname, state, message, time.time()))
+
+    def pop_command_results(self, job_id):
+        with self.lock:
+            rows = self.db.execute('SELECT id, hostname, state, message FROM command_results WHERE job_id = ? '
+                                   'ORDER BY id', (job_id,)).fetchall()
+            if rows:
+                self.db.execute('DELETE FROM command_results WHERE job_id = ? AND id <= ?', (job_id, rows[-1][0]))
+        return [(hostname, state, message) for _, hostname, state, message in rows]
+
+    def maintain(self, interval=60):
+        if time.monotonic() - self.last_maintenance < interval:
+            return
+        with self.lock:
+            self.db.execute('DELETE FROM command_results WHERE created_at < ?', (time.time() - self.result_retention,))
+        self.last_maintenance = time.monotonic()
+
+
+class SqliteQueueManager(socketio.PubSubManager):
+    # Socket.IO-ს შეტყობინებების რიგი SQLite ცხრილზე - ლოკალური ჩამნაცვლებელი Redis/Kombu-სთვის.
+    # თითო worker შეტყობინებას წერს messages ცხრილში და poll_interval-ით კითხულობს ახალ ჩანაწერებს
+    name = 'sqlite'
+
+    def __init__(self, url='sqlite:///state.db', channel='flask-socketio', write_only=False, logger=None,
+                 poll_interval=0.01, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.filename = url.split('://', 1)[1]
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.lock = threading.Lock()
+        self.db = open_database(self.filename)
+        # მხოლოდ გაშვების შემდეგ გამოქვეყნებული შეტყობინებები
+        self.last_id = self.db.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+
+    def _publish(self, data):
+        with self.lock:
+            self.db.execute('INSERT INTO messages (channel, body, created_at) VALUES (?, ?, ?)',
+                            (self.channel, self.json.dumps(data), time.time()))
+
+    def _listen(self):
+        db = open_database(self.filename)
+        last_cleanup = time.monotonic()
+        while True:
+            rows = db.execute('SELECT id, body FROM messages WHERE id > ? AND channel = ? ORDER BY id',
+                              (self.last_id, self.channel)).fetchall()
+            for message_id, body in rows:
+                self.last_id = message_id
+                yield body
+            if time.monotonic() - last_cleanup >= self.retention:
+                db.execute('DELETE FROM messages WHERE created_at < ?', (time.time() - self.retention,))
+                last_cleanup = time.monotonic()
+            if not rows:
+                self.server.sleep(self.poll_interval)
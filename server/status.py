@@ -0,0 +1,141 @@
+import heapq
+import threading
+import time
+import uuid
+from datetime import datetime
+
+ONLINE_WINDOW = 5 * 60
+IDLE_WINDOW = 60 * 60
+
+
+def cpu_color(cpu_usage):
+    cpu_usage = cpu_usage or 0
+    return 'green' if cpu_usage < 50 else 'yellow' if cpu_usage < 80 else 'red'
+
+
+def parse_last_update(data):
+    try:
+        return datetime.fromisoformat(data.get('dynamic', {}).get('last_update', '')).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class StatusIndex:
+    # ჰოსტების სტატუსი და ფერი ითვლება მხოლოდ განახლებისას; online -> idle -> offline
+    # გადასვლებს ვადების heap ამუშავებს, ასე რომ სიის მოთხოვნა აღარ გადაითვლის მთელ ფლოტს
+    def __init__(self, online_window=ONLINE_WINDOW, idle_window=IDLE_WINDOW):
+        self.online_window = online_window
+        self.idle_window = idle_window
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.deadlines = []
+        # იზრდება ყოველ გადასვლაზე, რომელიც რეესტრის seq-ს არ ცვლის (სიის ETag-ისთვის)
+        self.version = 0
+        # დაფის resync-ისთვის: token (პროცესის id + version) და hostname -> ბოლო გადასვლის version
+        self.instance = uuid.uuid4().hex[:8]
+        self.changed = {}
+
+    def _status_for(self, last_seen, now):
+        if last_seen is None:
+            return 'offline'
+        age = now - last_seen
+        if age <= self.online_window:
+            return 'online'
+        if age <= self.idle_window:
+            return 'idle'
+        return 'offline'
+
+    def _next_deadline(self, last_seen, now):
+        # შემდეგი საზღვარი ბოლო განახლებიდან (online -> idle ან idle -> offline)
+        if last_seen is None:
+            return None
+        for window in (self.online_window, self.idle_window):
+            deadline = last_seen + window
+            if deadline > now:
+                return deadline
+        return None
+
+    def _schedule(self, hostname, entry, deadline):
+        # entry['deadline'] - ჰოსტის მოქმედი ვადა; heap-ის სხვა ჩანაწერები მოძველებულია და expire-ისას გამოიტოვება
+        entry['deadline'] = deadline
+        if deadline is not None:
+            heapq.heappush(self.deadlines, (deadline, hostname))
+
+    def update(self, hostname, data, now=None):
+        now = time.time() if now is None else now
+        last_seen = parse_last_update(data)
+        entry = {
+            'status': self._status_for(last_seen, now),
+            'color': cpu_color(data.get('dynamic', {}).get('cpu_usage')),
+            'last_seen': last_seen,
+            'deadline': None,
+        }
+        deadline = self._next_deadline(last_seen, now)
+        with self.lock:
+            previous = self.entries.get(hostname)
+            self.entries[hostname] = entry
+            if (previous is not None and previous['deadline'] is not None
+                    and deadline is not None and previous['deadline'] <= deadline):
+                # უფრო ადრეული ვადა უკვე heap-შია: ამოვარდნისას ახალი last_seen-ით გადაიგეგმება
+                entry['deadline'] = previous['deadline']
+            else:
+                # მაგ. idle ჰოსტი დაბრუნდა online-ში - მისი online ვადა ძველ idle ვადაზე ადრეა
+                self._schedule(hostname, entry, deadline)
+        return entry['status'], entry['color']
+
+    def remove(self, hostname):
+        # heap-ში დარჩენილი ვადები expire-ისას გამოიტოვება
+        with self.lock:
+            self.entries.pop(hostname, None)
+            self.changed.pop(hostname, None)
+
+    def get(self, hostname):
+        with self.lock:
+            entry = self.entries.get(hostname)
+            if entry is None:
+                return 'offline', cpu_color(None)
+            return entry['status'], entry['color']
+
+    def _token(self):
+        return f'{self.instance}.{self.version}'
+
+    def token(self):
+        with self.lock:
+            return self._token()
+
+    def changes_since(self, token):
+        # გადასვლები, რომლებიც token-ის შემდეგ მოხდა; სხვა პროცესის ან უცნობი token-ისას - ყველა ჰოსტის სტატუსი
+        with self.lock:
+            instance, _, version = (token or '').partition('.')
+            if instance == self.instance and version.isdigit():
+                since = int(version)
+                hostnames = [hostname for hostname, changed in self.changed.items() if changed > since]
+            else:
+                hostnames = list(self.entries)
+            current = self._token()
+            return [{'hostname': hostname, 'status': self.entries[hostname]['status'],
+                     'color': self.entries[hostname]['color'], 'status_version': current}
+                    for hostname in hostnames]
+
+    def next_deadline(self):
+        with self.lock:
+            return self.deadlines[0][0] if self.deadlines else None
+
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        transitions = []
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                deadline, hostname = heapq.heappop(self.deadlines)
+                entry = self.entries.get(hostname)
+                if entry is None or entry['deadline'] != deadline:
+                    continue
+                status = self._status_for(entry['last_seen'], now)
+                if status != entry['status']:
+                    entry['status'] = status
+                    self.version += 1
+                    self.changed[hostname] = self.version
+                    transitions.append({'hostname': hostname, 'status': status, 'color': entry['color'],
+                                        'status_version': self._token()})
+                self._schedule(hostname, entry, self._next_deadline(entry['last_seen'], now))
+        return transitions
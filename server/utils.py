@@ -1,20 +1,27 @@
 import json
 import logging
+import os
+import tempfile
 import bcrypt
 import hashlib
 from functools import wraps
 from flask import session, redirect, url_for
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+
+from config import Config
+from metrics import STORAGE_LATENCY, DECRYPT_LATENCY
 
 ENCRYPTION_KEY = b'C5Nk6UxL2R1_F0fSj1U5E5y9I7G6dK1O9O5wX5oW9dY=' # 32 ბაიტიანი გასაღები
 
+# გასაღებების რგოლი იქმნება ერთხელ: პირველი გასაღებით იშიფრება, გაშიფვრისას სცდება ყველა
+keyring = MultiFernet([Fernet(key) for key in Config.ENCRYPTION_KEYS or [ENCRYPTION_KEY]])
+
 def encrypt_data(data):
-    f = Fernet(ENCRYPTION_KEY)
-    return f.encrypt(json.dumps(data).encode()).decode()
+    return keyring.encrypt(json.dumps(data).encode()).decode()
 
+@DECRYPT_LATENCY.timed(format='text')
 def decrypt_data(encrypted_data):
-    f = Fernet(ENCRYPTION_KEY)
-    return json.loads(f.decrypt(encrypted_data.encode()).decode())
+    return json.loads(keyring.decrypt(encrypted_data.encode()).decode())
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +36,8 @@ def login_required(f):
     return decorated_function
 
 
-def load_data(filename):
+@STORAGE_LATENCY.timed(operation='load')
+def load_data(filename, strict=False):
     try:
         with open(filename, 'r') as f:
             return json.load(f)
@@ -38,12 +46,29 @@ def load_data(filename):
         return {}
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON in file: {filename}")
+        if strict:
+            raise
         return {}
 
 
+@STORAGE_LATENCY.timed(operation='save')
 def save_data(filename, data):
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Write to a temp file in the same directory and rename it over the target,
+    # so a crash mid-write leaves the previous file intact
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def hash_password(password):
@@ -64,6 +89,8 @@ def hash_password(password):
 
 
 def check_password(password, stored_hashes):
+    if not stored_hashes:
+        return False
     if not isinstance(stored_hashes, dict):
         # If stored_hashes is not a dict, assume it's a bcrypt hash
         return bcrypt.checkpw(password.encode('utf-8'), stored_hashes.encode('utf-8'))
@@ -0,0 +1,95 @@
+import base64
+import json
+import struct
+import zlib
+
+from utils import keyring, encrypt_data, decrypt_data
+from metrics import DECRYPT_LATENCY
+
+try:
+    import msgpack
+except ImportError:  # msgpack არასავალდებულოა - მის გარეშე კომპაქტური ფორმატი JSON-ს იყენებს
+    msgpack = None
+
+# ბინარული კადრი: 1 ბაიტი flags + Fernet ტოკენი base64-ის გარეშე
+FLAG_MSGPACK = 0x01
+FLAG_ZLIB = 0x02
+COMPRESS_MIN_BYTES = 256
+
+# აგენტის offline spool-ის ჩანაწერი: timestamp, cpu, memory, disk (float32), network (float64)
+SPOOL_FORMAT = 'spool-v1'
+SPOOL_RECORD = struct.Struct('<dfffd')
+BACKFILL_MAX_RECORDS = 5000
+
+# უპირატესობის მიხედვით დალაგებული
+CODECS = ('msgpack+zlib', 'msgpack', 'json+zlib', 'json') if msgpack else ('json+zlib', 'json')
+
+
+def negotiate(offered):
+    # None ნიშნავს ძველ აგენტს, რომელიც მხოლოდ JSON/Fernet ტექსტს იგებს
+    for codec in CODECS:
+        if codec in (offered or ()):
+            return codec
+    return None
+
+
+def encode_frame(data, codec):
+    if codec.startswith('msgpack'):
+        body = msgpack.packb(data, use_bin_type=True)
+        flags = FLAG_MSGPACK
+    else:
+        body = json.dumps(data, separators=(',', ':')).encode()
+        flags = 0
+    if codec.endswith('+zlib') and len(body) >= COMPRESS_MIN_BYTES:
+        body = zlib.compress(body)
+        flags |= FLAG_ZLIB
+    token = keyring.encrypt(body)
+    return bytes([flags]) + base64.urlsafe_b64decode(token)
+
+
+def decode_frame(frame):
+    flags = frame[0]
+    with DECRYPT_LATENCY.time(format='frame'):
+        body = keyring.decrypt(base64.urlsafe_b64encode(bytes(frame[1:])))
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    if flags & FLAG_MSGPACK:
+        if msgpack is None:
+            raise ValueError("მიღებულია msgpack კადრი, მაგრამ msgpack არ არის დაინსტალირებული")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def encode_message(data, codec=None):
+    if codec is None:
+        return encrypt_data(data)
+    return encode_frame(data, codec)
+
+
+def decode_message(payload):
+    # str - ძველი JSON/Fernet ტექსტი, bytes - ბინარული კადრი
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return decode_frame(payload)
+    return decrypt_data(payload)
+
+
+def decode_spool_records(records):
+    # zlib-ით შეკუმშული SPOOL_RECORD-ების მიმდევრობა (bytes, ან base64 ტექსტი JSON-ისთვის)
+    if isinstance(records, str):
+        records = base64.b64decode(records)
+    limit = BACKFILL_MAX_RECORDS * SPOOL_RECORD.size
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(bytes(records), limit)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"backfill-ში {BACKFILL_MAX_RECORDS}-ზე მეტი ჩანაწერია")
+    if len(raw) % SPOOL_RECORD.size:
+        raise ValueError("backfill-ის ჩანაწერები დაზიანებულია")
+    samples = []
+    for timestamp, cpu, memory, disk, network in SPOOL_RECORD.iter_unpack(raw):
+        samples.append((timestamp, {
+            'cpu_usage': round(cpu, 1),
+            'memory_usage': round(memory, 1),
+            'disk_usage': round(disk, 1),
+            'network_usage': int(network),
+        }))
+    return samples
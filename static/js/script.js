@@ -1,11 +1,42 @@
 const socket = io();
 
+// ლოკალური მდგომარეობა, რომელსაც სერვერის delta-ები ანახლებს
+let computers = {};
+let registryEpoch = null;
+let registrySeq = null;
+let statusVersion = null; // idle/offline გადასვლების ვერსია - resync-ისას სერვერი გამოტოვებულებს აგზავნის
+let resyncPending = false;
+let resyncTimer = null;
+const RESYNC_TIMEOUT = 10000; // პასუხის გარეშე resync ამ დროის შემდეგ თავიდან იგზავნება
+let searchTimer = null;
+let activeAlerts = {}; // hostname -> { rule -> ალერტი }
+let searchMatches = null; // null - ფილტრი არ არის, სხვა შემთხვევაში სერვერის მიერ ნაპოვნი hostname-ები
+
+// რენდერი: ბარათები hostname-ით, ეკრანზე მხოლოდ ხილული რიგები, ერთი რენდერი ერთ კადრში
+const CARD_MIN_WIDTH = 250; // .dashboard-grid: minmax(250px, 1fr)
+const GRID_GAP = 15;
+const OVERSCAN_ROWS = 2;
+const cardCache = new Map(); // hostname -> { card, signature }
+let orderedHostnames = null;
+let rowHeight = 320;
+let renderScheduled = false;
+
+const FLEET_SUMMARY_INTERVAL = 10000;
+const FLEET_SUMMARY_QUERY = 'metrics=cpu_usage,memory_usage,disk_usage&group_by=status&percentiles=95&above=90';
+
 document.addEventListener('DOMContentLoaded', () => {
     setupEventListeners();
-    fetchComputers();
     setupSocketListeners();
     applyDarkModeSetting();
-    setInterval(fetchComputers, 30000);
+    // სოკეტი ჯანმრთელია - delta-ები საკმარისია; polling მხოლოდ კავშირის გაწყვეტისას
+    setInterval(() => {
+        if (!socket.connected) fetchComputers();
+    }, 30000);
+    // შეჯამება სერვერზე ქეშირებულია ვერსიით, ამიტომ ბევრი ღია ჩანართიც იაფია
+    fetchFleetSummary();
+    setInterval(() => {
+        if (!document.hidden) fetchFleetSummary();
+    }, FLEET_SUMMARY_INTERVAL);
 });
 
 function setupEventListeners() {
@@ -18,6 +49,8 @@ function setupEventListeners() {
     if (darkModeToggle) darkModeToggle.addEventListener('click', toggleDarkMode);
     if (searchInput) searchInput.addEventListener('input', searchHost);
     if (refreshButton) refreshButton.addEventListener('click', fetchComputers);
+    document.getElementById('bulk-check')?.addEventListener('click', () => bulkCommand('check'));
+    document.getElementById('bulk-restart')?.addEventListener('click', () => bulkCommand('restart'));
 
     if (closeBtn) {
         closeBtn.onclick = () => {
@@ -28,25 +61,133 @@ function setupEventListeners() {
     window.onclick = (event) => {
         if (event.target == modal) modal.style.display = "none";
     };
+
+    window.addEventListener('scroll', updateComputerList, { passive: true });
+    window.addEventListener('resize', updateComputerList);
 }
 
 function setupSocketListeners() {
-    socket.on('update_computer_list', (updatedComputers) => {
+    // (ხელახალი) დაკავშირებისას ვითხოვთ გამოტოვებულ ცვლილებებს ან სრულ სიას
+    socket.on('connect', requestResync);
+    // გაწყვეტისას პასუხგაუცემელი resync იკარგება - ხელახალი დაკავშირებისას თავიდან იგზავნება
+    socket.on('disconnect', clearResync);
+    socket.on('resync_error', (error) => {
+        clearResync();
+        console.error("resync უარყოფილია:", error.message);
+        showError(error.message || 'ცვლილებების სინქრონიზაცია ვერ მოხერხდა.');
+    });
+    socket.on('connect', fetchAlerts);
+    socket.on('alerts', applyAlerts);
+
+    socket.on('update_computer_list', (snapshot) => {
         try {
-            console.log("მიღებულია განახლებული კომპიუტერების სია:", updatedComputers);
-            if (updatedComputers['A2F0002']) {
-                console.log("A2F0002-ის განახლებული მონაცემები:", updatedComputers['A2F0002']);
-            } else {
-                console.log("A2F0002 არ არის განახლებულ სიაში");
-            }
-            updateComputerList(updatedComputers);
+            console.log("მიღებულია სრული კომპიუტერების სია, seq:", snapshot.seq);
+            clearResync();
+            statusVersion = snapshot.status_version ?? null;
+            setComputers(snapshot.computers, snapshot.epoch, snapshot.seq);
         } catch (error) {
             console.error("შეცდომა კომპიუტერების სიის განახლებისას:", error);
             showError('კომპიუტერების სიის განახლება ვერ მოხერხდა.');
         }
     });
 
+    socket.on('computer_delta', (delta) => {
+        if (applyDelta(delta)) updateComputerList();
+    });
+
+    socket.on('computer_deltas', (deltas) => {
+        clearResync();
+        let changed = false;
+        for (const delta of deltas) changed = applyDelta(delta) || changed;
+        if (changed) updateComputerList();
+    });
+
+    // ერთი პარტიის ცვლილებები (მაგ. აგენტების მასობრივი შეერთება) ერთ მოვლენად
+    socket.on('computer_delta_batch', (deltas) => {
+        let changed = false;
+        for (const delta of deltas) changed = applyDelta(delta) || changed;
+        if (changed) updateComputerList();
+    });
+
+    socket.on('status_changes', (changes) => {
+        let changed = false;
+        for (const change of changes) {
+            const computer = computers[change.hostname];
+            if (!computer) continue;
+            computer.status = change.status;
+            computer.color = change.color;
+            changed = true;
+        }
+        if (changes.length) statusVersion = changes[changes.length - 1].status_version ?? statusVersion;
+        if (changed) updateComputerList();
+    });
+
     socket.on('check_result', handleCheckResult);
+    socket.on('bulk_command_result', handleCheckResult);
+    socket.on('bulk_command_progress', renderBulkProgress);
+}
+
+function requestResync() {
+    if (resyncPending) return;
+    resyncPending = true;
+    socket.emit('resync', { epoch: registryEpoch, since: registrySeq, status_version: statusVersion });
+    resyncTimer = setTimeout(() => {
+        clearResync();
+        if (socket.connected) requestResync();
+    }, RESYNC_TIMEOUT);
+}
+
+function clearResync() {
+    resyncPending = false;
+    clearTimeout(resyncTimer);
+    resyncTimer = null;
+}
+
+function setComputers(data, epoch, seq) {
+    computers = data || {};
+    registryEpoch = epoch;
+    registrySeq = seq;
+    orderedHostnames = null;
+    updateComputerList();
+}
+
+function applyDelta(delta) {
+    if (registrySeq === null || delta.epoch !== registryEpoch) {
+        requestResync();
+        return false;
+    }
+    if (delta.seq <= registrySeq) return false;
+    if (delta.seq !== registrySeq + 1) {
+        // გამოტოვებული ცვლილება - ვითხოვთ resync-ს ბოლო ცნობილი seq-დან
+        requestResync();
+        return false;
+    }
+
+    registrySeq = delta.seq;
+    if (delta.deleted) {
+        delete computers[delta.hostname];
+        orderedHostnames = null;
+        return true;
+    }
+
+    if (!computers[delta.hostname]) orderedHostnames = null;
+    const computer = computers[delta.hostname] || {};
+    for (const [key, value] of Object.entries(delta.patch || {})) {
+        if (value === null) {
+            delete computer[key];
+        } else if (typeof value === 'object' && !Array.isArray(value) && typeof computer[key] === 'object') {
+            for (const [field, fieldValue] of Object.entries(value)) {
+                if (fieldValue === null) delete computer[key][field];
+                else computer[key][field] = fieldValue;
+            }
+        } else {
+            computer[key] = value;
+        }
+    }
+    if (delta.status) computer.status = delta.status;
+    if (delta.color) computer.color = delta.color;
+    computers[delta.hostname] = computer;
+    return true;
 }
 
 async function fetchComputers() {
@@ -55,33 +196,101 @@ async function fetchComputers() {
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
         const data = await response.json();
         console.log("მიღებულია კომპიუტერების მონაცემები:", data);
-        updateComputerList(data);
+        setComputers(data, response.headers.get('X-Registry-Epoch'), parseInt(response.headers.get('X-Registry-Seq'), 10));
     } catch (error) {
         console.error("შეცდომა კომპიუტერების მიღებისას:", error);
         showError('კომპიუტერების სიის მიღება ვერ მოხერხდა.');
     }
 }
 
-function updateComputerList(data) {
-    console.log("კომპიუტერების სიის განახლება მონაცემებით:", data);
+function updateComputerList() {
+    // განახლებების ნაკადი ერთიანდება ერთ რენდერში შემდეგ კადრზე
+    if (renderScheduled) return;
+    renderScheduled = true;
+    requestAnimationFrame(() => {
+        renderScheduled = false;
+        renderComputerList();
+    });
+}
+
+function getOrderedHostnames() {
+    if (orderedHostnames === null) {
+        orderedHostnames = Object.keys(computers)
+            .filter(hostname => !searchMatches || searchMatches.has(hostname))
+            .sort();
+    }
+    return orderedHostnames;
+}
+
+function getVisibleRange(hostGrid, total) {
+    const columns = Math.max(1, Math.floor((hostGrid.clientWidth + GRID_GAP) / (CARD_MIN_WIDTH + GRID_GAP)));
+    const totalRows = Math.ceil(total / columns);
+    const gridTop = hostGrid.getBoundingClientRect().top + window.scrollY;
+    const firstRow = Math.max(0, Math.floor((window.scrollY - gridTop) / rowHeight) - OVERSCAN_ROWS);
+    const lastRow = Math.min(totalRows, Math.ceil((window.scrollY + window.innerHeight - gridTop) / rowHeight) + OVERSCAN_ROWS);
+    return { columns, totalRows, firstRow, lastRow: Math.max(firstRow, lastRow) };
+}
+
+function cardSignature(data) {
+    return [data.status, data.cpu_usage, data.memory_usage, data.disk_usage, data.network_usage,
+        data.ip_address, data.anydesk_id, data.last_update, data.alerts.join(',')].join('|');
+}
+
+function getCard(hostname) {
+    const computer = computers[hostname];
+    const alerts = Object.keys(activeAlerts[hostname] || {}).sort();
+    const computerData = { ...computer.static, ...computer.dynamic, status: computer.status, alerts };
+    const signature = cardSignature(computerData);
+    const cached = cardCache.get(hostname);
+    if (cached && cached.signature === signature) return cached.card;
+
+    const card = createComputerCard(hostname, computerData);
+    cardCache.set(hostname, { card, signature });
+    return card;
+}
+
+function renderComputerList() {
     const hostGrid = document.getElementById('hostGrid');
-    hostGrid.innerHTML = '';
+    const hostnames = getOrderedHostnames();
 
-    if (!data || Object.keys(data).length === 0) {
+    if (hostnames.length === 0) {
+        cardCache.clear();
+        hostGrid.style.paddingTop = '';
+        hostGrid.style.paddingBottom = '';
         hostGrid.innerHTML = '<p>კომპიუტერები ვერ მოიძებნა.</p>';
         return;
     }
 
-    for (const hostname in data) {
-        const computerData = { ...data[hostname].static, ...data[hostname].dynamic, status: data[hostname].status };
-        const computerCard = createComputerCard(hostname, computerData);
-        if (computerCard) hostGrid.appendChild(computerCard);
+    const { columns, totalRows, firstRow, lastRow } = getVisibleRange(hostGrid, hostnames.length);
+    const visible = hostnames.slice(firstRow * columns, lastRow * columns);
+    const cards = visible.map(getCard);
+
+    // keyed patch: DOM-ს ვეხებით მხოლოდ იქ, სადაც ბარათი შეიცვალა ან გადაინაცვლა
+    cards.forEach((card, index) => {
+        const current = hostGrid.children[index];
+        if (current !== card) hostGrid.insertBefore(card, current || null);
+    });
+    while (hostGrid.children.length > cards.length) hostGrid.lastElementChild.remove();
+
+    const visibleSet = new Set(visible);
+    for (const hostname of cardCache.keys()) {
+        if (!visibleSet.has(hostname)) cardCache.delete(hostname);
+    }
+
+    hostGrid.style.paddingTop = `${GRID_GAP + firstRow * rowHeight}px`;
+    hostGrid.style.paddingBottom = `${GRID_GAP + (totalRows - lastRow) * rowHeight}px`;
+
+    // რიგის სიმაღლე იზომება რეალური ბარათით; შეცვლისას ხელახლა ვითვლით ხილულ დიაპაზონს
+    const measured = cards.length ? cards[0].offsetHeight + GRID_GAP : rowHeight;
+    if (measured > GRID_GAP && Math.abs(measured - rowHeight) > 1) {
+        rowHeight = measured;
+        updateComputerList();
     }
 }
 
 function createComputerCard(hostname, data) {
     const card = document.createElement('div');
-    card.className = 'host-card';
+    card.className = data.alerts.length ? 'host-card alerting' : 'host-card';
     card.dataset.hostname = hostname;
 
     card.innerHTML = `
@@ -90,6 +299,7 @@ function createComputerCard(hostname, data) {
             ${createDropdown(hostname)}
         </div>
         <span class="status-badge ${data.status}"><i class="fas fa-${getStatusIcon(data.status)}"></i> ${getStatusText(data.status)}</span>
+        ${data.alerts.length ? `<span class="alert-badge"><i class="fas fa-exclamation-triangle"></i> ${data.alerts.join(', ')}</span>` : ''}
         ${createUsageInfo(data)}
         <p><i class="fas fa-network-wired"></i> IP: ${data.ip_address || 'N/A'}</p>
         <p><i class="fas fa-id-badge"></i> AnyDesk ID: ${data.anydesk_id || 'N/A'}</p>
@@ -181,10 +391,107 @@ function checkHost(hostname) {
     showPopUpMessage(`მონაცემები გაიგზავნა ${hostname}-ის შემოწმებისთვის!`);
 }
 
+// ჯგუფური ბრძანება ძებნით ნაპოვნ ჰოსტებზე, ფილტრის გარეშე - ყველა online ჰოსტზე
+function bulkCommand(command) {
+    const selector = searchMatches ? { hostnames: [...searchMatches] } : { status: ['online'] };
+    const target = searchMatches ? `${searchMatches.size} ნაპოვნ ჰოსტზე` : 'ყველა online ჰოსტზე';
+    if (searchMatches && searchMatches.size === 0) {
+        showError('ძებნის შედეგი ცარიელია.');
+        return;
+    }
+    if (command === 'restart' && !confirm(`დარწმუნებული ხართ, რომ გსურთ გადატვირთვა ${target}?`)) return;
+    socket.emit('bulk_command', { command, selector });
+}
+
+const bulkJobs = {};
+
+function renderBulkProgress(progress) {
+    const container = document.getElementById('bulk-progress');
+    if (!container) return;
+    bulkJobs[progress.job_id] = progress;
+    if (progress.finished) {
+        // დასრულებული ბრძანება ცოტა ხანს რჩება ეკრანზე
+        setTimeout(() => {
+            delete bulkJobs[progress.job_id];
+            renderBulkProgress.refresh();
+        }, 15000);
+    }
+    renderBulkProgress.refresh();
+}
+
+renderBulkProgress.refresh = () => {
+    const container = document.getElementById('bulk-progress');
+    const jobs = Object.values(bulkJobs);
+    container.style.display = jobs.length ? 'block' : 'none';
+    container.innerHTML = jobs.map(job => {
+        const c = job.counts;
+        const completed = c.done + c.failed + c.timeout + c.offline;
+        return `<div><strong>${job.command}</strong> ${completed}/${job.total}` +
+            ` — შესრულდა: ${c.done}, დადასტურდა: ${c.acked}, ლოდინში: ${c.pending + c.sent},` +
+            ` შეცდომა: ${c.failed}, ვადა გავიდა: ${c.timeout}, offline: ${c.offline}` +
+            `${job.finished ? ' ✓' : ''}</div>`;
+    }).join('');
+};
+
+function fetchAlerts() {
+    fetch('/alerts')
+        .then(response => response.json())
+        .then(data => {
+            activeAlerts = {};
+            for (const alert of data.alerts || []) {
+                (activeAlerts[alert.hostname] = activeAlerts[alert.hostname] || {})[alert.rule] = alert;
+            }
+            updateComputerList();
+        })
+        .catch(error => console.error('ალერტების მიღება ვერ მოხერხდა:', error));
+}
+
+function applyAlerts(events) {
+    const fired = [];
+    for (const alert of events) {
+        const hostAlerts = activeAlerts[alert.hostname] || {};
+        if (alert.state === 'firing') {
+            hostAlerts[alert.rule] = alert;
+            fired.push(alert);
+        } else {
+            delete hostAlerts[alert.rule];
+        }
+        if (Object.keys(hostAlerts).length) activeAlerts[alert.hostname] = hostAlerts;
+        else delete activeAlerts[alert.hostname];
+    }
+    // ალერტების ტალღისას ეკრანზე მხოლოდ რამდენიმე შეტყობინება
+    fired.slice(0, 3).forEach(alert => showError(`${alert.hostname}: ${alert.rule}`));
+    if (fired.length > 3) showError(`და კიდევ ${fired.length - 3} ალერტი`);
+    updateComputerList();
+}
+
+function fetchFleetSummary() {
+    fetch(`/fleet_aggregates?${FLEET_SUMMARY_QUERY}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) renderFleetSummary(data);
+        })
+        .catch(error => console.error('ფლოტის შეჯამების მიღება ვერ მოხერხდა:', error));
+}
+
+function renderFleetSummary(data) {
+    const container = document.getElementById('fleet-summary');
+    if (!container) return;
+    const groups = data.groups || {};
+    const count = status => groups[status]?.hosts || 0;
+    const metric = (name, label) => {
+        const m = data.overall[name];
+        if (!m || !m.count) return '';
+        return `<span>${label}: საშ. ${m.mean.toFixed(1)}%, p95 ${m.percentiles.p95.toFixed(1)}%, >90%: ${m.above}</span>`;
+    };
+    container.innerHTML =
+        `<span>ჰოსტები: ${data.hosts} (online ${count('online')}, idle ${count('idle')}, offline ${count('offline')})</span>` +
+        metric('cpu_usage', 'CPU') + metric('memory_usage', 'მეხსიერება') + metric('disk_usage', 'დისკი');
+}
+
 function handleCheckResult(result) {
     if (result.success) {
         showMessage(result.message);
-        fetchComputers(); // განვაახლოთ კომპიუტერების სია შემოწმების შემდეგ
     } else {
         showError(result.message);
     }
@@ -249,12 +556,41 @@ function applyDarkModeSetting() {
 }
 
 function searchHost(event) {
-    const searchTerm = event.target.value.toLowerCase();
-    const hosts = document.querySelectorAll('.host-card');
-    hosts.forEach(host => {
-        const hostname = host.dataset.hostname.toLowerCase();
-        host.style.display = hostname.includes(searchTerm) ? '' : 'none';
-    });
+    const searchTerm = event.target.value.trim();
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => runSearch(searchTerm), 250);
+}
+
+async function runSearch(searchTerm) {
+    if (!searchTerm) {
+        searchMatches = null;
+        applySearchFilter();
+        return;
+    }
+    try {
+        // ძებნა სერვერის ინდექსით; ვითხოვთ მხოლოდ hostname-ებს
+        const matches = new Set();
+        let cursor = null;
+        do {
+            const params = new URLSearchParams({ q: searchTerm, fields: 'hostname', limit: 1000 });
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`/query_computers?${params}`);
+            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+            const data = await response.json();
+            data.items.forEach(item => matches.add(item.hostname));
+            cursor = data.next_cursor;
+        } while (cursor);
+        searchMatches = matches;
+        applySearchFilter();
+    } catch (error) {
+        console.error("შეცდომა ჰოსტის ძებნისას:", error);
+        showError('ჰოსტის ძებნა ვერ მოხერხდა.');
+    }
+}
+
+function applySearchFilter() {
+    orderedHostnames = null;
+    updateComputerList();
 }
 
 function showMessage(message) {